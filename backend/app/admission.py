@@ -0,0 +1,171 @@
+"""
+Admission control for expensive endpoints.
+
+Each endpoint class (uploads, queries) runs at most max_concurrent requests at
+once; further requests wait in a bounded FIFO queue. A request that finds the
+queue full is rejected immediately (429), and one that waits longer than the
+queue timeout gives up (503), so overload shows up as fast rejections with a
+Retry-After hint instead of unbounded latency and memory growth.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+from app.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTIONS, ADMISSION_WAIT
+
+# Weight of the newest request in the moving average of service time
+_SERVICE_TIME_ALPHA = 0.2
+
+
+class AdmissionRejected(Exception):
+    """A request was turned away because its endpoint class is saturated."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Concurrency limit with a bounded wait queue for one endpoint class.
+
+    Not thread-safe: all calls must come from the event loop thread.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int,
+        max_queue: Optional[int],
+        queue_timeout: Optional[float] = None
+    ):
+        """
+        Initialize admission controller.
+
+        Args:
+            name: Endpoint class, used as the metrics label
+            max_concurrent: Requests allowed to run at once (0 disables admission control)
+            max_queue: Requests allowed to wait for a slot; more are rejected with 429
+                (None queues without limit, for work that cannot be turned away)
+            queue_timeout: Seconds a request may wait before it is rejected with 503
+                (None or 0 waits indefinitely)
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout or None
+        self.active = 0
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {'queue_full': 0, 'timeout': 0}
+        # Moving average of how long an admitted request holds its slot
+        self.service_time: Optional[float] = None
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrent > 0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up for a new request."""
+        service_time = self.service_time if self.service_time is not None else 1.0
+        ahead = self.queue_depth + 1
+        return max(1, math.ceil(service_time * ahead / max(1, self.max_concurrent)))
+
+    def _update_gauges(self):
+        ADMISSION_IN_FLIGHT.set(self.active, endpoint=self.name)
+        ADMISSION_QUEUE_DEPTH.set(self.queue_depth, endpoint=self.name)
+
+    def _reject(self, status_code: int, reason: str) -> AdmissionRejected:
+        self.rejected[reason] += 1
+        ADMISSION_REJECTIONS.inc(endpoint=self.name, reason=reason)
+        return AdmissionRejected(status_code, reason, self.retry_after())
+
+    async def acquire(self):
+        """
+        Wait for a slot.
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait timed out
+        """
+        if self.active < self.max_concurrent and not self.queue_depth:
+            self.active += 1
+            self.admitted += 1
+            self._update_gauges()
+            return
+        if self.max_queue is not None and self.queue_depth >= self.max_queue:
+            raise self._reject(429, 'queue_full')
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._update_gauges()
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # Timed out, or the client went away, just as release() handed this waiter
+            # the slot: pass it on rather than leak it
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject(503, 'timeout')
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._update_gauges()
+        ADMISSION_WAIT.observe(time.perf_counter() - start, endpoint=self.name)
+        self.admitted += 1
+
+    def release(self):
+        """Free a slot, handing it straight to the oldest waiting request if any."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot moves to the waiter, so active stays the same
+                waiter.set_result(None)
+                self._update_gauges()
+                return
+        self.active -= 1
+        self._update_gauges()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a slot for the duration of the with-block."""
+        await self.acquire()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if self.service_time is None:
+                self.service_time = elapsed
+            else:
+                self.service_time += _SERVICE_TIME_ALPHA * (elapsed - self.service_time)
+            self.release()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get admission counters.
+
+        Returns:
+            Dict with limits, in-flight and queued requests, admissions and rejections
+        """
+        return {
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            'in_flight': self.active,
+            'queue_depth': self.queue_depth,
+            'admitted': self.admitted,
+            'rejected_queue_full': self.rejected['queue_full'],
+            'rejected_timeout': self.rejected['timeout'],
+            'service_time': self.service_time or 0.0
+        }
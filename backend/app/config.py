@@ -0,0 +1,99 @@
+"""
+Runtime configuration read from environment variables.
+"""
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting, falling back to the default when unset."""
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting, falling back to the default when unset."""
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+# Semantic answer cache (per session)
+SEMANTIC_CACHE_ENABLED = os.getenv("RAG_SEMANTIC_CACHE", "1") != "0"
+SEMANTIC_CACHE_THRESHOLD = _env_float("RAG_SEMANTIC_CACHE_THRESHOLD", 0.95)
+SEMANTIC_CACHE_MAX_ENTRIES = _env_int("RAG_SEMANTIC_CACHE_MAX_ENTRIES", 256)
+
+# Per-request sampling profiler. The middleware is only installed when enabled.
+PROFILING_ENABLED = os.getenv("RAG_PROFILING", "0") == "1"
+PROFILE_SAMPLE_RATE = _env_float("RAG_PROFILE_SAMPLE_RATE", 0.0)
+PROFILE_INTERVAL = _env_float("RAG_PROFILE_INTERVAL", 0.005)
+PROFILE_MAX_STORED = _env_int("RAG_PROFILE_MAX_STORED", 50)
+PROFILE_DIR = os.getenv("RAG_PROFILE_DIR")
+
+# Load and warm models in the background at startup; /ready reports completion
+WARMUP_ENABLED = os.getenv("RAG_WARMUP", "1") != "0"
+
+# Directory where finalized sessions are published for every worker process to
+# memory-map (e.g. /dev/shm/rag-sessions). Unset keeps sessions process-local.
+SHARED_SESSION_DIR = os.getenv("RAG_SHARED_SESSION_DIR") or None
+
+# Return from /upload once the vector index is built and extract entities and build
+# the graph in the background; /query reports graph_pending meanwhile. 0 waits for both.
+STAGED_UPLOAD = os.getenv("RAG_STAGED_UPLOAD", "1") != "0"
+
+# Directory caching each uploaded document's chunks, entities and embeddings by
+# content hash, so re-uploads skip preprocessing, NER and encoding. Unset disables it.
+DOCUMENT_CACHE_DIR = os.getenv("RAG_DOCUMENT_CACHE_DIR") or None
+DOCUMENT_CACHE_MAX_MB = _env_int("RAG_DOCUMENT_CACHE_MAX_MB", 1024)
+
+# Admission control: at most *_CONCURRENCY requests of each endpoint class run at
+# once and up to *_QUEUE more wait for a slot. Requests that find the queue full get
+# 429, and those queued longer than RAG_ADMISSION_QUEUE_TIMEOUT_S get 503, both with
+# Retry-After. A concurrency of 0 disables admission control for that class.
+UPLOAD_CONCURRENCY = _env_int("RAG_UPLOAD_CONCURRENCY", 2)
+UPLOAD_QUEUE = _env_int("RAG_UPLOAD_QUEUE", 8)
+QUERY_CONCURRENCY = _env_int("RAG_QUERY_CONCURRENCY", 32)
+QUERY_QUEUE = _env_int("RAG_QUERY_QUEUE", 128)
+ADMISSION_QUEUE_TIMEOUT_S = _env_float("RAG_ADMISSION_QUEUE_TIMEOUT_S", 30.0)
+# Staged uploads build their graph after the response, outside the upload limit; at most
+# this many such builds run at once and the rest wait (never rejected). 0 disables the limit.
+GRAPH_BUILD_CONCURRENCY = _env_int("RAG_GRAPH_BUILD_CONCURRENCY", UPLOAD_CONCURRENCY)
+
+# Embedding backend: "torch" (SentenceTransformer) or "onnx" (ONNX Runtime)
+EMBEDDING_BACKEND = os.getenv("RAG_EMBEDDING_BACKEND", "torch")
+EMBEDDING_QUANTIZE = os.getenv("RAG_EMBEDDING_QUANTIZE", "0") == "1"
+EMBEDDING_ONNX_DIR = os.getenv(
+    "RAG_EMBEDDING_ONNX_DIR", os.path.join(os.path.expanduser("~"), ".cache", "rag-onnx")
+)
+
+# Micro-batch query embeddings from concurrent /query requests. A window of 0
+# disables batching and encodes each query on its own.
+QUERY_BATCH_WINDOW_MS = _env_float("RAG_QUERY_BATCH_WINDOW_MS", 2.0)
+QUERY_BATCH_MAX_SIZE = _env_int("RAG_QUERY_BATCH_MAX_SIZE", 32)
+
+# Multi-process embedding for large uploads. 0 workers keeps encoding in-process;
+# uploads with fewer than RAG_EMBEDDING_POOL_MIN_CHUNKS chunks never use the pool.
+EMBEDDING_WORKERS = _env_int("RAG_EMBEDDING_WORKERS", 0)
+EMBEDDING_THREADS_PER_WORKER = _env_int("RAG_EMBEDDING_THREADS_PER_WORKER", 1)
+EMBEDDING_BATCH_SIZE = _env_int("RAG_EMBEDDING_BATCH_SIZE", 64)
+EMBEDDING_POOL_MIN_CHUNKS = _env_int("RAG_EMBEDDING_POOL_MIN_CHUNKS", 1000)
+
+# Multi-process preprocessing (PDF extraction, cleaning, chunking) for large uploads.
+# 0 workers keeps it in-process; uploads with fewer than RAG_PREPROCESS_POOL_MIN_FILES
+# files never use the pool.
+PREPROCESS_WORKERS = _env_int("RAG_PREPROCESS_WORKERS", 0)
+PREPROCESS_POOL_MIN_FILES = _env_int("RAG_PREPROCESS_POOL_MIN_FILES", 4)
+
+# Near-duplicate chunk removal at upload (MinHash over word shingles)
+DEDUP_ENABLED = os.getenv("RAG_DEDUP", "1") != "0"
+DEDUP_THRESHOLD = _env_float("RAG_DEDUP_THRESHOLD", 0.9)
+DEDUP_NUM_PERM = _env_int("RAG_DEDUP_NUM_PERM", 128)
+DEDUP_SHINGLE_SIZE = _env_int("RAG_DEDUP_SHINGLE_SIZE", 5)
+
+# Knowledge graph storage: "networkx" or "csr" (compact interned arrays)
+GRAPH_BACKEND = os.getenv("RAG_GRAPH_BACKEND", "networkx")
+# Node ranking used to cap graph payloads: "pagerank" or "degree"
+GRAPH_CENTRALITY = os.getenv("RAG_GRAPH_CENTRALITY", "pagerank")
+# Default graph size per /query response (overridable per request)
+GRAPH_MAX_NODES = _env_int("RAG_GRAPH_MAX_NODES", 200)
+GRAPH_MAX_EDGES = _env_int("RAG_GRAPH_MAX_EDGES", 400)
+# Most chunks a graph-expanded query (expand_hops) adds to the FAISS top-k
+GRAPH_EXPAND_MAX_CHUNKS = _env_int("RAG_GRAPH_EXPAND_MAX_CHUNKS", 5)
@@ -1,22 +1,44 @@
 """
 Main FastAPI application.
 """
+import math
 import os
+import random
+import threading
+import time
 import uuid
-from typing import List
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.models.schemas import (
-    QueryRequest, QueryResponse, UploadResponse, StatusResponse,
+    QUERY_SECTIONS, QueryRequest, QueryResponse, UploadResponse, StatusResponse, ReadinessResponse, SearchFilters,
     Entity, Relationship, GraphNode, GraphEdge, GraphData
 )
-from app.modules.preprocessing import preprocess_documents
-from app.modules.retrieval import EmbeddingModel, FAISSRetriever
+from app.modules.preprocessing import iter_preprocess_files, preprocess_uploads
+from app.modules.retrieval import EmbeddingModel
 from app.modules.entity_extraction import EntityExtractor
-from app.modules.graph_builder import KnowledgeGraphBuilder
 from app.modules.answer_generator import AnswerGenerator
+from app.modules.batching import QueryEmbeddingBatcher
+from app.modules.dedup import ChunkDeduplicator
+from app.modules.document_cache import DocumentArtifacts, DocumentCache
+from app.modules.embedding_pool import EmbeddingPool
+from app.modules.entity_table import EntityTable
+from app.modules.preprocessing_pool import PreprocessingPool
+from app.modules.graph_builder import KnowledgeGraphBuilder
+from app.modules.federation import FederatedSearcher, SearchHit, merge_graph_data, merge_relationships
+from app.modules.lexical import LexicalFeatures
+from app.modules.metadata import ChunkMetadata
+from app.modules.session_store import RAGSession, SessionStore
+from app import config
+from app.metrics import (
+    CHUNKS_DEDUPLICATED, REGISTRY, SESSIONS_RESIDENT, STAGE_LATENCY, WARMUP_DURATION
+)
+from app.admission import AdmissionController, AdmissionRejected
+from app.profiling import ProfileStore, ProfilingMiddleware, run_in_threadpool
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -34,48 +56,254 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in request profiling (RAG_PROFILING=1); nothing is installed when disabled
+PROFILED_PATHS = ("/upload", "/query")
+profile_store = ProfileStore(config.PROFILE_MAX_STORED, config.PROFILE_DIR)
+profile_sample_rate = config.PROFILE_SAMPLE_RATE
+
+
+def wants_profile(scope) -> bool:
+    """Profile a request when it sends X-Profile: 1 or is picked by sampling."""
+    return (b"x-profile", b"1") in scope["headers"] or (
+        profile_sample_rate > 0 and random.random() < profile_sample_rate
+    )
+
+
+if config.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=profile_store,
+        paths=PROFILED_PATHS,
+        wanted=wants_profile,
+        interval=config.PROFILE_INTERVAL
+    )
+
+# Admission control: bounded concurrency and wait queues per endpoint class. Installed
+# after the profiler so rejected requests never start a profile or read their body.
+ADMISSION_CLASSES = {"/upload": "upload", "/query": "query", "/debug/retrieve": "query"}
+admission = {
+    "upload": AdmissionController(
+        "upload", config.UPLOAD_CONCURRENCY, config.UPLOAD_QUEUE, config.ADMISSION_QUEUE_TIMEOUT_S
+    ),
+    "query": AdmissionController(
+        "query", config.QUERY_CONCURRENCY, config.QUERY_QUEUE, config.ADMISSION_QUEUE_TIMEOUT_S
+    ),
+    # Not an endpoint: background graph builds of staged uploads, queued without limit
+    "graph_build": AdmissionController("graph_build", config.GRAPH_BUILD_CONCURRENCY, None),
+}
+
+
+@app.middleware("http")
+async def admit_requests(request: Request, call_next):
+    """Run uploads and queries within their class's concurrency limit, or reject them fast."""
+    controller = admission.get(ADMISSION_CLASSES.get(request.url.path))
+    if controller is None or not controller.enabled or request.method != "POST":
+        return await call_next(request)
+    try:
+        async with controller.slot():
+            return await call_next(request)
+    except AdmissionRejected as e:
+        detail = (
+            f"Too many {controller.name} requests queued" if e.reason == 'queue_full'
+            else f"Timed out waiting for a {controller.name} slot"
+        )
+        return JSONResponse(
+            status_code=e.status_code,
+            content={"detail": detail},
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
 # Global state for sessions (in-memory, for production use DB)
 sessions = {}
+SESSIONS_RESIDENT.set_function(lambda: len(sessions))
 
-# Lazy initialization of components (on first use)
+# Shared store so sessions uploaded through one uvicorn worker are queryable from all
+session_store = SessionStore(config.SHARED_SESSION_DIR) if config.SHARED_SESSION_DIR else None
+
+# Lazy initialization of components (on first use, or by the startup warm-up)
 embedding_model = None
 entity_extractor = None
 answer_generator = None
+query_batcher = None
+embedding_pool = None
+preprocessing_pool = None
+document_cache = None
+federated_searcher = None
+_init_lock = threading.Lock()
+
+# Startup warm-up progress, reported by /ready
+warmup_state = {'status': 'pending', 'duration_s': None, 'error': None}
 
 def get_embedding_model():
     """Lazily initialize embedding model on first use."""
     global embedding_model
     if embedding_model is None:
-        print("Initializing embedding model (this may take a moment)...")
-        embedding_model = EmbeddingModel()
+        with _init_lock:
+            if embedding_model is None:
+                print("Initializing embedding model (this may take a moment)...")
+                embedding_model = EmbeddingModel()
     return embedding_model
 
 def get_entity_extractor():
     """Lazily initialize entity extractor on first use."""
     global entity_extractor
     if entity_extractor is None:
-        entity_extractor = EntityExtractor()
+        with _init_lock:
+            if entity_extractor is None:
+                entity_extractor = EntityExtractor()
     return entity_extractor
 
 def get_answer_generator():
     """Lazily initialize answer generator on first use."""
     global answer_generator
     if answer_generator is None:
-        answer_generator = AnswerGenerator()
+        with _init_lock:
+            if answer_generator is None:
+                answer_generator = AnswerGenerator()
     return answer_generator
 
+def get_query_batcher():
+    """Lazily create the query embedding batcher around the shared embedding model."""
+    global query_batcher
+    if query_batcher is None:
+        model = get_embedding_model()
+        with _init_lock:
+            if query_batcher is None:
+                query_batcher = QueryEmbeddingBatcher(
+                    model.encode, config.QUERY_BATCH_WINDOW_MS, config.QUERY_BATCH_MAX_SIZE
+                )
+    return query_batcher
+
+def get_embedding_pool():
+    """Lazily start the bulk embedding worker pool, or None when disabled."""
+    global embedding_pool
+    if config.EMBEDDING_WORKERS <= 0:
+        return None
+    if embedding_pool is None:
+        model = get_embedding_model()
+        with _init_lock:
+            if embedding_pool is None:
+                factory = partial(
+                    EmbeddingModel, model.model_name, backend=model.backend,
+                    quantize=model.quantize, num_threads=config.EMBEDDING_THREADS_PER_WORKER
+                )
+                embedding_pool = EmbeddingPool(
+                    factory,
+                    workers=config.EMBEDDING_WORKERS,
+                    threads_per_worker=config.EMBEDDING_THREADS_PER_WORKER,
+                    batch_size=config.EMBEDDING_BATCH_SIZE
+                )
+    return embedding_pool
+
+def get_preprocessing_pool():
+    """Lazily start the document preprocessing worker pool, or None when disabled."""
+    global preprocessing_pool
+    if config.PREPROCESS_WORKERS <= 0:
+        return None
+    if preprocessing_pool is None:
+        with _init_lock:
+            if preprocessing_pool is None:
+                preprocessing_pool = PreprocessingPool(workers=config.PREPROCESS_WORKERS)
+    return preprocessing_pool
+
+def get_document_cache():
+    """Lazily open the per-document artifact cache, or None when disabled."""
+    global document_cache
+    if config.DOCUMENT_CACHE_DIR is None:
+        return None
+    if document_cache is None:
+        model = get_embedding_model()
+        extractor = get_entity_extractor()
+        with _init_lock:
+            if document_cache is None:
+                # Cached chunks, entities and vectors are only valid for the models that made them
+                fingerprint = (
+                    f"{model.model_name}:{model.backend}:{model.quantize}:"
+                    f"{'fallback' if extractor.use_fallback else 'spacy'}"
+                )
+                document_cache = DocumentCache(
+                    config.DOCUMENT_CACHE_DIR, config.DOCUMENT_CACHE_MAX_MB * 1024 * 1024, fingerprint
+                )
+    return document_cache
 
-class RAGSession:
-    """Session object for managing uploaded documents and indices."""
+def get_federated_searcher():
+    """Lazily create the thread pool used by multi-index queries."""
+    global federated_searcher
+    if federated_searcher is None:
+        with _init_lock:
+            if federated_searcher is None:
+                federated_searcher = FederatedSearcher()
+    return federated_searcher
+
+
+def warm_up_models():
+    """Load all models and run a dummy inference so the first request pays nothing."""
+    warmup_state['status'] = 'warming'
+    start = time.perf_counter()
+    try:
+        get_embedding_model().encode(["Warm-up query for the embedding model."])
+        get_entity_extractor().extract_entities("Warm-up text mentioning Acme Corp in Paris.")
+        get_answer_generator()
+        for pool in (get_embedding_pool(), get_preprocessing_pool()):
+            if pool is not None:
+                pool.warm_up()
+        warmup_state['status'] = 'ready'
+    except Exception as e:
+        print(f"Warm-up error: {e}")
+        warmup_state['status'] = 'failed'
+        warmup_state['error'] = str(e)
+    warmup_state['duration_s'] = time.perf_counter() - start
+    WARMUP_DURATION.set(warmup_state['duration_s'])
+    print(f"Model warm-up {warmup_state['status']} in {warmup_state['duration_s']:.2f}s")
+
+
+@app.on_event("startup")
+async def start_warmup():
+    """Warm models in a background thread so /status answers immediately."""
+    if config.WARMUP_ENABLED:
+        threading.Thread(target=warm_up_models, name="rag-warmup", daemon=True).start()
+    else:
+        warmup_state['status'] = 'ready'
+
+
+@app.on_event("shutdown")
+async def stop_workers():
+    """Stop embedding and preprocessing worker processes and the query encoding and search threads."""
+    global embedding_pool, preprocessing_pool, query_batcher, federated_searcher
+    for component in (embedding_pool, preprocessing_pool, query_batcher, federated_searcher):
+        if component is not None:
+            component.close()
+    embedding_pool = preprocessing_pool = query_batcher = federated_searcher = None
+
+
+def get_session(session_id: Optional[str]) -> Optional[RAGSession]:
+    """
+    Look up a session in this process, falling back to the shared store.
     
-    def __init__(self, session_id: str):
-        self.session_id = session_id
-        self.retriever = FAISSRetriever(get_embedding_model())
-        self.chunks = []
-        self.sources = []
-        self.entities = []
-        self.entity_chunk_map = {}
-        self.graph_builder = KnowledgeGraphBuilder()
+    Args:
+        session_id: Index ID returned by /upload
+        
+    Returns:
+        Session, or None if it does not exist
+    """
+    if not session_id:
+        return None
+    session = sessions.get(session_id)
+    if session_store is None:
+        return session
+    if session is not None:
+        if not session_store.is_live(session):
+            # Cleared through another worker
+            sessions.pop(session_id, None)
+            return None
+        if session.graph_pending:
+            # The uploading worker publishes the graph once it is built
+            session_store.load_graph(session)
+        return session
+    session = session_store.load(session_id, get_embedding_model())
+    if session is not None:
+        sessions[session_id] = session
+    return session
 
 
 @app.get("/status", response_model=StatusResponse)
@@ -87,12 +315,241 @@ async def status():
     )
 
 
+@app.get("/ready", response_model=ReadinessResponse)
+async def ready():
+    """Readiness probe for load balancers: 200 only once model warm-up has finished."""
+    body = ReadinessResponse(
+        status=warmup_state['status'],
+        warmup_duration_s=warmup_state['duration_s'],
+        error=warmup_state['error']
+    )
+    if warmup_state['status'] != 'ready':
+        return JSONResponse(status_code=503, content=body.model_dump())
+    return body
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: per-stage latency histograms, cache, session and LLM counters."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+def load_document_artifacts(
+    file_contents: List[Tuple[bytes, str]],
+    cache: DocumentCache
+) -> Tuple[List[Optional[DocumentArtifacts]], List[str]]:
+    """
+    Get each file's chunks, entity mentions and embeddings, from the cache when possible.
+    
+    Files that miss are preprocessed, and all of their chunks embedded and run through
+    NER before deduplication, so that the stored entry is complete.
+    
+    Args:
+        file_contents: List of (content, filename) tuples
+        cache: Document artifact cache
+        
+    Returns:
+        Tuple of (artifacts per file, None for failed files; names of failed files)
+    """
+    keys = [cache.key(content, filename) for content, filename in file_contents]
+    artifacts = [cache.get(key) for key in keys]
+    missing = [i for i, document in enumerate(artifacts) if document is None]
+    
+    failed_files = []
+    processed = {}
+    pool = get_preprocessing_pool() if len(missing) >= config.PREPROCESS_POOL_MIN_FILES else None
+    with STAGE_LATENCY.time(stage='preprocessing'):
+        results = iter_preprocess_files([file_contents[i] for i in missing], pool=pool)
+        for i, result in zip(missing, results):
+            if result.error is not None:
+                print(f"Error preprocessing {file_contents[i][1]}: {result.error}")
+                failed_files.append(file_contents[i][1])
+            else:
+                processed[i] = result
+    
+    texts = [chunk for result in processed.values() for chunk in result.chunks]
+    model = get_embedding_model()
+    vectors = np.zeros((0, model.dimension), dtype=np.float32)
+    mentions = []
+    if texts:
+        pool = get_embedding_pool() if len(texts) >= config.EMBEDDING_POOL_MIN_CHUNKS else None
+        vectors = (pool or model).encode(texts)
+        mentions = get_entity_extractor().extract_mentions(texts)
+    start = 0
+    for i, result in processed.items():
+        end = start + len(result.chunks)
+        artifacts[i] = DocumentArtifacts(
+            result.chunks, result.pages, mentions[start:end], vectors[start:end]
+        )
+        if result.chunks:
+            cache.put(keys[i], artifacts[i])
+        start = end
+    return artifacts, failed_files
+
+
+def build_session_graph(session: RAGSession, chunks: List[str], mentions: Optional[List] = None):
+    """
+    Extract a session's entities, build its knowledge graph and mark it ready.
+    
+    Args:
+        session: Session whose index is built
+        chunks: Indexed chunk texts
+        mentions: Per-chunk entity mentions from the document cache, extracted if None
+    """
+    # Extract entities into the session's interned entity table
+    if mentions is None:
+        table = get_entity_extractor().extract_table(chunks)
+    else:
+        table = EntityTable.from_mentions(mentions)
+    
+    # Build knowledge graph
+    session.graph_builder.build_graph_from_table(table, chunks)
+    session.entity_table = table
+    session.graph_ready.set()
+
+
+def finish_session(session: RAGSession, chunks: List[str], mentions: Optional[List] = None):
+    """
+    Background stage of a staged upload: build the graph, then publish it.
+    
+    Args:
+        session: Session already serving queries
+        chunks: Indexed chunk texts
+        mentions: Per-chunk entity mentions from the document cache, extracted if None
+    """
+    try:
+        build_session_graph(session, chunks, mentions)
+    except Exception as e:
+        # Keep serving retrieval and answers, with an empty graph
+        print(f"Graph build error for session {session.session_id}: {e}")
+        session.graph_builder = KnowledgeGraphBuilder()
+        session.entity_table = EntityTable.from_mentions([])
+        session.graph_ready.set()
+    # Skipped if the session was cleared while the graph was being built
+    if session_store is not None and sessions.get(session.session_id) is session:
+        try:
+            session_store.publish_graph(session)
+        except Exception as e:
+            print(f"Graph publish error for session {session.session_id}: {e}")
+
+
+async def run_finish_session(session: RAGSession, chunks: List[str], mentions: Optional[List] = None):
+    """
+    Run finish_session on a worker thread once a graph build slot is free.
+    
+    Args:
+        session: Session already serving queries
+        chunks: Indexed chunk texts
+        mentions: Per-chunk entity mentions from the document cache, extracted if None
+    """
+    controller = admission["graph_build"]
+    if not controller.enabled:
+        await run_in_threadpool(finish_session, session, chunks, mentions)
+        return
+    async with controller.slot():
+        await run_in_threadpool(finish_session, session, chunks, mentions)
+
+
+def process_upload(
+    file_contents: List[Tuple[bytes, str]],
+    background_tasks: BackgroundTasks
+) -> UploadResponse:
+    """
+    Build a session from uploaded files: preprocessing, deduplication, the index and,
+    unless uploads are staged, the graph. Blocking; runs on a worker thread.
+    
+    Args:
+        file_contents: List of (content, filename) tuples
+        background_tasks: Runs entity extraction and graph building after the response
+        
+    Returns:
+        Upload response with index ID and chunk count
+    """
+    # Preprocess documents, in worker processes for large uploads; files that
+    # fail are reported instead of failing the upload
+    cache = get_document_cache()
+    vectors = mentions = None
+    if cache is None:
+        pool = get_preprocessing_pool() if len(file_contents) >= config.PREPROCESS_POOL_MIN_FILES else None
+        with STAGE_LATENCY.time(stage='preprocessing'):
+            chunks, sources, pages, failed_files = preprocess_uploads(file_contents, pool=pool)
+    else:
+        # Re-uploaded documents come straight from the cache, already embedded
+        artifacts, failed_files = load_document_artifacts(file_contents, cache)
+        chunks, sources, pages, mentions = [], [], [], []
+        for (_, filename), document in zip(file_contents, artifacts):
+            if document is not None:
+                chunks.extend(document.chunks)
+                sources.extend([filename] * len(document.chunks))
+                pages.extend(document.pages)
+                mentions.extend(document.mentions)
+        if chunks:
+            vectors = np.concatenate([d.vectors for d in artifacts if d is not None])
+    
+    if not chunks:
+        raise HTTPException(status_code=400, detail="No text extracted from files")
+    
+    # Collapse repeated headers, disclaimers and near-identical revisions
+    # before anything is embedded; duplicates become extra references
+    extra_references = []
+    if config.DEDUP_ENABLED:
+        dedup = ChunkDeduplicator(
+            config.DEDUP_THRESHOLD, config.DEDUP_NUM_PERM, config.DEDUP_SHINGLE_SIZE
+        ).deduplicate(chunks)
+        extra_references = [(kept, sources[i], pages[i]) for i, kept in dedup.duplicates]
+        chunks = [chunks[i] for i in dedup.keep]
+        sources = [sources[i] for i in dedup.keep]
+        pages = [pages[i] for i in dedup.keep]
+        if vectors is not None:
+            vectors = vectors[dedup.keep]
+            mentions = [mentions[i] for i in dedup.keep]
+        CHUNKS_DEDUPLICATED.inc(len(extra_references))
+    
+    # Create session
+    session_id = str(uuid.uuid4())
+    session = RAGSession(session_id, get_embedding_model())
+    
+    # Build retrieval index
+    pool = get_embedding_pool() if len(chunks) >= config.EMBEDDING_POOL_MIN_CHUNKS else None
+    session.retriever.build_index(chunks, sources, pool=pool, embeddings=vectors)
+    session.metadata = ChunkMetadata.from_store(
+        session.retriever.store, pages, time.time(), extra_references
+    )
+    
+    # Precompute keyword features for the fallback answer path
+    session.lexical = LexicalFeatures.build(chunks)
+    
+    if config.STAGED_UPLOAD:
+        # Queryable, by every worker, as soon as the index is built; entities and
+        # the graph follow once the response has been sent
+        if session_store is not None:
+            session_store.publish(session)
+        sessions[session_id] = session
+        background_tasks.add_task(run_finish_session, session, chunks, mentions)
+    else:
+        build_session_graph(session, chunks, mentions)
+        if session_store is not None:
+            session_store.publish(session)
+        sessions[session_id] = session
+    
+    return UploadResponse(
+        status="success",
+        message=f"Successfully processed {len(chunks)} chunks from {len(file_contents)} files",
+        index_id=session_id,
+        chunks_count=len(chunks),
+        duplicates_dropped=len(extra_references),
+        failed_files=failed_files,
+        graph_pending=session.graph_pending
+    )
+
+
 @app.post("/upload", response_model=UploadResponse)
-async def upload(files: List[UploadFile] = File(...)):
+async def upload(background_tasks: BackgroundTasks, files: List[UploadFile] = File(...)):
     """
     Upload and process documents.
     
     Args:
+        background_tasks: Runs entity extraction and graph building after the response
         files: List of PDF or text files
         
     Returns:
@@ -108,43 +565,146 @@ async def upload(files: List[UploadFile] = File(...)):
             content = await file.read()
             file_contents.append((content, file.filename))
         
-        # Preprocess documents
-        chunks, sources = preprocess_documents(file_contents)
-        
-        if not chunks:
-            raise HTTPException(status_code=400, detail="No text extracted from files")
-        
-        # Create session
-        session_id = str(uuid.uuid4())
-        session = RAGSession(session_id)
-        session.chunks = chunks
-        session.sources = sources
+        # The pipeline is CPU and disk bound; off the event loop, queries keep being
+        # served and admission control keeps answering while uploads run
+        return await run_in_threadpool(process_upload, file_contents, background_tasks)
         
-        # Build retrieval index
-        session.retriever.build_index(chunks, sources)
+    except Exception as e:
+        print(f"Upload error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def select_chunks(session: RAGSession, filters: SearchFilters):
+    """
+    Resolve request filters to the chunk ids of one session.
+    
+    Args:
+        session: Session to filter
+        filters: Filters from the query request
         
-        # Extract entities
-        session.entities, session.entity_chunk_map = get_entity_extractor().extract_from_chunks(chunks)
+    Returns:
+        Sorted chunk ids, or None if the filters set no condition
+    """
+    def epoch(value):
+        return value.timestamp() if value is not None else None
+    
+    return session.metadata.select(
+        sources=filters.sources,
+        page_min=filters.page_min,
+        page_max=filters.page_max,
+        uploaded_after=epoch(filters.uploaded_after),
+        uploaded_before=epoch(filters.uploaded_before)
+    )
+
+
+async def generate_answer(
+    query_text: str,
+    session: RAGSession,
+    federated: bool,
+    query_embedding,
+    retrieved_ids: List[int],
+    retrieved_chunks: List[str]
+) -> str:
+    """
+    Generate an answer, reusing a cached one for near-duplicate questions.
+    
+    Args:
+        query_text: Query string
+        session: First queried session (owns the answer cache)
+        federated: Whether several sessions were searched
+        query_embedding: Query embedding of shape (1, dimension)
+        retrieved_ids: Retrieved chunk ids
+        retrieved_chunks: Retrieved chunk texts
         
-        # Build knowledge graph
-        session.graph_builder.build_graph(
-            session.entities,
-            session.entity_chunk_map,
-            chunks
+    Returns:
+        Answer text
+    """
+    # Chunk ids and keyword features are per session, so federated queries skip both
+    answer = None
+    use_cache = config.SEMANTIC_CACHE_ENABLED and not federated
+    if use_cache:
+        answer = session.answer_cache.lookup(query_embedding, retrieved_ids)
+    if answer is None:
+        # Blocking LLM call runs off the event loop so other queries keep batching
+        answer = await run_in_threadpool(
+            get_answer_generator().generate,
+            query_text,
+            retrieved_chunks,
+            chunk_ids=None if federated else retrieved_ids,
+            features=None if federated else session.lexical
         )
+        if use_cache:
+            session.answer_cache.store(query_embedding, retrieved_ids, answer)
+    return answer
+
+
+def lookup_entities(hits: List[SearchHit], sessions_by_id) -> List[Entity]:
+    """
+    Collect the distinct entities mentioned by retrieved chunks.
+    
+    Args:
+        hits: Retrieval hits in rank order
+        sessions_by_id: Queried sessions by id
         
-        sessions[session_id] = session
+    Returns:
+        Entities in order of first mention, source_chunk_id being the snippet position
+    """
+    found = []
+    seen = set()
+    for index_id in dict.fromkeys(hit.index_id for hit in hits):
+        session = sessions_by_id[index_id]
+        if session.graph_pending:
+            continue
+        table = session.entity_table
+        positions = [i for i, hit in enumerate(hits) if hit.index_id == index_id]
+        entity_ids, first = table.entities_for_chunks([hits[i].chunk_id for i in positions])
+        for entity, position in zip(entity_ids.tolist(), first.tolist()):
+            name, entity_type = table.names[entity], table.entity_type(entity)
+            # Ids are per session; across sessions fall back to the canonical key
+            key = (name.lower(), entity_type)
+            if key not in seen:
+                seen.add(key)
+                found.append((positions[position], Entity(
+                    name=name, type=entity_type, source_chunk_id=positions[position]
+                )))
+    found.sort(key=lambda item: item[0])
+    return [entity for _, entity in found]
+
+
+def expand_hits(
+    hits: List[SearchHit],
+    sessions_by_id,
+    hops: int,
+    selections: Dict
+) -> List[SearchHit]:
+    """
+    Find extra chunks reachable through the knowledge graph from retrieved ones.
+    
+    Args:
+        hits: Retrieval hits in rank order
+        sessions_by_id: Queried sessions by id
+        hops: Maximum graph distance from the hits' entities
+        selections: Chunk ids allowed by the request's filters, per session
         
-        return UploadResponse(
-            status="success",
-            message=f"Successfully processed {len(chunks)} chunks from {len(files)} files",
-            index_id=session_id,
-            chunks_count=len(chunks)
+    Returns:
+        Hits to append after the retrieved ones; they carry no similarity score
+    """
+    index_ids = list(dict.fromkeys(hit.index_id for hit in hits))
+    limit = math.ceil(config.GRAPH_EXPAND_MAX_CHUNKS / len(index_ids))
+    expanded = []
+    for index_id in index_ids:
+        session = sessions_by_id[index_id]
+        if session.graph_pending:
+            continue
+        chunk_ids = session.graph_builder.expand_chunks(
+            session.entity_table,
+            [hit.chunk_id for hit in hits if hit.index_id == index_id],
+            hops,
+            limit,
+            allowed=selections.get(index_id)
         )
-        
-    except Exception as e:
-        print(f"Upload error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        expanded.extend(SearchHit(0.0, index_id, chunk_id) for chunk_id in chunk_ids)
+    return expanded
 
 
 @app.post("/query", response_model=QueryResponse)
@@ -153,79 +713,120 @@ async def query(request: QueryRequest):
     Process query and return answer with explanations.
     
     Args:
-        request: Query request with query text and session ID
+        request: Query request with query text and session ID(s)
         
     Returns:
         Query response with answer, entities, relationships, and graph
     """
     try:
-        # Get session
-        session_id = request.index_id
-        if not session_id or session_id not in sessions:
-            raise HTTPException(status_code=404, detail="Index not found. Please upload documents first.")
-        
-        session = sessions[session_id]
-        
-        if not session.retriever.is_indexed():
-            raise HTTPException(status_code=400, detail="Index not properly initialized")
-        
-        # Retrieve relevant chunks
-        retrieved_chunks, retrieved_sources, similarities = session.retriever.retrieve(
-            request.query,
-            k=request.top_k
-        )
+        # Get sessions; index_ids searches several at once
+        query_sessions = []
+        for index_id in dict.fromkeys(request.index_ids or [request.index_id]):
+            session = get_session(index_id)
+            if session is None:
+                raise HTTPException(status_code=404, detail="Index not found. Please upload documents first.")
+            if not session.retriever.is_indexed():
+                raise HTTPException(status_code=400, detail="Index not properly initialized")
+            query_sessions.append(session)
+        session = query_sessions[0]
+        federated = len(query_sessions) > 1
         
-        if not retrieved_chunks:
+        # Retrieve relevant chunks; concurrent queries share one embedding forward pass
+        if config.QUERY_BATCH_WINDOW_MS > 0:
+            query_embedding = await get_query_batcher().encode(request.query)
+        else:
+            query_embedding = session.retriever.encode_query(request.query)
+        selections = {}
+        if request.filters is not None:
+            selections = {s.session_id: select_chunks(s, request.filters) for s in query_sessions}
+        if federated:
+            hits = get_federated_searcher().search(
+                query_sessions, query_embedding, request.top_k, selections
+            )
+        else:
+            ids, similarities = session.retriever.search(
+                query_embedding, k=request.top_k, ids=selections.get(session.session_id)
+            )
+            hits = [SearchHit(sim, session.session_id, i) for i, sim in zip(ids, similarities)]
+        sessions_by_id = {s.session_id: s for s in query_sessions}
+        if not hits:
             raise HTTPException(status_code=404, detail="No relevant documents found")
+        # Sessions still building their graph answer from the index alone and
+        # contribute no entities, relationships, graph or expansion yet
+        contributing = [
+            sessions_by_id[index_id] for index_id in dict.fromkeys(hit.index_id for hit in hits)
+        ]
+        graph_pending = any(s.graph_pending for s in contributing)
+        if request.expand_hops:
+            with STAGE_LATENCY.time(stage='graph_expansion'):
+                hits = hits + expand_hits(hits, sessions_by_id, request.expand_hops, selections)
         
-        # Generate answer
-        answer = get_answer_generator().generate(request.query, retrieved_chunks)
+        # Only the requested sections are computed; retrieval-only calls skip the LLM and graph
+        sections = set(request.include) if request.include is not None else set(QUERY_SECTIONS)
+        retrieved_ids = [hit.chunk_id for hit in hits]
+        retrieved_chunks = []
+        if sections & {'answer', 'snippets'}:
+            retrieved_chunks = [sessions_by_id[hit.index_id].retriever.store[hit.chunk_id] for hit in hits]
         
-        # Extract entities from retrieved chunks
-        retrieved_entities = []
-        entity_extractor_instance = get_entity_extractor()
-        for chunk_idx, chunk in enumerate(retrieved_chunks):
-            entities = entity_extractor_instance.extract_entities(chunk)
-            for ent in entities:
-                retrieved_entities.append({
-                    'name': ent['name'],
-                    'type': ent['type'],
-                    'source_chunk_id': chunk_idx
-                })
+        answer = None
+        if 'answer' in sections:
+            answer = await generate_answer(
+                request.query, session, federated, query_embedding, retrieved_ids, retrieved_chunks
+            )
         
-        # Remove duplicates
-        seen = set()
+        # Entities of the retrieved chunks come from the postings built at upload
         unique_entities = []
-        for ent in retrieved_entities:
-            key = (ent['name'].lower(), ent['type'])
-            if key not in seen:
-                unique_entities.append(Entity(**ent))
-                seen.add(key)
+        if 'entities' in sections:
+            with STAGE_LATENCY.time(stage='entity_lookup'):
+                unique_entities = lookup_entities(hits, sessions_by_id)
         
-        # Get relationships from graph
-        relationships = [
-            Relationship(
-                from_entity=rel['from_entity'],
-                to_entity=rel['to_entity'],
-                relation=rel['relation']
+        with STAGE_LATENCY.time(stage='serialization'):
+            relationships = []
+            graph_data = None
+            if sections & {'relationships', 'graph'}:
+                # Graphs of the sessions that contributed retrieved chunks
+                builders = [s.graph_builder for s in contributing if not s.graph_pending]
+                
+                # Keep payloads bounded: each graph contributes an equal share of the
+                # most central nodes and strongest edges
+                max_nodes = request.max_graph_nodes or config.GRAPH_MAX_NODES
+                max_edges = request.max_graph_edges
+                if max_edges is None:
+                    max_edges = config.GRAPH_MAX_EDGES
+                max_nodes = math.ceil(max_nodes / max(1, len(builders)))
+                max_edges = math.ceil(max_edges / max(1, len(builders)))
+            
+            if 'relationships' in sections:
+                # Get relationships from graph
+                relationships = [
+                    Relationship(
+                        from_entity=rel['from_entity'],
+                        to_entity=rel['to_entity'],
+                        relation=rel['relation']
+                    )
+                    for rel in merge_relationships(
+                        [b.get_relationships(max_nodes, max_edges) for b in builders]
+                    )
+                ]
+            
+            if 'graph' in sections:
+                # Get graph data
+                graph_data_dict = merge_graph_data(
+                    [b.get_graph_data(max_nodes, max_edges) for b in builders]
+                )
+                graph_nodes = [GraphNode(**node) for node in graph_data_dict['nodes']]
+                graph_edges = [GraphEdge(**edge) for edge in graph_data_dict['edges']]
+                graph_data = GraphData(nodes=graph_nodes, edges=graph_edges)
+            
+            return QueryResponse(
+                answer=answer,
+                entities=unique_entities,
+                relationships=relationships,
+                graph_data=graph_data,
+                snippets=retrieved_chunks if 'snippets' in sections else [],
+                graph_pending=graph_pending,
+                status="success"
             )
-            for rel in session.graph_builder.get_relationships()
-        ]
-        
-        # Get graph data
-        graph_data_dict = session.graph_builder.get_graph_data()
-        graph_nodes = [GraphNode(**node) for node in graph_data_dict['nodes']]
-        graph_edges = [GraphEdge(**edge) for edge in graph_data_dict['edges']]
-        graph_data = GraphData(nodes=graph_nodes, edges=graph_edges)
-        
-        return QueryResponse(
-            answer=answer,
-            entities=unique_entities,
-            relationships=relationships,
-            graph_data=graph_data,
-            snippets=retrieved_chunks,
-            status="success"
-        )
         
     except HTTPException:
         raise
@@ -238,39 +839,102 @@ async def query(request: QueryRequest):
 async def debug_retrieve(request: QueryRequest):
     """Debug endpoint to show retrieval results with similarities."""
     try:
-        session_id = request.index_id
-        if not session_id or session_id not in sessions:
+        session = get_session(request.index_id)
+        if session is None:
             raise HTTPException(status_code=404, detail="Index not found")
         
-        session = sessions[session_id]
-        
         # Retrieve with details
-        retrieved_chunks, retrieved_sources, similarities = session.retriever.retrieve(
-            request.query,
+        retriever = session.retriever
+        retrieved_ids, similarities = retriever.search(
+            retriever.encode_query(request.query),
             k=request.top_k
         )
         
+        results = []
+        for chunk_id, sim in zip(retrieved_ids, similarities):
+            chunk = retriever.store[chunk_id]
+            results.append({
+                "chunk": chunk[:200] + "..." if len(chunk) > 200 else chunk,
+                "source": retriever.store.source(chunk_id),
+                "similarity": sim,
+                "full_length": len(chunk),
+                # Every place this text appears, including dropped near-duplicates
+                "references": [
+                    {"source": source, "page": page}
+                    for source, page in session.metadata.references(chunk_id)
+                ]
+            })
+        
         return {
             "query": request.query,
-            "results": [
-                {
-                    "chunk": chunk[:200] + "..." if len(chunk) > 200 else chunk,
-                    "source": source,
-                    "similarity": sim,
-                    "full_length": len(chunk)
-                }
-                for chunk, source, sim in zip(retrieved_chunks, retrieved_sources, similarities)
-            ]
+            "results": results
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/cache/stats")
+async def cache_stats(index_id: Optional[str] = None):
+    """Semantic answer cache statistics, for one session or summed over all, plus the document cache."""
+    # Only reported once the first upload has opened the document cache
+    document_stats = document_cache.stats() if document_cache is not None else None
+    if index_id is not None:
+        session = get_session(index_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        return {"answer_cache": session.answer_cache.stats(), "document_cache": document_stats}
+    
+    totals = {'entries': 0, 'hits': 0, 'misses': 0, 'evictions': 0}
+    for session in list(sessions.values()):
+        for key, value in session.answer_cache.stats().items():
+            if key in totals:
+                totals[key] += value
+    lookups = totals['hits'] + totals['misses']
+    totals['hit_rate'] = totals['hits'] / lookups if lookups else 0.0
+    return {"answer_cache": totals, "document_cache": document_stats}
+
+
+@app.get("/admission/stats")
+async def admission_stats():
+    """Concurrency limits, in-flight and queued requests, and rejections per endpoint class."""
+    return {name: controller.stats() for name, controller in admission.items()}
+
+
+@app.get("/profiles")
+async def list_profiles():
+    """List stored request profiles."""
+    return {"enabled": config.PROFILING_ENABLED, "sample_rate": profile_sample_rate,
+            "profiles": profile_store.list()}
+
+
+@app.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str):
+    """Get a stored profile as folded stacks (flamegraph.pl / speedscope input)."""
+    record = profile_store.get(profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(record['folded'])
+
+
+@app.post("/admin/profiling")
+async def set_profiling(sample_rate: float):
+    """Set the fraction of /upload and /query requests profiled without the header."""
+    global profile_sample_rate
+    if not config.PROFILING_ENABLED:
+        raise HTTPException(status_code=400, detail="Profiling is disabled (set RAG_PROFILING=1)")
+    if not 0.0 <= sample_rate <= 1.0:
+        raise HTTPException(status_code=400, detail="sample_rate must be between 0 and 1")
+    profile_sample_rate = sample_rate
+    return {"status": "success", "sample_rate": profile_sample_rate}
+
+
 @app.post("/clear")
 async def clear_session(index_id: str):
     """Clear a session."""
-    if index_id in sessions:
-        del sessions[index_id]
+    found = sessions.pop(index_id, None) is not None
+    if session_store is not None:
+        found = session_store.delete(index_id) or found
+    if found:
         return {"status": "success", "message": "Session cleared"}
     raise HTTPException(status_code=404, detail="Session not found")
 
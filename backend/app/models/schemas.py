@@ -1,15 +1,39 @@
 """
 Pydantic models for request/response validation.
 """
+from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Literal, Optional, get_args
+
+
+class SearchFilters(BaseModel):
+    """Conditions a chunk must meet to be retrieved; unset fields match everything."""
+    sources: Optional[List[str]] = None
+    page_min: Optional[int] = Field(default=None, ge=1)
+    page_max: Optional[int] = Field(default=None, ge=1)
+    uploaded_after: Optional[datetime] = None
+    uploaded_before: Optional[datetime] = None
+
+
+QuerySection = Literal['answer', 'snippets', 'entities', 'relationships', 'graph']
+QUERY_SECTIONS = get_args(QuerySection)
 
 
 class QueryRequest(BaseModel):
     """Request model for query endpoint."""
     query: str = Field(..., min_length=1, max_length=1000)
     index_id: Optional[str] = None
+    # Search several sessions at once; takes precedence over index_id
+    index_ids: Optional[List[str]] = Field(default=None, min_length=1, max_length=16)
     top_k: int = Field(default=5, ge=1, le=20)
+    filters: Optional[SearchFilters] = None
+    # Also retrieve chunks mentioning entities this many graph hops from the top-k's entities
+    expand_hops: Optional[int] = Field(default=None, ge=1, le=2)
+    # Graph payload limits; the most central nodes and strongest edges are kept
+    max_graph_nodes: Optional[int] = Field(default=None, ge=1, le=5000)
+    max_graph_edges: Optional[int] = Field(default=None, ge=0, le=20000)
+    # Response sections to compute; everything when unset
+    include: Optional[List[QuerySection]] = None
 
 
 class Entity(BaseModel):
@@ -46,12 +70,14 @@ class GraphData(BaseModel):
 
 
 class QueryResponse(BaseModel):
-    """Response model for query endpoint."""
-    answer: str
-    entities: List[Entity]
-    relationships: List[Relationship]
-    graph_data: GraphData
-    snippets: List[str]
+    """Response model for query endpoint; sections left out of `include` are empty."""
+    answer: Optional[str] = None
+    entities: List[Entity] = []
+    relationships: List[Relationship] = []
+    graph_data: Optional[GraphData] = None
+    snippets: List[str] = []
+    # Entities and the graph of a queried session are still being built; those sections are empty
+    graph_pending: bool = False
     status: str = "success"
 
 
@@ -61,6 +87,19 @@ class UploadResponse(BaseModel):
     message: str
     index_id: str
     chunks_count: int
+    # Near-duplicate chunks folded into another chunk's references
+    duplicates_dropped: int = 0
+    # Files that could not be processed; the rest of the upload still succeeds
+    failed_files: List[str] = []
+    # Entities and the graph are built after the response; /query reports when they are ready
+    graph_pending: bool = False
+
+
+class ReadinessResponse(BaseModel):
+    """Response model for readiness endpoint."""
+    status: str
+    warmup_duration_s: Optional[float] = None
+    error: Optional[str] = None
 
 
 class StatusResponse(BaseModel):
@@ -0,0 +1,131 @@
+"""
+Semantic answer cache for near-duplicate questions.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from app import config
+from app.metrics import CACHE_HITS, CACHE_MISSES
+
+
+class SemanticAnswerCache:
+    """Reuse generated answers for queries that are semantically close to a past query."""
+
+    def __init__(
+        self,
+        dimension: int,
+        threshold: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ):
+        """
+        Initialize answer cache.
+
+        Args:
+            dimension: Query embedding dimension
+            threshold: Minimum cosine similarity for a cache hit
+            max_entries: Maximum number of cached answers before LRU eviction
+        """
+        import faiss
+
+        self.dimension = dimension
+        self.threshold = config.SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        self.max_entries = config.SEMANTIC_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+        self.entries: "OrderedDict[int, Tuple[Tuple[int, ...], str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(query_embedding: np.ndarray) -> np.ndarray:
+        """Return a (1, d) unit-length float32 copy of the embedding."""
+        vector = np.asarray(query_embedding, dtype=np.float32).reshape(1, -1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector.copy()
+
+    @staticmethod
+    def chunk_key(chunk_ids: Iterable[int]) -> Tuple[int, ...]:
+        """Order-independent key for a retrieved chunk set."""
+        return tuple(sorted(int(i) for i in chunk_ids))
+
+    def lookup(self, query_embedding: np.ndarray, chunk_ids: Iterable[int]) -> Optional[str]:
+        """
+        Find a cached answer for a similar query over the same chunks.
+
+        Args:
+            query_embedding: Embedding of the incoming query
+            chunk_ids: Indices of the chunks retrieved for the query
+
+        Returns:
+            Cached answer, or None on a miss
+        """
+        key = self.chunk_key(chunk_ids)
+        vector = self._normalize(query_embedding)
+
+        with self._lock:
+            if self.index.ntotal == 0:
+                self.misses += 1
+                CACHE_MISSES.inc(cache='answer')
+                return None
+
+            k = min(8, self.index.ntotal)
+            scores, ids = self.index.search(vector, k)
+            for score, entry_id in zip(scores[0], ids[0]):
+                if entry_id < 0 or score < self.threshold:
+                    break
+                cached_key, answer = self.entries[int(entry_id)]
+                if cached_key == key:
+                    self.entries.move_to_end(int(entry_id))
+                    self.hits += 1
+                    CACHE_HITS.inc(cache='answer')
+                    return answer
+
+            self.misses += 1
+            CACHE_MISSES.inc(cache='answer')
+            return None
+
+    def store(self, query_embedding: np.ndarray, chunk_ids: Iterable[int], answer: str):
+        """
+        Cache an answer, evicting the least recently used entry when full.
+
+        Args:
+            query_embedding: Embedding of the query
+            chunk_ids: Indices of the chunks the answer was generated from
+            answer: Generated answer
+        """
+        if self.max_entries <= 0:
+            return
+
+        vector = self._normalize(query_embedding)
+
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self.index.add_with_ids(vector, np.array([entry_id], dtype=np.int64))
+            self.entries[entry_id] = (self.chunk_key(chunk_ids), answer)
+
+            while len(self.entries) > self.max_entries:
+                evicted_id, _ = self.entries.popitem(last=False)
+                self.index.remove_ids(np.array([evicted_id], dtype=np.int64))
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dict with entries, hits, misses, evictions and hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
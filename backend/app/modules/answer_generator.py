@@ -1,30 +1,48 @@
 """
 Answer generation module with LLM integration.
 """
-from typing import List, Optional
+from typing import List, Optional, Sequence
 import os
-from openai import OpenAI, APIError
+
+from app.metrics import LLM_TOKENS, STAGE_LATENCY
+from app.modules.lexical import LexicalFeatures, fallback_answer_end, tokenize
 
 
 class AnswerGenerator:
     """Generate answers using LLM with retrieved context."""
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini"):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: str = "gpt-4o-mini",
+        base_url: Optional[str] = None
+    ):
         """
         Initialize answer generator.
         
         Args:
             api_key: OpenAI API key (defaults to OPENAI_API_KEY env var)
             model: Model name to use
+            base_url: OpenAI-compatible API base URL (defaults to OPENAI_BASE_URL env var)
         """
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        self.base_url = base_url or os.getenv('OPENAI_BASE_URL')
         self.model = model
         self.client = None
         
         if self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
+            from openai import OpenAI
+            
+            self.client = OpenAI(api_key=self.api_key, base_url=self.base_url)
     
-    def generate(self, query: str, context_chunks: List[str], max_tokens: int = 500) -> str:
+    def generate(
+        self,
+        query: str,
+        context_chunks: List[str],
+        max_tokens: int = 500,
+        chunk_ids: Optional[Sequence[int]] = None,
+        features: Optional[LexicalFeatures] = None
+    ) -> str:
         """
         Generate answer from query and context.
         
@@ -32,12 +50,16 @@ class AnswerGenerator:
             query: User query
             context_chunks: Retrieved context chunks
             max_tokens: Maximum tokens in response
+            chunk_ids: Index positions of context_chunks, used with features
+            features: Precomputed lexical features for the fallback path
             
         Returns:
             Generated answer
         """
         if not self.client:
-            return self._generate_fallback(query, context_chunks)
+            return self._generate_fallback(query, context_chunks, chunk_ids, features)
+        
+        from openai import APIError
         
         # Prepare context
         context = "\n\n".join(context_chunks)
@@ -56,27 +78,37 @@ Question: {query}
 Answer:"""
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=max_tokens,
-                temperature=0.3
-            )
+            with STAGE_LATENCY.time(stage='llm'):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=0.3
+                )
+            if response.usage:
+                LLM_TOKENS.inc(response.usage.prompt_tokens, kind='prompt')
+                LLM_TOKENS.inc(response.usage.completion_tokens, kind='completion')
             
             if response.choices and response.choices[0].message and response.choices[0].message.content:
                 answer = response.choices[0].message.content.strip()
                 return answer
             else:
-                return self._generate_fallback(query, context_chunks)
+                return self._generate_fallback(query, context_chunks, chunk_ids, features)
             
         except APIError as e:
             print(f"OpenAI API error: {e}")
-            return self._generate_fallback(query, context_chunks)
+            return self._generate_fallback(query, context_chunks, chunk_ids, features)
     
-    def _generate_fallback(self, query: str, context_chunks: List[str]) -> str:
+    def _generate_fallback(
+        self,
+        query: str,
+        context_chunks: List[str],
+        chunk_ids: Optional[Sequence[int]] = None,
+        features: Optional[LexicalFeatures] = None
+    ) -> str:
         """
         Fallback answer generation without LLM.
         Improved to provide diverse, complete answers.
@@ -84,6 +116,8 @@ Answer:"""
         Args:
             query: User query
             context_chunks: Retrieved context chunks
+            chunk_ids: Index positions of context_chunks, used with features
+            features: Precomputed lexical features; chunks are re-tokenized without them
             
         Returns:
             Full answer with complete content
@@ -91,16 +125,22 @@ Answer:"""
         if not context_chunks:
             return "I cannot find relevant information in the provided documents."
         
+        if features is not None and chunk_ids is not None:
+            # Score with precomputed term ids and answer offsets
+            scores = features.overlap(features.query_terms(query), chunk_ids)
+            best = int(scores.argmax())
+            end = int(features.answer_ends[chunk_ids[best]])
+            return context_chunks[best][:end].strip()
+        
         # Extract meaningful keywords (length > 2)
-        query_words = set(w.lower() for w in query.split() if len(w) > 2)
+        query_words = tokenize(query)
         
         # Score each chunk based on keyword overlap
         best_chunk = None
         best_score = -1
         
         for chunk in context_chunks:
-            chunk_words = set(w.lower() for w in chunk.split() if len(w) > 2)
-            overlap = len(query_words & chunk_words)
+            overlap = len(query_words & tokenize(chunk))
             if overlap > best_score:
                 best_score = overlap
                 best_chunk = chunk
@@ -109,16 +149,5 @@ Answer:"""
         if best_chunk is None:
             best_chunk = context_chunks[0]
         
-        # Return FULL content, find good break point at sentence
-        if len(best_chunk) <= 1000:
-            return best_chunk.strip()
-        
-        # For longer chunks, find last complete sentence
-        truncated = best_chunk[:1200]
-        for end_marker in ['. ', '! ', '? ', '.\n', '!\n', '?\n']:
-            last_idx = truncated.rfind(end_marker)
-            if last_idx > 500:  # At least 500 chars
-                return best_chunk[:last_idx + 1].strip()
-        
-        # Fallback: return up to 1000 chars
-        return best_chunk[:1000].strip()
+        # Return FULL content, cut at a sentence boundary for long chunks
+        return best_chunk[:fallback_answer_end(best_chunk)].strip()
@@ -0,0 +1,111 @@
+"""
+Dynamic micro-batching of query embeddings across concurrent requests.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from app.metrics import QUERY_BATCH_SIZE
+
+
+class _PendingBatch:
+    """Texts and futures collected for one forward pass."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.texts: List[str] = []
+        self.futures: List[asyncio.Future] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class QueryEmbeddingBatcher:
+    """
+    Collect query-encoding calls from concurrent handlers into one encode().
+
+    The first caller opens a batch and starts a timer; the batch is flushed when
+    the window expires or max_batch_size texts are waiting, whichever is first.
+    Encoding runs on a single background thread so the event loop stays free
+    and forward passes never compete with each other for CPU.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        window_ms: float = 2.0,
+        max_batch_size: int = 32
+    ):
+        """
+        Initialize batcher.
+
+        Args:
+            encode_fn: Batch encoder, e.g. EmbeddingModel.encode
+            window_ms: Longest time a request waits for others to join its batch
+            max_batch_size: Flush as soon as this many texts are waiting
+        """
+        self.encode_fn = encode_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending: Optional[_PendingBatch] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-query-embed")
+        self.batches = 0
+        self.requests = 0
+
+    async def encode(self, text: str) -> np.ndarray:
+        """
+        Encode one query, sharing the forward pass with concurrent callers.
+
+        Args:
+            text: Query string
+
+        Returns:
+            Query embedding of shape (1, dimension)
+        """
+        loop = asyncio.get_running_loop()
+        batch = self._pending
+        if batch is None or batch.loop is not loop:
+            batch = self._pending = _PendingBatch(loop)
+            batch.timer = loop.call_later(self.window, self._flush, batch)
+
+        future = loop.create_future()
+        batch.texts.append(text)
+        batch.futures.append(future)
+        if len(batch.texts) >= self.max_batch_size:
+            batch.timer.cancel()
+            self._flush(batch)
+        return await future
+
+    def _flush(self, batch: _PendingBatch):
+        if self._pending is batch:
+            self._pending = None
+        self.batches += 1
+        self.requests += len(batch.texts)
+        QUERY_BATCH_SIZE.observe(len(batch.texts))
+        task = batch.loop.run_in_executor(self._executor, self.encode_fn, batch.texts)
+        task.add_done_callback(lambda done: self._resolve(batch, done))
+
+    @staticmethod
+    def _resolve(batch: _PendingBatch, done: asyncio.Future):
+        error = done.exception()
+        embeddings = None if error is not None else done.result()
+        for i, future in enumerate(batch.futures):
+            if future.done():
+                # Caller was cancelled (e.g. client disconnected)
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(embeddings[i:i + 1])
+
+    def stats(self) -> dict:
+        """Return batch counts and the mean batch size so far."""
+        return {
+            'batches': self.batches,
+            'requests': self.requests,
+            'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+        }
+
+    def close(self):
+        """Stop the encoding thread."""
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,161 @@
+"""
+Compact chunk text and source storage.
+
+All chunk texts live in one contiguous UTF-8 buffer indexed by an offsets
+array, and each chunk's source is an integer code into a table of filenames,
+so a session holds a handful of arrays instead of a Python string per chunk.
+The arrays can be saved to a directory and memory-mapped back read-only.
+"""
+import json
+import os
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+
+class SourceView:
+    """Read-only per-chunk source names backed by integer codes into a name table."""
+
+    def __init__(self, names: List[str], codes: np.ndarray):
+        self.names = names
+        self.codes = codes
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, i: int) -> str:
+        return self.names[self.codes[i]]
+
+    def __iter__(self):
+        return (self.names[code] for code in self.codes)
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+
+class ChunkStore:
+    """Read-only sequence of chunk texts with a source per chunk."""
+
+    def __init__(
+        self,
+        buffer: np.ndarray,
+        offsets: np.ndarray,
+        source_names: List[str],
+        source_codes: np.ndarray
+    ):
+        """
+        Initialize chunk store.
+
+        Args:
+            buffer: uint8 array holding every chunk's UTF-8 bytes back to back
+            offsets: int64 array of length n + 1 with each chunk's start offset
+            source_names: Distinct source filenames, indexed by code
+            source_codes: int32 array with each chunk's source code
+        """
+        self.buffer = buffer
+        self.offsets = offsets
+        self.source_names = source_names
+        self.source_codes = source_codes
+
+    @classmethod
+    def from_lists(cls, chunks: Iterable[str], sources: Iterable[str]) -> 'ChunkStore':
+        """
+        Pack chunk texts and their sources.
+
+        Args:
+            chunks: Chunk texts
+            sources: Source filename per chunk
+
+        Returns:
+            ChunkStore instance
+        """
+        encoded = [chunk.encode('utf-8') for chunk in chunks]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        names: Dict[str, int] = {}
+        codes = np.array([names.setdefault(s, len(names)) for s in sources], dtype=np.int32)
+        if len(codes) != len(encoded):
+            raise ValueError("chunks and sources must have the same length")
+        return cls(buffer, offsets, list(names), codes)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _bounds(self, i: int):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+
+    def __getitem__(self, i: int) -> str:
+        start, end = self._bounds(i)
+        return self.buffer[start:end].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def get_bytes(self, i: int) -> memoryview:
+        """Return a chunk's UTF-8 bytes as a view into the buffer, without copying."""
+        start, end = self._bounds(i)
+        return memoryview(self.buffer)[start:end]
+
+    def take(self, ids: Sequence[int]) -> List[str]:
+        """Decode the chunks at the given ids."""
+        return [self[i] for i in ids]
+
+    def source(self, i: int) -> str:
+        """Return a chunk's source filename."""
+        return self.source_names[self.source_codes[i]]
+
+    @property
+    def sources(self) -> SourceView:
+        """Per-chunk source names as a read-only sequence."""
+        return SourceView(self.source_names, self.source_codes)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the arrays, excluding the small name table."""
+        return int(self.buffer.nbytes + self.offsets.nbytes + self.source_codes.nbytes)
+
+    def save(self, directory: str):
+        """
+        Write the store as chunks.bin, chunks_offsets.npy, source_codes.npy and sources.json.
+
+        Args:
+            directory: Existing output directory
+        """
+        with open(os.path.join(directory, 'chunks.bin'), 'wb') as f:
+            f.write(memoryview(np.ascontiguousarray(self.buffer)))
+        np.save(os.path.join(directory, 'chunks_offsets.npy'), np.asarray(self.offsets))
+        np.save(os.path.join(directory, 'source_codes.npy'), np.asarray(self.source_codes))
+        with open(os.path.join(directory, 'sources.json'), 'w') as f:
+            json.dump(self.source_names, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'ChunkStore':
+        """
+        Load a saved store, memory-mapping the arrays read-only by default.
+
+        Args:
+            directory: Directory written by save()
+            mmap: Map the files instead of reading them into memory
+
+        Returns:
+            ChunkStore instance
+        """
+        mmap_mode = 'r' if mmap else None
+        offsets = np.load(os.path.join(directory, 'chunks_offsets.npy'), mmap_mode=mmap_mode)
+        source_codes = np.load(os.path.join(directory, 'source_codes.npy'), mmap_mode=mmap_mode)
+        path = os.path.join(directory, 'chunks.bin')
+        if os.path.getsize(path) == 0:
+            # np.memmap cannot map an empty file
+            buffer = np.zeros(0, dtype=np.uint8)
+        elif mmap:
+            buffer = np.memmap(path, dtype=np.uint8, mode='r')
+        else:
+            buffer = np.fromfile(path, dtype=np.uint8)
+        with open(os.path.join(directory, 'sources.json')) as f:
+            source_names = json.load(f)
+        return cls(buffer, offsets, source_names, source_codes)
@@ -0,0 +1,405 @@
+"""
+Compact undirected graph stored as CSR arrays.
+
+Node names are interned to integer ids. Edges are kept once each in parallel
+arrays (endpoints, weight, relation id) and the adjacency of every node is a
+CSR slice, so a graph costs a few bytes per edge instead of a dict per edge.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+class CSRGraphBuilder:
+    """
+    Mutable graph with the NetworkX calls used during graph construction.
+
+    Mirrors nx.Graph semantics: re-adding a node or edge overwrites its
+    attributes, and adding an edge creates missing endpoints.
+    """
+
+    def __init__(self):
+        self._index: Dict[str, int] = {}
+        self._types: List[str] = []
+        self._source_chunks: List[int] = []
+        # Per node, neighbour id -> edge id, in insertion order like nx adjacency
+        self._adjacency: List[Dict[int, int]] = []
+        self._weights: List[float] = []
+        self._relations: List[str] = []
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def _node_id(self, name: str) -> int:
+        node = self._index.get(name)
+        if node is None:
+            node = self._index[name] = len(self._types)
+            self._types.append('UNKNOWN')
+            self._source_chunks.append(0)
+            self._adjacency.append({})
+        return node
+
+    def add_node(self, name: str, type: str = 'UNKNOWN', source_chunk: int = 0):
+        node = self._node_id(name)
+        self._types[node] = type
+        self._source_chunks[node] = source_chunk
+
+    def add_edge(self, u: str, v: str, relation: str = 'related-to', weight: float = 1.0):
+        a, b = self._node_id(u), self._node_id(v)
+        edge = self._adjacency[a].get(b)
+        if edge is None:
+            edge = len(self._weights)
+            self._adjacency[a][b] = edge
+            self._adjacency[b][a] = edge
+            self._weights.append(weight)
+            self._relations.append(relation)
+        else:
+            self._weights[edge] = weight
+            self._relations[edge] = relation
+
+    def build(self) -> 'CSRGraph':
+        """
+        Freeze into a CSRGraph.
+
+        Edges are ordered as nx.Graph.edges() would yield them, so both
+        backends serialize to the same output.
+
+        Returns:
+            CSRGraph instance
+        """
+        src, dst, order = [], [], []
+        for u, neighbours in enumerate(self._adjacency):
+            for v, edge in neighbours.items():
+                # nx yields each edge from its endpoint that comes first in node order
+                if v >= u:
+                    src.append(u)
+                    dst.append(v)
+                    order.append(edge)
+        relation_ids: Dict[str, int] = {}
+        edge_relation = [relation_ids.setdefault(self._relations[e], len(relation_ids)) for e in order]
+        type_ids: Dict[str, int] = {}
+        node_type = [type_ids.setdefault(t, len(type_ids)) for t in self._types]
+        return CSRGraph(
+            list(self._index),
+            np.array(node_type, dtype=np.int32),
+            list(type_ids),
+            np.array(self._source_chunks, dtype=np.int32),
+            np.array(src, dtype=np.int32),
+            np.array(dst, dtype=np.int32),
+            np.array([self._weights[e] for e in order], dtype=np.float32),
+            np.array(edge_relation, dtype=np.int32),
+            list(relation_ids)
+        )
+
+
+class CSRGraph:
+    """Read-only undirected graph with interned node ids and CSR adjacency."""
+
+    def __init__(
+        self,
+        node_names: List[str],
+        node_type: np.ndarray,
+        type_names: List[str],
+        node_source_chunk: np.ndarray,
+        edge_src: np.ndarray,
+        edge_dst: np.ndarray,
+        edge_weight: np.ndarray,
+        edge_relation: np.ndarray,
+        relation_names: List[str],
+        adjacency: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+    ):
+        """
+        Initialize graph from node and edge arrays.
+
+        Args:
+            node_names: Node name per node id
+            node_type: int32 array, index into type_names per node
+            type_names: Distinct entity types
+            node_source_chunk: int32 array, chunk each node was first seen in
+            edge_src: int32 array, first endpoint per edge
+            edge_dst: int32 array, second endpoint per edge
+            edge_weight: float32 array, weight per edge
+            edge_relation: int32 array, index into relation_names per edge
+            relation_names: Distinct relation labels
+            adjacency: Previously built (indptr, indices, adjacent_edges), e.g.
+                memory-mapped from a session store; derived from the edges if omitted
+        """
+        self.node_names = node_names
+        self.node_type = node_type
+        self.type_names = type_names
+        self.node_source_chunk = node_source_chunk
+        self.edge_src = edge_src
+        self.edge_dst = edge_dst
+        self.edge_weight = edge_weight
+        self.edge_relation = edge_relation
+        self.relation_names = relation_names
+        self._index: Optional[Dict[str, int]] = None
+        self.indptr, self.indices, self.adjacent_edges = adjacency or self._build_csr()
+
+    def _build_csr(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        n = len(self.node_names)
+        edge_ids = np.arange(len(self.edge_src), dtype=np.int32)
+        loops = self.edge_src == self.edge_dst
+        # Each edge appears in the adjacency of both endpoints; a self-loop only once
+        rows = np.concatenate([self.edge_src, self.edge_dst[~loops]])
+        cols = np.concatenate([self.edge_dst, self.edge_src[~loops]])
+        edges = np.concatenate([edge_ids, edge_ids[~loops]])
+        order = np.argsort(rows, kind='stable')
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        return indptr, cols[order].astype(np.int32), edges[order].astype(np.int32)
+
+    @classmethod
+    def from_networkx(cls, graph) -> 'CSRGraph':
+        """
+        Convert an nx.Graph, preserving node and edge order.
+
+        Args:
+            graph: NetworkX graph built by KnowledgeGraphBuilder
+
+        Returns:
+            CSRGraph instance
+        """
+        builder = CSRGraphBuilder()
+        for node, data in graph.nodes(data=True):
+            builder.add_node(str(node), data.get('type', 'UNKNOWN'), data.get('source_chunk', 0))
+        for u, v, data in graph.edges(data=True):
+            builder.add_edge(str(u), str(v), data.get('relation', 'related-to'), data.get('weight', 1.0))
+        return builder.build()
+
+    def node_id(self, name: str) -> Optional[int]:
+        """Look up the interned id of a node name."""
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.node_names)}
+        return self._index.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return self.node_id(name) is not None
+
+    def __len__(self) -> int:
+        return len(self.node_names)
+
+    def number_of_nodes(self) -> int:
+        return len(self.node_names)
+
+    def number_of_edges(self) -> int:
+        return len(self.edge_src)
+
+    def nodes(self) -> List[str]:
+        return self.node_names
+
+    def neighbor_ids(self, node: int) -> np.ndarray:
+        """Neighbour ids of a node id, as a view into the CSR arrays."""
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def gather_neighbors(self, nodes: np.ndarray) -> np.ndarray:
+        """
+        Concatenate the neighbour ids of several nodes in one vectorized gather.
+
+        Args:
+            nodes: Node ids
+
+        Returns:
+            int32 array of neighbour ids, with repeats
+        """
+        starts = self.indptr[nodes]
+        lengths = self.indptr[np.asarray(nodes) + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.zeros(0, dtype=np.int32)
+        # Position of each output slot within its node's slice, shifted to the slice start
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return self.indices[offsets + np.arange(total)]
+
+    def neighborhood(self, nodes: np.ndarray, hops: int = 1) -> np.ndarray:
+        """
+        Find every node within a number of hops of the given nodes.
+
+        Args:
+            nodes: Seed node ids
+            hops: Maximum path length
+
+        Returns:
+            Sorted node ids reached, including the seeds
+        """
+        visited = np.zeros(len(self.node_names), dtype=bool)
+        frontier = np.unique(np.asarray(nodes, dtype=np.int64))
+        visited[frontier] = True
+        for _ in range(hops):
+            reached = self.gather_neighbors(frontier)
+            frontier = np.unique(reached[~visited[reached]])
+            if not len(frontier):
+                break
+            visited[frontier] = True
+        return np.flatnonzero(visited)
+
+    def neighbors(self, name: str) -> List[str]:
+        """Neighbour names of a node."""
+        node = self.node_id(name)
+        if node is None:
+            raise KeyError(name)
+        return [self.node_names[i] for i in self.neighbor_ids(node)]
+
+    def degrees(self) -> np.ndarray:
+        """Number of neighbours per node id."""
+        return np.diff(self.indptr)
+
+    def edges(self, edge_ids: Optional[np.ndarray] = None) -> Iterable[Tuple[str, str, str, float]]:
+        """
+        Yield (source, target, relation, weight) per edge.
+
+        Args:
+            edge_ids: Only these edges, in the given order (all edges if None)
+        """
+        src, dst = self.edge_src, self.edge_dst
+        relation, weight = self.edge_relation, self.edge_weight
+        if edge_ids is not None:
+            src, dst, relation, weight = src[edge_ids], dst[edge_ids], relation[edge_ids], weight[edge_ids]
+        names, relations = self.node_names, self.relation_names
+        for s, d, r, w in zip(src.tolist(), dst.tolist(), relation.tolist(), weight.tolist()):
+            yield names[s], names[d], relations[r], w
+
+    def top_subgraph(
+        self,
+        scores: np.ndarray,
+        max_nodes: Optional[int] = None,
+        max_edges: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pick the highest-scoring nodes and the strongest edges between them.
+
+        Edges are ranked by weight, then by the summed scores of their endpoints.
+
+        Args:
+            scores: Centrality per node id
+            max_nodes: Node limit (no limit if None)
+            max_edges: Edge limit (no limit if None)
+
+        Returns:
+            Tuple of (node ids, edge ids), each sorted in graph order
+        """
+        n = len(self.node_names)
+        if max_nodes is None or max_nodes >= n:
+            keep = np.ones(n, dtype=bool)
+        else:
+            keep = np.zeros(n, dtype=bool)
+            # Stable sort so equal scores keep graph order
+            keep[np.argsort(-scores, kind='stable')[:max_nodes]] = True
+        candidates = np.flatnonzero(keep[self.edge_src] & keep[self.edge_dst])
+        if max_edges is not None and len(candidates) > max_edges:
+            strength = scores[self.edge_src[candidates]] + scores[self.edge_dst[candidates]]
+            order = np.lexsort((-strength, -self.edge_weight[candidates]))
+            candidates = np.sort(candidates[order[:max_edges]])
+        return np.flatnonzero(keep), candidates
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the arrays, excluding the name tables."""
+        arrays = (self.node_type, self.node_source_chunk, self.edge_src, self.edge_dst,
+                  self.edge_weight, self.edge_relation, self.indptr, self.indices,
+                  self.adjacent_edges)
+        return int(sum(a.nbytes for a in arrays))
+
+    def get_graph_data(
+        self,
+        node_ids: Optional[np.ndarray] = None,
+        edge_ids: Optional[np.ndarray] = None
+    ) -> Dict:
+        """
+        Nodes and edges in the KnowledgeGraphBuilder visualization format.
+
+        Args:
+            node_ids: Only these nodes (all if None)
+            edge_ids: Only these edges (all if None)
+
+        Returns:
+            Dict with nodes and edges for Cytoscape
+        """
+        types, names = self.type_names, self.node_names
+        node_type = self.node_type
+        if node_ids is None:
+            node_ids = range(len(names))
+        else:
+            node_type = node_type[node_ids]
+            node_ids = node_ids.tolist()
+        nodes = [
+            {'id': names[i], 'label': names[i], 'type': types[t]}
+            for i, t in zip(node_ids, node_type.tolist())
+        ]
+        edges = [
+            {'source': s, 'target': d, 'label': r}
+            for s, d, r, _ in self.edges(edge_ids)
+        ]
+        return {'nodes': nodes, 'edges': edges}
+
+    def get_relationships(self, edge_ids: Optional[np.ndarray] = None) -> List[Dict[str, str]]:
+        """
+        Edges in the KnowledgeGraphBuilder relationship format.
+
+        Args:
+            edge_ids: Only these edges (all if None)
+
+        Returns:
+            List of relationship dicts
+        """
+        return [
+            {'from_entity': s, 'to_entity': d, 'relation': r}
+            for s, d, r, _ in self.edges(edge_ids)
+        ]
+
+
+def degree_centrality(graph: CSRGraph) -> np.ndarray:
+    """
+    Fraction of other nodes each node is adjacent to.
+
+    Args:
+        graph: CSRGraph
+
+    Returns:
+        float32 array per node id
+    """
+    n = graph.number_of_nodes()
+    return (graph.degrees() / max(1, n - 1)).astype(np.float32)
+
+
+def pagerank(
+    graph: CSRGraph,
+    damping: float = 0.85,
+    max_iter: int = 100,
+    tol: float = 1e-6
+) -> np.ndarray:
+    """
+    Weighted PageRank by power iteration over the CSR adjacency.
+
+    Each iteration is one bincount over the adjacency slots, so the cost is
+    O(edges) in numpy regardless of graph shape. Matches nx.pagerank on
+    the same weighted undirected graph.
+
+    Args:
+        graph: CSRGraph
+        damping: Probability of following an edge rather than jumping
+        max_iter: Iteration limit
+        tol: Stop when the summed absolute change falls below n * tol
+
+    Returns:
+        float32 array per node id, summing to 1
+    """
+    n = graph.number_of_nodes()
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    rows = np.repeat(np.arange(n), graph.degrees())
+    slot_weight = np.asarray(graph.edge_weight, dtype=np.float64)[graph.adjacent_edges]
+    strength = np.bincount(rows, weights=slot_weight, minlength=n)
+    dangling = strength == 0
+    inverse = np.divide(1.0, strength, out=np.zeros(n), where=~dangling)
+    columns = graph.indices
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        share = rank * inverse
+        spread = np.bincount(rows, weights=slot_weight * share[columns], minlength=n)
+        previous = rank
+        rank = damping * (spread + rank[dangling].sum() / n) + (1.0 - damping) / n
+        if np.abs(rank - previous).sum() < n * tol:
+            break
+    return rank.astype(np.float32)
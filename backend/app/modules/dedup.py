@@ -0,0 +1,156 @@
+"""
+Near-duplicate chunk detection with MinHash signatures and LSH banding.
+"""
+import zlib
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from app.metrics import STAGE_LATENCY
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class DedupResult(NamedTuple):
+    """Outcome of deduplicating a list of chunks."""
+    # Indices of the chunks kept, in input order
+    keep: List[int]
+    # (index of dropped chunk, position in keep of the chunk it duplicates)
+    duplicates: List[Tuple[int, int]]
+
+    @property
+    def dropped(self) -> int:
+        return len(self.duplicates)
+
+
+def _collision_probability(similarity: np.ndarray, bands: int, rows: int) -> np.ndarray:
+    return 1 - (1 - similarity ** rows) ** bands
+
+
+def _false_positive_area(threshold: float, bands: int, rows: int) -> float:
+    x = np.linspace(0.0, threshold, 64)
+    return float(_collision_probability(x, bands, rows).mean() * threshold)
+
+
+def _false_negative_area(threshold: float, bands: int, rows: int) -> float:
+    x = np.linspace(threshold, 1.0, 64)
+    return float((1 - _collision_probability(x, bands, rows)).mean() * (1 - threshold))
+
+
+@lru_cache(maxsize=None)
+def optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Choose LSH bands and rows per band whose S-curve best matches the threshold.
+
+    Args:
+        threshold: Jaccard similarity at which chunks count as duplicates
+        num_perm: Signature length
+
+    Returns:
+        Tuple of (bands, rows)
+    """
+    best, best_error = (1, num_perm), float('inf')
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            # Candidates are verified against the full signature, so a false positive
+            # only costs a comparison while a false negative keeps a duplicate
+            error = (0.1 * _false_positive_area(threshold, bands, rows)
+                     + 0.9 * _false_negative_area(threshold, bands, rows))
+            if error < best_error:
+                best, best_error = (bands, rows), error
+    return best
+
+
+class ChunkDeduplicator:
+    """Collapse chunks whose word-shingle Jaccard similarity reaches a threshold."""
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        num_perm: int = 128,
+        shingle_size: int = 5,
+        seed: int = 1
+    ):
+        """
+        Initialize deduplicator.
+
+        Args:
+            threshold: Estimated Jaccard similarity at which a chunk is a duplicate
+            num_perm: MinHash signature length
+            shingle_size: Words per shingle
+            seed: Seed for the hash permutations
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Compute the MinHash signature of a text's word shingles.
+
+        Args:
+            text: Chunk text
+
+        Returns:
+            uint32 array of length num_perm
+        """
+        words = text.lower().split()
+        n = self.shingle_size
+        shingles = {' '.join(words[i:i + n]) for i in range(max(1, len(words) - n + 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles)
+        )
+        permuted = ((hashes[:, None] * self._a + self._b) % _MERSENNE_PRIME) & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def deduplicate(self, chunks: Sequence[str]) -> DedupResult:
+        """
+        Find near-duplicate chunks, keeping the first occurrence of each.
+
+        Args:
+            chunks: Chunk texts in document order
+
+        Returns:
+            DedupResult with kept indices and dropped duplicates
+        """
+        with STAGE_LATENCY.time(stage='dedup'):
+            keep: List[int] = []
+            kept_signatures: List[np.ndarray] = []
+            duplicates: List[Tuple[int, int]] = []
+            buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+
+            for i, chunk in enumerate(chunks):
+                signature = self.signature(chunk)
+                keys = [
+                    signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                    for band in range(self.bands)
+                ]
+                match = self._find_match(signature, keys, buckets, kept_signatures)
+                if match is not None:
+                    duplicates.append((i, match))
+                    continue
+                position = len(keep)
+                keep.append(i)
+                kept_signatures.append(signature)
+                for band, key in enumerate(keys):
+                    buckets[band].setdefault(key, []).append(position)
+
+            return DedupResult(keep, duplicates)
+
+    def _find_match(self, signature, keys, buckets, kept_signatures):
+        seen = set()
+        for band, key in enumerate(keys):
+            for position in buckets[band].get(key, ()):
+                if position in seen:
+                    continue
+                seen.add(position)
+                # Fraction of equal MinHash values estimates Jaccard similarity
+                if np.mean(kept_signatures[position] == signature) >= self.threshold:
+                    return position
+        return None
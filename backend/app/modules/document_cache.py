@@ -0,0 +1,195 @@
+"""
+On-disk cache of per-document upload artifacts.
+
+Entries are keyed by a hash of the uploaded bytes, the file type and a
+fingerprint of the pipeline configuration, and hold the document's chunks,
+their pages, the entities mentioned in each chunk and the chunk embeddings,
+so re-uploading a document skips extraction, chunking, NER and encoding.
+The least recently used entries are evicted once the cache exceeds its size
+budget.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.metrics import CACHE_HITS, CACHE_MISSES
+
+# Bump when the entry layout or the preprocessing it caches changes
+CACHE_FORMAT_VERSION = 1
+
+
+class DocumentArtifacts(NamedTuple):
+    """Everything the upload pipeline derives from one document."""
+    chunks: List[str]
+    pages: List[int]
+    # Per chunk, the (name, type) entity mentions extracted from it
+    mentions: List[List[Tuple[str, str]]]
+    # float32 array of shape (len(chunks), dimension)
+    vectors: np.ndarray
+
+
+class DocumentCache:
+    """Size-bounded LRU cache of document artifacts in a local directory."""
+
+    def __init__(self, directory: str, max_bytes: int, fingerprint: str = ""):
+        """
+        Initialize document cache.
+
+        Args:
+            directory: Cache directory, created if missing
+            max_bytes: Total size above which least recently used entries are evicted
+            fingerprint: Pipeline configuration (models, backends) that artifacts depend on
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.fingerprint = f"v{CACHE_FORMAT_VERSION}:{fingerprint}"
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # Key -> entry size in bytes, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        found = []
+        for key in os.listdir(directory):
+            meta = os.path.join(directory, key, 'meta.json')
+            if '.tmp-' not in key and os.path.exists(meta):
+                found.append((os.path.getmtime(meta), key, self._size(key)))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+        self._bytes = sum(self._entries.values())
+
+    def key(self, content: bytes, filename: str) -> str:
+        """
+        Cache key for an uploaded file.
+
+        Args:
+            content: File content as bytes
+            filename: Filename; only its extension, which selects the extractor, is used
+
+        Returns:
+            Hex digest
+        """
+        digest = hashlib.sha256()
+        digest.update(self.fingerprint.encode())
+        digest.update(b"\0" + os.path.splitext(filename)[1].lower().encode() + b"\0")
+        digest.update(content)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def _size(self, key: str) -> int:
+        path = self._path(key)
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+    def get(self, key: str) -> Optional[DocumentArtifacts]:
+        """
+        Look up a document's artifacts.
+
+        Args:
+            key: Key from key()
+
+        Returns:
+            DocumentArtifacts, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                data = json.load(f)
+            vectors = np.load(os.path.join(path, 'vectors.npy'), mmap_mode='r')
+        except (OSError, ValueError):
+            # Missing, evicted by another process, or partially deleted
+            with self._lock:
+                self.misses += 1
+                if self._entries.pop(key, None) is not None:
+                    self._bytes = sum(self._entries.values())
+            CACHE_MISSES.inc(cache='document')
+            return None
+
+        with self._lock:
+            self.hits += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                self._entries[key] = self._size(key)
+                self._bytes += self._entries[key]
+        CACHE_HITS.inc(cache='document')
+        try:
+            os.utime(os.path.join(path, 'meta.json'))
+        except OSError:
+            pass
+        return DocumentArtifacts(
+            data['chunks'],
+            data['pages'],
+            [[tuple(mention) for mention in chunk] for chunk in data['mentions']],
+            vectors
+        )
+
+    def put(self, key: str, artifacts: DocumentArtifacts):
+        """
+        Store a document's artifacts, evicting least recently used entries if over budget.
+
+        Args:
+            key: Key from key()
+            artifacts: Artifacts to store
+        """
+        final_path = self._path(key)
+        if os.path.exists(final_path):
+            return
+        tmp_path = f"{final_path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        os.makedirs(tmp_path, exist_ok=True)
+        np.save(os.path.join(tmp_path, 'vectors.npy'),
+                np.ascontiguousarray(artifacts.vectors, dtype=np.float32))
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump({
+                'chunks': artifacts.chunks,
+                'pages': [int(page) for page in artifacts.pages],
+                'mentions': artifacts.mentions
+            }, f)
+        size = sum(os.path.getsize(os.path.join(tmp_path, name)) for name in os.listdir(tmp_path))
+        if size > self.max_bytes:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return
+        try:
+            os.rename(tmp_path, final_path)
+        except OSError:
+            # Another upload stored the same document first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return
+
+        with self._lock:
+            self._entries[key] = size
+            self._bytes += size
+            evicted = []
+            while self._bytes > self.max_bytes:
+                old_key, old_size = self._entries.popitem(last=False)
+                self._bytes -= old_size
+                self.evictions += 1
+                evicted.append(old_key)
+        for old_key in evicted:
+            shutil.rmtree(self._path(old_key), ignore_errors=True)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dict with entries, bytes, max_bytes, hits, misses, evictions and hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,114 @@
+"""
+Multi-process embedding for large uploads.
+
+Chunks are split into shards and encoded by a pool of spawned worker processes,
+each holding its own model copy with a fixed number of inference threads so
+that workers × threads does not oversubscribe the CPU.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Iterator, List, Optional
+
+import numpy as np
+
+# Model owned by the current worker process
+_worker_model = None
+
+_THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'TOKENIZERS_PARALLELISM'
+)
+
+
+def _init_worker(model_factory: Callable, threads: int):
+    """Pin native thread pools, then load this worker's model copy."""
+    global _worker_model
+    for name in _THREAD_ENV_VARS:
+        os.environ[name] = 'false' if name == 'TOKENIZERS_PARALLELISM' else str(threads)
+    _worker_model = model_factory()
+
+
+def _encode_shard(texts: List[str], batch_size: int) -> np.ndarray:
+    return np.ascontiguousarray(_worker_model.encode(texts, batch_size=batch_size), dtype=np.float32)
+
+
+def default_workers() -> int:
+    """Worker count that leaves one core for the API process."""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+class EmbeddingPool:
+    """Shard bulk encoding across worker processes and return vectors in order."""
+
+    def __init__(
+        self,
+        model_factory: Callable,
+        workers: int = 0,
+        threads_per_worker: int = 1,
+        batch_size: int = 64,
+        shard_size: int = 256
+    ):
+        """
+        Initialize embedding pool.
+
+        Args:
+            model_factory: Picklable zero-argument callable returning an object
+                with encode(texts, batch_size=...), e.g. partial(EmbeddingModel, name)
+            workers: Worker processes (0 picks cpu_count - 1)
+            threads_per_worker: Inference threads inside each worker
+            batch_size: Texts per forward pass inside a worker
+            shard_size: Texts sent to a worker per task
+        """
+        self.workers = workers or default_workers()
+        self.threads_per_worker = max(1, threads_per_worker)
+        self.batch_size = batch_size
+        self.shard_size = max(1, shard_size)
+        # spawn: forking a process that already holds torch/OpenMP state can deadlock
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(model_factory, self.threads_per_worker)
+        )
+
+    def iter_encode(self, texts: List[str], shard_size: Optional[int] = None) -> Iterator[np.ndarray]:
+        """
+        Encode texts in parallel, yielding one array per shard in input order.
+
+        Args:
+            texts: Texts to encode
+            shard_size: Override the pool's shard size
+
+        Yields:
+            float32 arrays whose rows, concatenated, align with texts
+        """
+        size = shard_size or self.shard_size
+        shards = [texts[i:i + size] for i in range(0, len(texts), size)]
+        # map() submits every shard up front and yields results in submission order
+        yield from self._executor.map(partial(_encode_shard, batch_size=self.batch_size), shards)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts in parallel.
+
+        Args:
+            texts: Texts to encode
+
+        Returns:
+            float32 array of shape (len(texts), dimension)
+        """
+        blocks = list(self.iter_encode(texts))
+        if not blocks:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(blocks)
+
+    def warm_up(self):
+        """Start every worker and load its model before the first upload."""
+        list(self._executor.map(
+            partial(_encode_shard, batch_size=1), [["warm-up"]] * self.workers
+        ))
+
+    def close(self):
+        """Shut down worker processes."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,9 +1,12 @@
 """
 Entity extraction module using spaCy.
 """
-from typing import List, Dict, Tuple, Set
+from typing import List, Dict, Tuple
 import re
 
+from app.metrics import STAGE_LATENCY
+from app.modules.entity_table import EntityTable
+
 
 class EntityExtractor:
     """Extract entities from text using spaCy NER (with fallback)."""
@@ -79,35 +82,46 @@ class EntityExtractor:
         
         return unique_entities
     
-    def extract_from_chunks(self, chunks: List[str]) -> Tuple[List[Dict], Dict]:
+    def extract_table(self, chunks: List[str]) -> EntityTable:
         """
-        Extract entities from multiple chunks.
+        Extract entities from multiple chunks into an interned entity table.
         
         Args:
             chunks: List of text chunks
             
         Returns:
-            Tuple of (entities list, chunk_entity_mapping dict)
+            EntityTable with one id per (lowercased name, type)
+        """
+        return EntityTable.from_mentions(self.extract_mentions(chunks))
+    
+    def extract_mentions(self, chunks: List[str]) -> List[List[Tuple[str, str]]]:
         """
-        all_entities = []
-        entity_map = {}  # Maps chunk index to entities
-        seen_entities: Set[Tuple[str, str]] = set()
+        Extract the (name, type) entity mentions of each chunk.
         
-        for chunk_idx, chunk in enumerate(chunks):
-            entities = self.extract_entities(chunk)
-            entity_map[chunk_idx] = entities
+        Args:
+            chunks: List of text chunks
             
-            for ent in entities:
-                key = (ent['name'].lower(), ent['type'])
-                if key not in seen_entities:
-                    all_entities.append({
-                        'name': ent['name'],
-                        'type': ent['type'],
-                        'source_chunk_id': chunk_idx
-                    })
-                    seen_entities.add(key)
+        Returns:
+            Per chunk, its mentions as (name, type) pairs
+        """
+        with STAGE_LATENCY.time(stage='entity_extraction'):
+            return [
+                [(ent['name'], ent['type']) for ent in self.extract_entities(chunk)]
+                for chunk in chunks
+            ]
+    
+    def extract_from_chunks(self, chunks: List[str]) -> Tuple[List[Dict], Dict]:
+        """
+        Extract entities from multiple chunks.
         
-        return all_entities, entity_map
+        Args:
+            chunks: List of text chunks
+            
+        Returns:
+            Tuple of (entities list, chunk_entity_mapping dict)
+        """
+        table = self.extract_table(chunks)
+        return table.to_entities(), table.to_chunk_map()
     
     def extract_noun_phrases(self, text: str) -> List[str]:
         """
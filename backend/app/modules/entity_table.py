@@ -0,0 +1,285 @@
+"""
+Interned entity table shared by extraction, graph building and query-time lookups.
+
+Each canonical entity, keyed by (lowercased name, type) as in the rest of the
+pipeline, gets an integer id. Names, types and first chunks are per-id arrays,
+and the entities mentioned by each chunk are a CSR list of ids, so
+deduplication and lookups are array operations instead of dict/tuple churn.
+The transposed postings (entity id -> chunks mentioning it) are built
+alongside for graph-guided retrieval expansion.
+"""
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Per-table arrays, saved as entities_<name>.npy
+_ARRAYS = (
+    'type_codes', 'first_chunk', 'chunk_indptr', 'chunk_entities', 'entity_indptr', 'entity_chunks'
+)
+
+
+class EntityTable:
+    """Per-session entities with integer ids and chunk -> entity postings."""
+
+    def __init__(
+        self,
+        names: List[str],
+        type_codes: np.ndarray,
+        type_names: List[str],
+        first_chunk: np.ndarray,
+        chunk_indptr: np.ndarray,
+        chunk_entities: np.ndarray,
+        entity_indptr: Optional[np.ndarray] = None,
+        entity_chunks: Optional[np.ndarray] = None
+    ):
+        """
+        Initialize entity table.
+
+        Args:
+            names: Surface form of each entity as first seen
+            type_codes: int32 array, index into type_names per entity
+            type_names: Distinct entity types
+            first_chunk: int32 array, chunk each entity was first seen in
+            chunk_indptr: int64 array of length chunks + 1 into chunk_entities
+            chunk_entities: int32 array of entity ids mentioned per chunk, in order
+            entity_indptr: int64 array of length entities + 1 into entity_chunks
+                (transposed from the chunk postings if None)
+            entity_chunks: int32 array of chunk ids mentioning each entity, ascending
+        """
+        self.names = names
+        self.type_codes = type_codes
+        self.type_names = type_names
+        self.first_chunk = first_chunk
+        self.chunk_indptr = chunk_indptr
+        self.chunk_entities = chunk_entities
+        if entity_indptr is None or entity_chunks is None:
+            entity_indptr, entity_chunks = self._transpose()
+        self.entity_indptr = entity_indptr
+        self.entity_chunks = entity_chunks
+        self._index: Optional[Dict[Tuple[str, str], int]] = None
+
+    def _transpose(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Invert chunk -> entity postings into entity -> chunk postings."""
+        counts = np.bincount(self.chunk_entities, minlength=len(self.names))
+        entity_indptr = np.zeros(len(self.names) + 1, dtype=np.int64)
+        np.cumsum(counts, out=entity_indptr[1:])
+        chunk_of_slot = np.repeat(
+            np.arange(len(self.chunk_indptr) - 1, dtype=np.int32), np.diff(self.chunk_indptr)
+        )
+        # A stable sort keeps each entity's chunks in ascending order
+        order = np.argsort(self.chunk_entities, kind='stable')
+        return entity_indptr, chunk_of_slot[order]
+
+    @classmethod
+    def from_mentions(cls, mentions: Iterable[Sequence[Tuple[str, str]]]) -> 'EntityTable':
+        """
+        Intern the (name, type) mentions found in each chunk.
+
+        Args:
+            mentions: Per chunk, the (name, type) pairs extracted from it
+
+        Returns:
+            EntityTable instance
+        """
+        index: Dict[Tuple[str, str], int] = {}
+        type_index: Dict[str, int] = {}
+        names, type_codes, first_chunk = [], [], []
+        indptr, postings = [0], []
+        for chunk_idx, chunk_mentions in enumerate(mentions):
+            in_chunk = set()
+            for name, entity_type in chunk_mentions:
+                key = (name.lower(), entity_type)
+                entity = index.get(key)
+                if entity is None:
+                    entity = index[key] = len(names)
+                    names.append(name)
+                    type_codes.append(type_index.setdefault(entity_type, len(type_index)))
+                    first_chunk.append(chunk_idx)
+                if entity not in in_chunk:
+                    in_chunk.add(entity)
+                    postings.append(entity)
+            indptr.append(len(postings))
+        table = cls(
+            names,
+            np.array(type_codes, dtype=np.int32),
+            list(type_index),
+            np.array(first_chunk, dtype=np.int32),
+            np.array(indptr, dtype=np.int64),
+            np.array(postings, dtype=np.int32)
+        )
+        table._index = index
+        return table
+
+    @classmethod
+    def from_entities(cls, entities: List[Dict], entity_chunk_map: Dict) -> 'EntityTable':
+        """
+        Build a table from the list-of-dicts form returned by extract_from_chunks.
+
+        Mentions without a type are matched to an entity by name; mentions of
+        names not in the entity list are ignored.
+
+        Args:
+            entities: Deduplicated entity dicts with name, type and source_chunk_id
+            entity_chunk_map: Chunk index -> mentioned entity dicts
+
+        Returns:
+            EntityTable instance
+        """
+        index: Dict[Tuple[str, str], int] = {}
+        by_name: Dict[str, int] = {}
+        type_index: Dict[str, int] = {}
+        names, type_codes, first_chunk = [], [], []
+        for ent in entities:
+            key = (ent['name'].lower(), ent['type'])
+            if key in index:
+                continue
+            index[key] = len(names)
+            by_name.setdefault(ent['name'], len(names))
+            names.append(ent['name'])
+            type_codes.append(type_index.setdefault(ent['type'], len(type_index)))
+            first_chunk.append(ent.get('source_chunk_id', 0))
+
+        num_chunks = max(entity_chunk_map, default=-1) + 1
+        indptr, postings = [0], []
+        for chunk_idx in range(num_chunks):
+            in_chunk = set()
+            for ent in entity_chunk_map.get(chunk_idx, ()):
+                entity = index.get((ent['name'].lower(), ent.get('type')))
+                if entity is None:
+                    entity = by_name.get(ent['name'])
+                if entity is not None and entity not in in_chunk:
+                    in_chunk.add(entity)
+                    postings.append(entity)
+            indptr.append(len(postings))
+        table = cls(
+            names,
+            np.array(type_codes, dtype=np.int32),
+            list(type_index),
+            np.array(first_chunk, dtype=np.int32),
+            np.array(indptr, dtype=np.int64),
+            np.array(postings, dtype=np.int32)
+        )
+        table._index = index
+        return table
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self.chunk_indptr) - 1
+
+    def entity_type(self, entity: int) -> str:
+        return self.type_names[self.type_codes[entity]]
+
+    def lookup(self, name: str, entity_type: str) -> Optional[int]:
+        """Find the id of a canonical entity, or None."""
+        if self._index is None:
+            self._index = {
+                (entity_name.lower(), self.type_names[code]): i
+                for i, (entity_name, code) in enumerate(zip(self.names, self.type_codes.tolist()))
+            }
+        return self._index.get((name.lower(), entity_type))
+
+    def chunk_entity_ids(self, chunk: int) -> np.ndarray:
+        """Entity ids mentioned in a chunk, as a view into the postings."""
+        if chunk >= self.num_chunks:
+            return self.chunk_entities[:0]
+        return self.chunk_entities[self.chunk_indptr[chunk]:self.chunk_indptr[chunk + 1]]
+
+    def entities_for_chunks(self, chunk_ids: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Distinct entities mentioned by some chunks, in order of first mention.
+
+        Args:
+            chunk_ids: Chunk ids, e.g. retrieval results in rank order
+
+        Returns:
+            Tuple of (entity ids, position in chunk_ids of each entity's first mention)
+        """
+        chunk_ids = np.asarray(chunk_ids, dtype=np.int64)
+        # Chunks past the last one with postings mention nothing
+        known = np.flatnonzero(chunk_ids < self.num_chunks)
+        mentioned, positions = _gather(self.chunk_indptr, self.chunk_entities, chunk_ids[known])
+        if not len(mentioned):
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        entities, first = np.unique(mentioned, return_index=True)
+        order = np.argsort(first, kind='stable')
+        return entities[order].astype(np.int64), known[positions[first[order]]]
+
+    def chunks_for_entities(self, entity_ids: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Distinct chunks mentioning any of some entities.
+
+        Args:
+            entity_ids: Entity ids
+
+        Returns:
+            Tuple of (ascending chunk ids, how many of the entities each chunk mentions)
+        """
+        chunks, _ = _gather(self.entity_indptr, self.entity_chunks, np.asarray(entity_ids, dtype=np.int64))
+        chunks, counts = np.unique(chunks, return_counts=True)
+        return chunks.astype(np.int64), counts
+
+    def to_entities(self) -> List[Dict]:
+        """Entity dicts with name, type and source_chunk_id, in id order."""
+        return [
+            {'name': name, 'type': self.type_names[code], 'source_chunk_id': chunk}
+            for name, code, chunk in zip(self.names, self.type_codes.tolist(), self.first_chunk.tolist())
+        ]
+
+    def to_chunk_map(self) -> Dict[int, List[Dict[str, str]]]:
+        """Chunk index -> mentioned entity dicts with name and type."""
+        return {
+            chunk: [
+                {'name': self.names[e], 'type': self.entity_type(e)}
+                for e in self.chunk_entity_ids(chunk).tolist()
+            ]
+            for chunk in range(self.num_chunks)
+        }
+
+    def save(self, directory: str):
+        """
+        Write the table as entities_*.npy arrays plus entities.json.
+
+        Args:
+            directory: Existing output directory
+        """
+        for name in _ARRAYS:
+            np.save(os.path.join(directory, f"entities_{name}.npy"), np.asarray(getattr(self, name)))
+        with open(os.path.join(directory, 'entities.json'), 'w') as f:
+            json.dump({'names': self.names, 'types': self.type_names}, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'EntityTable':
+        """
+        Load a saved table, memory-mapping the arrays read-only by default.
+
+        Args:
+            directory: Directory written by save()
+            mmap: Map the files instead of reading them into memory
+
+        Returns:
+            EntityTable instance
+        """
+        mmap_mode = 'r' if mmap else None
+
+        arrays = {
+            name: np.load(os.path.join(directory, f"entities_{name}.npy"), mmap_mode=mmap_mode)
+            for name in _ARRAYS
+        }
+        with open(os.path.join(directory, 'entities.json')) as f:
+            data = json.load(f)
+        return cls(names=data['names'], type_names=data['types'], **arrays)
+
+
+def _gather(indptr: np.ndarray, values: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenate CSR rows, returning the values and the position in rows each came from."""
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    total = int(lengths.sum())
+    slots = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+    return values[slots], np.repeat(np.arange(len(rows)), lengths)
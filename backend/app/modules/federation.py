@@ -0,0 +1,121 @@
+"""
+Federated search over several sessions with one shared query embedding.
+"""
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.metrics import STAGE_LATENCY
+
+
+class SearchHit(NamedTuple):
+    """One retrieved chunk, identified by its session and position in that session."""
+    similarity: float
+    index_id: str
+    chunk_id: int
+
+
+class FederatedSearcher:
+    """Search several FAISS indices in parallel and merge them into one global top-k."""
+
+    def __init__(self, max_workers: int = 8):
+        """
+        Initialize federated searcher.
+
+        Args:
+            max_workers: Threads searching indices concurrently (FAISS releases the GIL)
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rag-federated")
+
+    def search(
+        self,
+        sessions: Sequence,
+        query_embedding: np.ndarray,
+        k: int,
+        selections: Optional[Dict[str, np.ndarray]] = None
+    ) -> List[SearchHit]:
+        """
+        Search every session and keep the k best hits overall.
+
+        All sessions share the process-wide embedding model, so their L2
+        distances (and the similarities derived from them) are comparable.
+
+        Args:
+            sessions: RAGSession objects to search
+            query_embedding: Query embedding of shape (1, dimension)
+            k: Number of results overall
+            selections: Optional chunk ids to restrict each session to, by session id
+
+        Returns:
+            Hits sorted by descending similarity
+        """
+        selections = selections or {}
+        with STAGE_LATENCY.time(stage='federated_search'):
+            futures = [
+                (session.session_id, self._executor.submit(
+                    session.retriever.search, query_embedding, k, selections.get(session.session_id)
+                ))
+                for session in sessions
+            ]
+            candidates = []
+            for index_id, future in futures:
+                ids, similarities = future.result()
+                candidates.extend(
+                    SearchHit(sim, index_id, chunk_id) for chunk_id, sim in zip(ids, similarities)
+                )
+            # At most k hits per session; the heap keeps only the global k best
+            return heapq.nlargest(k, candidates)
+
+    def close(self):
+        """Stop the search threads."""
+        self._executor.shutdown(wait=False)
+
+
+def merge_relationships(relationship_lists: Sequence[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+    """
+    Union relationships from several graphs, keeping the first per entity pair.
+
+    Args:
+        relationship_lists: Output of get_relationships() per graph
+
+    Returns:
+        Deduplicated relationships
+    """
+    merged = []
+    seen = set()
+    for relationships in relationship_lists:
+        for rel in relationships:
+            key = tuple(sorted((rel['from_entity'], rel['to_entity'])))
+            if key not in seen:
+                merged.append(rel)
+                seen.add(key)
+    return merged
+
+
+def merge_graph_data(graphs: Sequence[Dict]) -> Dict:
+    """
+    Union graph visualization data, deduplicating nodes by id and edges by endpoints.
+
+    Args:
+        graphs: Output of get_graph_data() per graph
+
+    Returns:
+        Dict with nodes and edges
+    """
+    nodes = []
+    node_ids = set()
+    edges = []
+    edge_keys = set()
+    for graph in graphs:
+        for node in graph['nodes']:
+            if node['id'] not in node_ids:
+                nodes.append(node)
+                node_ids.add(node['id'])
+        for edge in graph['edges']:
+            key: Tuple[str, str] = tuple(sorted((edge['source'], edge['target'])))
+            if key not in edge_keys:
+                edges.append(edge)
+                edge_keys.add(key)
+    return {'nodes': nodes, 'edges': edges}
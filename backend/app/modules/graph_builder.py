@@ -1,40 +1,85 @@
 """
-Knowledge graph construction module using NetworkX.
+Knowledge graph construction module using NetworkX or compact CSR arrays.
 """
-from typing import List, Dict, Tuple, Set
-import networkx as nx
+import threading
+from typing import List, Dict, Optional, Tuple, Set
 from collections import defaultdict
 
-# Optional spaCy import - may fail on Python 3.14+
-try:
-    import spacy
-    SPACY_AVAILABLE = True
-except Exception as e:
-    print(f"Warning: spaCy not available ({e}). Graph builder will work with basic features.")
-    SPACY_AVAILABLE = False
+import numpy as np
+
+from app import config
+from app.metrics import STAGE_LATENCY
+from app.modules.csr_graph import CSRGraph, CSRGraphBuilder, degree_centrality, pagerank
+from app.modules.entity_table import EntityTable
+
+# spaCy pipeline shared by all builders; loaded on first use (None if unavailable)
+_spacy_nlp = None
+_spacy_loaded = False
+# Graphs are built on background threads; concurrent first callers wait for one load
+_spacy_lock = threading.Lock()
+
+
+def _load_spacy():
+    """Import spaCy and load the English model once; may fail on Python 3.14+."""
+    global _spacy_nlp, _spacy_loaded
+    if _spacy_loaded:
+        return _spacy_nlp
+    with _spacy_lock:
+        if not _spacy_loaded:
+            try:
+                import spacy
+            except Exception as e:
+                print(f"Warning: spaCy not available ({e}). Graph builder will work with basic features.")
+            else:
+                try:
+                    _spacy_nlp = spacy.load('en_core_web_sm')
+                except Exception:
+                    pass
+            # Set only once _spacy_nlp holds its final value
+            _spacy_loaded = True
+    return _spacy_nlp
 
 
 class KnowledgeGraphBuilder:
     """Build knowledge graphs from extracted entities."""
     
-    def __init__(self):
-        """Initialize knowledge graph builder."""
-        self.graph = nx.Graph()
-        self.nlp = None
-        if SPACY_AVAILABLE:
-            try:
-                self.nlp = spacy.load('en_core_web_sm')
-            except Exception:
-                pass
+    def __init__(self, backend: Optional[str] = None):
+        """
+        Initialize knowledge graph builder.
+        
+        Args:
+            backend: "networkx" or "csr" (defaults to RAG_GRAPH_BACKEND)
+        """
+        self.backend = backend or config.GRAPH_BACKEND
+        if self.backend not in ('networkx', 'csr'):
+            raise ValueError(f"Unknown graph backend: {self.backend}")
+        self.graph = self._new_graph()
+        if self.backend == 'csr':
+            self.graph = self.graph.build()
+        # Centrality per node, computed once after each build
+        self.node_scores = None
+        self._ranked: Optional[CSRGraph] = None
+        self._selections: Dict[Tuple, Tuple] = {}
+        # (table, graph node id per entity id), rebuilt after each build
+        self._entity_nodes: Optional[Tuple[EntityTable, np.ndarray]] = None
+        self.nlp = _load_spacy()
+    
+    def _new_graph(self):
+        """Empty mutable graph for the configured backend."""
+        if self.backend == 'csr':
+            return CSRGraphBuilder()
+        import networkx as nx
+        
+        return nx.Graph()
     
     def build_graph(
         self,
         entities: List[Dict[str, str]],
         entity_chunk_map: Dict,
         chunks: List[str]
-    ) -> nx.Graph:
+    ):
         """
-        Build knowledge graph from entities.
+        Build knowledge graph from entities in list-of-dicts form.
         
         Args:
             entities: List of extracted entities
@@ -42,39 +87,163 @@ class KnowledgeGraphBuilder:
             chunks: Original text chunks
             
         Returns:
-            NetworkX graph
+            NetworkX graph, or CSRGraph with the csr backend
+        """
+        return self.build_graph_from_table(EntityTable.from_entities(entities, entity_chunk_map), chunks)
+    
+    def build_graph_from_table(self, table: EntityTable, chunks: List[str]):
+        """
+        Build knowledge graph from an interned entity table.
+        
+        Args:
+            table: EntityTable from EntityExtractor.extract_table
+            chunks: Original text chunks
+            
+        Returns:
+            NetworkX graph, or CSRGraph with the csr backend
+        """
+        with STAGE_LATENCY.time(stage='graph_build'):
+            graph = self._build_graph(table, chunks)
+        self.rank_nodes()
+        return graph
+    
+    def rank_nodes(self, scores=None):
+        """
+        Compute (or install precomputed) node centrality used to cap payloads.
+        
+        Args:
+            scores: Centrality per node in graph order; computed with
+                RAG_GRAPH_CENTRALITY ("pagerank" or "degree") if None
+        """
+        self._ranked = self.to_csr()
+        self._selections = {}
+        self._entity_nodes = None
+        if scores is None:
+            with STAGE_LATENCY.time(stage='centrality'):
+                if config.GRAPH_CENTRALITY == 'degree':
+                    scores = degree_centrality(self._ranked)
+                else:
+                    scores = pagerank(self._ranked)
+        self.node_scores = scores
+    
+    def _top_subgraph(self, max_nodes: Optional[int], max_edges: Optional[int]):
+        """Node and edge ids of the capped subgraph, cached per limit pair."""
+        key = (max_nodes, max_edges)
+        selection = self._selections.get(key)
+        if selection is None:
+            if self.node_scores is None:
+                self.rank_nodes()
+            selection = self._ranked.top_subgraph(self.node_scores, max_nodes, max_edges)
+            if len(self._selections) >= 16:
+                self._selections.clear()
+            self._selections[key] = selection
+        return selection
+    
+    def expand_chunks(
+        self,
+        table: EntityTable,
+        chunk_ids: List[int],
+        hops: int,
+        limit: int,
+        allowed: Optional[np.ndarray] = None
+    ) -> List[int]:
         """
-        self.graph = nx.Graph()
+        Find chunks mentioning entities within a few graph hops of retrieved chunks.
+        
+        Only precomputed postings and adjacency are read; nothing is embedded or searched.
+        
+        Args:
+            table: EntityTable the graph was built from
+            chunk_ids: Retrieved chunk ids, whose entities seed the walk
+            hops: Maximum graph distance from a seed entity
+            limit: Maximum number of chunks to return
+            allowed: Only return these chunk ids (e.g. from ChunkMetadata.select)
+            
+        Returns:
+            New chunk ids, those mentioning the most reached entities first
+        """
+        seeds, _ = table.entities_for_chunks(chunk_ids)
+        if not len(seeds) or limit <= 0:
+            return []
+        if self._ranked is None:
+            self.rank_nodes()
+        graph = self._ranked
+        if self._entity_nodes is None or self._entity_nodes[0] is not table:
+            # Entities sharing a name share a graph node
+            node_ids = [graph.node_id(name) for name in table.names]
+            self._entity_nodes = (table, np.array(node_ids, dtype=np.int64))
+        entity_nodes = self._entity_nodes[1]
+        
+        reached_nodes = graph.neighborhood(entity_nodes[seeds], hops)
+        reached = np.flatnonzero(np.isin(entity_nodes, reached_nodes))
+        candidates, counts = table.chunks_for_entities(reached)
+        keep = ~np.isin(candidates, chunk_ids)
+        if allowed is not None:
+            keep &= np.isin(candidates, allowed)
+        candidates, counts = candidates[keep], counts[keep]
+        order = np.lexsort((candidates, -counts))[:limit]
+        return candidates[order].tolist()
+    
+    def _build_graph(self, table: EntityTable, chunks: List[str]):
+        """Add entity nodes and co-occurrence/dependency edges to a fresh graph."""
+        self.graph = self._new_graph()
         
         # Add entity nodes
-        for entity in entities:
-            self.graph.add_node(
-                entity['name'],
-                type=entity['type'],
-                source_chunk=entity.get('source_chunk_id', 0)
-            )
+        for name, type_code, first_chunk in zip(
+            table.names, table.type_codes.tolist(), table.first_chunk.tolist()
+        ):
+            self.graph.add_node(name, type=table.type_names[type_code], source_chunk=first_chunk)
         
         # Add edges for co-occurrence
-        self._add_cooccurrence_edges(entity_chunk_map, chunks, entities)
+        self._add_cooccurrence_edges(table)
         
         # Add edges for dependencies (if spaCy available)
         if self.nlp:
-            self._add_dependency_edges(chunks, entities)
+            self._add_dependency_edges(chunks, table)
         
+        if self.backend == 'csr':
+            self.graph = self.graph.build()
         return self.graph
     
-    def _add_cooccurrence_edges(
-        self,
-        entity_chunk_map: Dict,
-        chunks: List[str],
-        entities: List[Dict]
-    ):
+    def to_csr(self) -> CSRGraph:
+        """
+        Get the graph as CSR arrays, converting from NetworkX if needed.
+        
+        Returns:
+            CSRGraph instance
+        """
+        if isinstance(self.graph, CSRGraph):
+            return self.graph
+        return CSRGraph.from_networkx(self.graph)
+    
+    def load_csr(self, csr: CSRGraph, scores=None):
+        """
+        Replace the graph with one loaded as CSR arrays.
+        
+        Args:
+            csr: CSRGraph, kept as is with the csr backend
+            scores: Stored node centrality, recomputed if None
+        """
+        if self.backend == 'csr':
+            self.graph = csr
+            self.rank_nodes(scores)
+            return
+        self.graph = self._new_graph()
+        for name, type_id, source_chunk in zip(
+            csr.node_names, csr.node_type.tolist(), csr.node_source_chunk.tolist()
+        ):
+            self.graph.add_node(name, type=csr.type_names[type_id], source_chunk=source_chunk)
+        for source, target, relation, weight in csr.edges():
+            self.graph.add_edge(source, target, relation=relation, weight=weight)
+        self.rank_nodes(scores)
+    
+    def _add_cooccurrence_edges(self, table: EntityTable):
         """Add edges for entities that co-occur in same chunk."""
-        entity_names = {ent['name'] for ent in entities}
+        names = table.names
         
-        for chunk_idx, chunk_entities in entity_chunk_map.items():
-            # Get entity names in this chunk
-            names_in_chunk = [ent['name'] for ent in chunk_entities if ent['name'] in entity_names]
+        for chunk_idx in range(table.num_chunks):
+            # Get entity names in this chunk from its postings
+            names_in_chunk = [names[e] for e in table.chunk_entity_ids(chunk_idx).tolist()]
             
             # Create edges between all pairs
             for i, name1 in enumerate(names_in_chunk):
@@ -87,12 +256,12 @@ class KnowledgeGraphBuilder:
                             weight=1.0
                         )
     
-    def _add_dependency_edges(self, chunks: List[str], entities: List[Dict]):
+    def _add_dependency_edges(self, chunks: List[str], table: EntityTable):
         """Add edges based on syntactic dependencies."""
         if not self.nlp:
             return
         
-        entity_names = {ent['name'].lower() for ent in entities}
+        entity_names = {name.lower() for name in table.names}
         
         for chunk in chunks:
             doc = self.nlp(chunk)
@@ -123,13 +292,23 @@ class KnowledgeGraphBuilder:
                             weight=2.0
                         )
     
-    def get_graph_data(self) -> Dict:
+    def get_graph_data(self, max_nodes: Optional[int] = None, max_edges: Optional[int] = None) -> Dict:
         """
         Convert NetworkX graph to JSON-serializable format for visualization.
         
+        Args:
+            max_nodes: Keep only this many of the most central nodes
+            max_edges: Keep only this many of the strongest edges between kept nodes
+        
         Returns:
             Dict with nodes and edges for Cytoscape
         """
+        if max_nodes is not None or max_edges is not None:
+            node_ids, edge_ids = self._top_subgraph(max_nodes, max_edges)
+            return self._ranked.get_graph_data(node_ids, edge_ids)
+        if isinstance(self.graph, CSRGraph):
+            return self.graph.get_graph_data()
+        
         nodes = []
         edges = []
         
@@ -159,13 +338,27 @@ class KnowledgeGraphBuilder:
             'edges': edges
         }
     
-    def get_relationships(self) -> List[Dict[str, str]]:
+    def get_relationships(
+        self,
+        max_nodes: Optional[int] = None,
+        max_edges: Optional[int] = None
+    ) -> List[Dict[str, str]]:
         """
         Get relationships from graph.
         
+        Args:
+            max_nodes: Keep only relationships between this many of the most central nodes
+            max_edges: Keep only this many of the strongest relationships
+        
         Returns:
             List of relationship dicts
         """
+        if max_nodes is not None or max_edges is not None:
+            _, edge_ids = self._top_subgraph(max_nodes, max_edges)
+            return self._ranked.get_relationships(edge_ids)
+        if isinstance(self.graph, CSRGraph):
+            return self.graph.get_relationships()
+        
         relationships = []
         seen = set()
         
@@ -0,0 +1,135 @@
+"""
+Precomputed lexical features for the no-LLM fallback answer path.
+"""
+from typing import Dict, List, Sequence, Set
+
+import numpy as np
+
+# Sentence end markers, in the order the fallback answer prefers them
+SENTENCE_END_MARKERS = ['. ', '! ', '? ', '.\n', '!\n', '?\n']
+
+
+def tokenize(text: str) -> Set[str]:
+    """
+    Split text into the lowercase keyword set used for overlap scoring.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Set of keywords longer than two characters
+    """
+    return set(w.lower() for w in text.split() if len(w) > 2)
+
+
+def fallback_answer_end(chunk: str) -> int:
+    """
+    Find where a fallback answer drawn from this chunk should end.
+
+    Short chunks are returned whole; longer ones are cut at the last sentence
+    boundary past 500 characters, or at 1000 characters if there is none.
+
+    Args:
+        chunk: Text chunk
+
+    Returns:
+        End offset into the chunk
+    """
+    if len(chunk) <= 1000:
+        return len(chunk)
+
+    truncated = chunk[:1200]
+    for end_marker in SENTENCE_END_MARKERS:
+        last_idx = truncated.rfind(end_marker)
+        if last_idx > 500:  # At least 500 chars
+            return last_idx + 1
+
+    return 1000
+
+
+class LexicalFeatures:
+    """Per-chunk keyword ids and answer offsets, computed once at ingest."""
+
+    def __init__(
+        self,
+        vocabulary: Dict[str, int],
+        term_ids: np.ndarray,
+        term_offsets: np.ndarray,
+        answer_ends: np.ndarray
+    ):
+        """
+        Initialize lexical features.
+
+        Args:
+            vocabulary: Keyword to term id mapping
+            term_ids: Concatenated sorted term ids of all chunks
+            term_offsets: Start offset of each chunk in term_ids (length n + 1)
+            answer_ends: Fallback answer end offset for each chunk
+        """
+        self.vocabulary = vocabulary
+        self.term_ids = term_ids
+        self.term_offsets = term_offsets
+        self.answer_ends = answer_ends
+
+    @classmethod
+    def build(cls, chunks: Sequence[str]) -> "LexicalFeatures":
+        """
+        Tokenize chunks and precompute their features.
+
+        Args:
+            chunks: Text chunks in index order
+
+        Returns:
+            LexicalFeatures for the chunks
+        """
+        vocabulary: Dict[str, int] = {}
+        chunk_terms: List[np.ndarray] = []
+        term_offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+        answer_ends = np.zeros(len(chunks), dtype=np.int32)
+
+        for chunk_idx, chunk in enumerate(chunks):
+            ids = [vocabulary.setdefault(word, len(vocabulary)) for word in tokenize(chunk)]
+            chunk_terms.append(np.sort(np.array(ids, dtype=np.int32)))
+            term_offsets[chunk_idx + 1] = term_offsets[chunk_idx] + len(ids)
+            answer_ends[chunk_idx] = fallback_answer_end(chunk)
+
+        term_ids = np.concatenate(chunk_terms) if chunk_terms else np.zeros(0, dtype=np.int32)
+        return cls(vocabulary, term_ids, term_offsets, answer_ends)
+
+    def query_terms(self, query: str) -> np.ndarray:
+        """
+        Map query keywords to term ids, dropping words no chunk contains.
+
+        Args:
+            query: User query
+
+        Returns:
+            Sorted array of term ids
+        """
+        ids = [self.vocabulary[w] for w in tokenize(query) if w in self.vocabulary]
+        return np.sort(np.array(ids, dtype=np.int32))
+
+    def overlap(self, query_terms: np.ndarray, chunk_ids: Sequence[int]) -> np.ndarray:
+        """
+        Count shared keywords between the query and each chunk.
+
+        Args:
+            query_terms: Term ids from query_terms()
+            chunk_ids: Chunk indices to score
+
+        Returns:
+            Overlap count per chunk, in chunk_ids order
+        """
+        chunk_ids = np.asarray(chunk_ids, dtype=np.int64)
+        starts = self.term_offsets[chunk_ids]
+        lengths = self.term_offsets[chunk_ids + 1] - starts
+        total = int(lengths.sum())
+        if total == 0 or len(query_terms) == 0:
+            return np.zeros(len(chunk_ids), dtype=np.int64)
+
+        # Gather every candidate's term ids into one flat array, then test membership once
+        segment = np.repeat(np.arange(len(chunk_ids)), lengths)
+        positions = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        matched = np.isin(self.term_ids[starts[segment] + positions], query_terms)
+
+        return np.bincount(segment, weights=matched, minlength=len(chunk_ids)).astype(np.int64)
@@ -0,0 +1,159 @@
+"""
+Per-chunk metadata stored as compact arrays, and filters over it.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class ChunkMetadata:
+    """
+    Source, page and upload time of every chunk in a session.
+
+    A chunk that stands in for near-duplicates elsewhere in the upload also
+    carries their locations as extra references, held in parallel arrays.
+    """
+
+    def __init__(
+        self,
+        source_names: List[str],
+        source_codes: np.ndarray,
+        pages: np.ndarray,
+        source_uploaded_at: np.ndarray,
+        extra_chunks: Optional[np.ndarray] = None,
+        extra_codes: Optional[np.ndarray] = None,
+        extra_pages: Optional[np.ndarray] = None
+    ):
+        """
+        Initialize chunk metadata.
+
+        Args:
+            source_names: Distinct source filenames, indexed by code
+            source_codes: int32 array with each chunk's source code
+            pages: int32 array with the 1-based page each chunk starts on
+            source_uploaded_at: float64 array of upload times (epoch seconds) per source code
+            extra_chunks: int32 array, chunk id of each extra reference
+            extra_codes: int32 array, source code of each extra reference
+            extra_pages: int32 array, page of each extra reference
+        """
+        self.source_names = source_names
+        self.source_codes = source_codes
+        self.pages = pages
+        self.source_uploaded_at = source_uploaded_at
+        empty = np.zeros(0, dtype=np.int32)
+        self.extra_chunks = empty if extra_chunks is None else extra_chunks
+        self.extra_codes = empty if extra_codes is None else extra_codes
+        self.extra_pages = empty if extra_pages is None else extra_pages
+
+    @classmethod
+    def from_store(
+        cls,
+        store,
+        pages: Sequence[int],
+        uploaded_at: float,
+        extra_references: Sequence[Tuple[int, str, int]] = ()
+    ) -> 'ChunkMetadata':
+        """
+        Build metadata sharing a ChunkStore's source codes.
+
+        Sources that only appear in extra references get codes after the
+        store's own, in a copy of its name table; the store is not modified.
+
+        Args:
+            store: ChunkStore of the session
+            pages: Page number per chunk
+            uploaded_at: Upload time in epoch seconds
+            extra_references: (chunk id, source, page) of dropped near-duplicates
+
+        Returns:
+            ChunkMetadata instance
+        """
+        names = list(store.source_names)
+        index = {name: code for code, name in enumerate(names)}
+        extra_codes = []
+        for _, source, _ in extra_references:
+            if source not in index:
+                index[source] = len(names)
+                names.append(source)
+            extra_codes.append(index[source])
+        return cls(
+            names,
+            store.source_codes,
+            np.asarray(pages, dtype=np.int32),
+            np.full(len(names), uploaded_at, dtype=np.float64),
+            np.array([c for c, _, _ in extra_references], dtype=np.int32),
+            np.array(extra_codes, dtype=np.int32),
+            np.array([p for _, _, p in extra_references], dtype=np.int32)
+        )
+
+    def __len__(self) -> int:
+        return len(self.source_codes)
+
+    def references(self, chunk_id: int) -> List[Tuple[str, int]]:
+        """
+        List every (source, page) a chunk's text appears at, its own location first.
+
+        Args:
+            chunk_id: Chunk id
+
+        Returns:
+            List of (source filename, page)
+        """
+        refs = [(self.source_names[self.source_codes[chunk_id]], int(self.pages[chunk_id]))]
+        for i in np.flatnonzero(self.extra_chunks == chunk_id):
+            refs.append((self.source_names[self.extra_codes[i]], int(self.extra_pages[i])))
+        return refs
+
+    def select(
+        self,
+        sources: Optional[List[str]] = None,
+        page_min: Optional[int] = None,
+        page_max: Optional[int] = None,
+        uploaded_after: Optional[float] = None,
+        uploaded_before: Optional[float] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Find the chunks with a reference matching every given condition.
+
+        Args:
+            sources: Keep chunks from any of these filenames
+            page_min: Keep chunks starting on this page or later
+            page_max: Keep chunks starting on this page or earlier
+            uploaded_after: Keep chunks uploaded at or after this epoch time
+            uploaded_before: Keep chunks uploaded at or before this epoch time
+
+        Returns:
+            Sorted int64 chunk ids, or None when no condition is set
+        """
+        # Conditions on sources and upload time are evaluated per source, then mapped to chunks
+        source_mask = None
+        if sources is not None:
+            wanted = set(sources)
+            source_mask = np.array([name in wanted for name in self.source_names], dtype=bool)
+        if uploaded_after is not None or uploaded_before is not None:
+            times = self.source_uploaded_at
+            time_mask = np.ones(len(times), dtype=bool)
+            if uploaded_after is not None:
+                time_mask &= times >= uploaded_after
+            if uploaded_before is not None:
+                time_mask &= times <= uploaded_before
+            source_mask = time_mask if source_mask is None else source_mask & time_mask
+
+        if source_mask is None and page_min is None and page_max is None:
+            return None
+        mask = self._match(self.source_codes, self.pages, source_mask, page_min, page_max)
+        if len(self.extra_chunks):
+            extra = self._match(self.extra_codes, self.extra_pages, source_mask, page_min, page_max)
+            mask[self.extra_chunks[extra]] = True
+        return np.flatnonzero(mask).astype(np.int64)
+
+    @staticmethod
+    def _match(codes, pages, source_mask, page_min, page_max) -> np.ndarray:
+        mask = np.ones(len(codes), dtype=bool)
+        if source_mask is not None:
+            mask &= source_mask[codes] if len(source_mask) else False
+        if page_min is not None:
+            mask &= pages >= page_min
+        if page_max is not None:
+            mask &= pages <= page_max
+        return mask
@@ -0,0 +1,197 @@
+"""
+ONNX Runtime backend for sentence embeddings, optionally int8-quantized.
+
+The SentenceTransformer's transformer is exported to ONNX once and cached on
+disk together with its tokenizer and pooling settings; later processes load
+the cached model with ONNX Runtime and the `tokenizers` library, and never
+import torch or transformers.
+"""
+import inspect
+import json
+import os
+import re
+from typing import List
+
+import numpy as np
+
+_CONFIG_FILE = 'onnx_embedding.json'
+
+
+def _cache_path(cache_dir: str, model_name: str) -> str:
+    return os.path.join(cache_dir, re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name))
+
+
+def export_model(model_name: str, path: str):
+    """
+    Export a SentenceTransformer to ONNX with dynamic batch and sequence axes.
+
+    Args:
+        model_name: SentenceTransformer identifier or local path
+        path: Output directory
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    st_model = SentenceTransformer(model_name, device='cpu')
+    transformer = st_model[0]
+    pooling = next((m for m in st_model if isinstance(m, Pooling)), None)
+    if pooling is None:
+        pooling_mode = 'mean'
+    elif hasattr(pooling, 'get_pooling_mode_str'):
+        pooling_mode = pooling.get_pooling_mode_str()
+    else:
+        pooling_mode = str(pooling.pooling_mode)
+    if pooling_mode not in ('mean', 'cls'):
+        raise ValueError(f"Unsupported pooling mode for ONNX backend: {pooling_mode}")
+
+    os.makedirs(path, exist_ok=True)
+    tokenizer = transformer.tokenizer
+    tokenizer.save_pretrained(path)
+
+    sample = tokenizer(["warm up export"], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    auto_model = transformer.auto_model.eval()
+
+    class _LastHiddenState(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    export_kwargs = {}
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        export_kwargs['dynamo'] = False
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+    with torch.no_grad():
+        torch.onnx.export(
+            _LastHiddenState(auto_model),
+            tuple(sample[name] for name in input_names),
+            os.path.join(path, 'model.onnx'),
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            **export_kwargs
+        )
+
+    with open(os.path.join(path, _CONFIG_FILE), 'w') as f:
+        json.dump({
+            'model_name': model_name,
+            'input_names': input_names,
+            'pooling_mode': pooling_mode,
+            'normalize': any(isinstance(m, Normalize) for m in st_model),
+            'max_seq_length': st_model.max_seq_length,
+            'pad_token': tokenizer.pad_token,
+            'pad_token_id': tokenizer.pad_token_id,
+            'dimension': st_model.get_sentence_embedding_dimension(),
+        }, f)
+
+
+def quantize_model(path: str):
+    """Write a dynamically int8-quantized copy of model.onnx as model.int8.onnx."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(
+        os.path.join(path, 'model.onnx'),
+        os.path.join(path, 'model.int8.onnx'),
+        weight_type=QuantType.QInt8
+    )
+
+
+class OnnxEmbeddingBackend:
+    """Drop-in replacement for SentenceTransformer.encode() running on ONNX Runtime."""
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_dir: str,
+        quantize: bool = False,
+        num_threads: int = 0
+    ):
+        """
+        Initialize ONNX backend, exporting the model on first use.
+
+        Args:
+            model_name: SentenceTransformer identifier or local path
+            cache_dir: Directory holding exported models
+            quantize: Use dynamic int8 quantization
+            num_threads: ONNX Runtime intra-op threads (0 lets it decide)
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(
+                "The ONNX embedding backend needs onnxruntime (pip install onnxruntime)"
+            ) from e
+        from tokenizers import Tokenizer
+
+        path = _cache_path(cache_dir, model_name)
+        if not os.path.exists(os.path.join(path, _CONFIG_FILE)):
+            print(f"Exporting {model_name} to ONNX in {path}...")
+            export_model(model_name, path)
+        model_file = os.path.join(path, 'model.onnx')
+        if quantize:
+            model_file = os.path.join(path, 'model.int8.onnx')
+            if not os.path.exists(model_file):
+                quantize_model(path)
+
+        with open(os.path.join(path, _CONFIG_FILE)) as f:
+            self.config = json.load(f)
+        # Fast tokenizer JSON written by save_pretrained() during export
+        self.tokenizer = Tokenizer.from_file(os.path.join(path, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(self.config['max_seq_length'])
+        self.tokenizer.enable_padding(
+            pad_id=self.config['pad_token_id'], pad_token=self.config['pad_token']
+        )
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            model_file, sess_options=options, providers=['CPUExecutionProvider']
+        )
+        self.quantized = quantize
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config['dimension']
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        if self.config['pooling_mode'] == 'cls':
+            pooled = hidden[:, 0]
+        else:
+            mask = attention_mask[..., None].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.config['normalize']:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled
+
+    def encode(self, texts: List[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """
+        Encode texts to embeddings.
+
+        Args:
+            texts: List of text strings
+            batch_size: Texts per forward pass
+
+        Returns:
+            float32 array of shape (len(texts), dimension)
+        """
+        output = np.zeros((len(texts), self.config['dimension']), dtype=np.float32)
+        # Group texts of similar length to keep padding small
+        order = np.argsort([-len(t) for t in texts], kind='stable')
+        for start in range(0, len(texts), batch_size):
+            batch_ids = order[start:start + batch_size]
+            encodings = self.tokenizer.encode_batch([texts[i] for i in batch_ids])
+            encoded = {
+                'input_ids': np.array([e.ids for e in encodings], dtype=np.int64),
+                'attention_mask': np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                'token_type_ids': np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            feeds = {name: encoded[name] for name in self.config['input_names']}
+            hidden = self.session.run(['last_hidden_state'], feeds)[0]
+            output[batch_ids] = self._pool(hidden, encoded['attention_mask'])
+        return output
@@ -2,13 +2,34 @@
 Document preprocessing and chunking module.
 """
 import re
-from typing import List, Tuple
-import pdfplumber
-import pypdf
+import time
+from bisect import bisect_right
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
 from pathlib import Path
 import tempfile
 import os
 
+from app.metrics import STAGE_LATENCY
+
+
+def extract_pages_from_pdf(file_path: str) -> List[str]:
+    """
+    Extract text from PDF file, one string per page.
+    
+    Args:
+        file_path: Path to PDF file
+        
+    Returns:
+        Extracted page texts
+        
+    Raises:
+        Exception: If the PDF is corrupt or encrypted; callers report the file as failed
+    """
+    import pdfplumber
+    
+    with pdfplumber.open(file_path) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
+
 
 def extract_text_from_pdf(file_path: str) -> str:
     """
@@ -20,14 +41,7 @@ def extract_text_from_pdf(file_path: str) -> str:
     Returns:
         Extracted text
     """
-    text = ""
-    try:
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() or ""
-    except Exception as e:
-        print(f"Error extracting PDF: {e}")
-    return text
+    return "\n".join(extract_pages_from_pdf(file_path))
 
 
 def extract_text_from_file(file_content: bytes, filename: str) -> str:
@@ -41,6 +55,20 @@ def extract_text_from_file(file_content: bytes, filename: str) -> str:
     Returns:
         Extracted text
     """
+    return "\n".join(extract_pages_from_file(file_content, filename))
+
+
+def extract_pages_from_file(file_content: bytes, filename: str) -> List[str]:
+    """
+    Extract text from uploaded file (PDF or text), one string per page.
+    
+    Args:
+        file_content: File content as bytes
+        filename: Filename to determine type
+        
+    Returns:
+        Page texts; text files are a single page, unsupported files none
+    """
     if filename.lower().endswith('.pdf'):
         # Save to temp file and read - use proper temp directory for cross-platform compatibility
         with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
@@ -48,18 +76,18 @@ def extract_text_from_file(file_content: bytes, filename: str) -> str:
             temp_file.write(file_content)
         
         try:
-            text = extract_text_from_pdf(temp_path)
+            pages = extract_pages_from_pdf(temp_path)
         finally:
             # Clean up temp file
             try:
                 os.unlink(temp_path)
             except Exception:
                 pass
-        return text
+        return pages
     elif filename.lower().endswith(('.txt', '.md')):
-        return file_content.decode('utf-8', errors='ignore')
+        return [file_content.decode('utf-8', errors='ignore')]
     else:
-        return ""
+        return []
 
 
 def clean_text(text: str) -> str:
@@ -91,10 +119,32 @@ def chunk_text(text: str, chunk_size: int = 300, overlap: int = 50) -> List[str]
     Returns:
         List of text chunks
     """
+    return [chunk for chunk, _ in chunk_text_with_offsets(text, chunk_size, overlap)]
+
+
+def chunk_text_with_offsets(
+    text: str,
+    chunk_size: int = 300,
+    overlap: int = 50
+) -> List[Tuple[str, int]]:
+    """
+    Split text into overlapping chunks, keeping each chunk's starting word offset.
+    
+    Args:
+        text: Text to chunk
+        chunk_size: Approximate words per chunk
+        overlap: Words to overlap between chunks
+        
+    Returns:
+        List of (chunk text, index of its first word in text)
+    """
     sentences = re.split(r'(?<=[.!?])\s+', text)
     chunks = []
     current_chunk = []
+    # Word offset of each sentence in current_chunk
+    current_offsets = []
     current_size = 0
+    offset = 0
     
     for sentence in sentences:
         words = sentence.split()
@@ -102,43 +152,175 @@ def chunk_text(text: str, chunk_size: int = 300, overlap: int = 50) -> List[str]
         
         if current_size + sentence_size <= chunk_size:
             current_chunk.append(sentence)
+            current_offsets.append(offset)
             current_size += sentence_size
         else:
             if current_chunk:
-                chunks.append(' '.join(current_chunk))
+                chunks.append((' '.join(current_chunk), current_offsets[0]))
                 # Keep overlap
-                current_chunk = current_chunk[-(overlap // 10):] if overlap else []
+                keep = overlap // 10 if overlap else 0
+                current_chunk = current_chunk[-keep:] if keep else []
+                current_offsets = current_offsets[-keep:] if keep else []
                 current_size = sum(len(s.split()) for s in current_chunk)
             current_chunk.append(sentence)
+            current_offsets.append(offset)
             current_size += sentence_size
+        offset += sentence_size
     
     if current_chunk:
-        chunks.append(' '.join(current_chunk))
+        chunks.append((' '.join(current_chunk), current_offsets[0]))
+    
+    return [(c.strip(), start) for c, start in chunks if c.strip()]
+
+
+class FileChunks(NamedTuple):
+    """Chunks of one uploaded file, or the error that stopped it from being processed."""
+    chunks: List[str]
+    pages: List[int]
+    error: Optional[str] = None
+    # Seconds spent in each pipeline stage, recorded by the process serving the upload
+    # since a pool worker's own metrics are never scraped
+    timings: Optional[Dict[str, float]] = None
+
+
+class PreprocessResult(NamedTuple):
+    """Chunks of a whole upload, in file order, plus the files that failed."""
+    chunks: List[str]
+    sources: List[str]
+    pages: List[int]
+    failed: List[str]
+
+
+def preprocess_file(content: bytes, filename: str) -> FileChunks:
+    """
+    Extract, clean and chunk one uploaded file, tracking the page each chunk starts on.
     
-    return [c.strip() for c in chunks if c.strip()]
+    Args:
+        content: File content as bytes
+        filename: Filename to determine type
+        
+    Returns:
+        FileChunks; pages are 1-based, text files are page 1
+    """
+    # Extract text
+    started = time.perf_counter()
+    pages = extract_pages_from_file(content, filename)
+    extracted = time.perf_counter()
+    
+    # Clean each page, then join so chunks can span page breaks. clean_text has already
+    # collapsed line breaks to spaces, so pages are joined with a space as well; the last
+    # word of a page and the first of the next never run together
+    cleaned = [clean_text(page) for page in pages]
+    text = ' '.join(page for page in cleaned if page)
+    # Word offset where each page starts in the joined text
+    page_starts = []
+    words = 0
+    for page in cleaned:
+        page_starts.append(words)
+        words += len(page.split())
+    # Split into chunks
+    chunks = chunk_text_with_offsets(text)
+    
+    timings = {'chunking': time.perf_counter() - extracted}
+    if filename.lower().endswith('.pdf'):
+        timings['pdf_extraction'] = extracted - started
+    return FileChunks(
+        [chunk for chunk, _ in chunks],
+        [bisect_right(page_starts, start) for _, start in chunks],
+        timings=timings
+    )
 
 
-def preprocess_documents(file_contents: List[Tuple[bytes, str]]) -> Tuple[List[str], List[str]]:
+def _preprocess_isolated(content: bytes, filename: str) -> FileChunks:
+    """Run preprocess_file, turning an exception into a FileChunks error."""
+    try:
+        return preprocess_file(content, filename)
+    except Exception as e:
+        return FileChunks([], [], f"{type(e).__name__}: {e}")
+
+
+def preprocess_documents(
+    file_contents: List[Tuple[bytes, str]],
+    pool=None
+) -> Tuple[List[str], List[str]]:
     """
     Preprocess multiple uploaded documents.
     
     Args:
         file_contents: List of (content, filename) tuples
+        pool: Optional PreprocessingPool to process files in parallel
         
     Returns:
         Tuple of (chunks, sources)
     """
+    chunks, sources, _ = preprocess_documents_with_pages(file_contents, pool=pool)
+    return chunks, sources
+
+
+def preprocess_documents_with_pages(
+    file_contents: List[Tuple[bytes, str]],
+    pool=None
+) -> Tuple[List[str], List[str], List[int]]:
+    """
+    Preprocess multiple uploaded documents, tracking the page each chunk starts on.
+    
+    Args:
+        file_contents: List of (content, filename) tuples
+        pool: Optional PreprocessingPool to process files in parallel
+        
+    Returns:
+        Tuple of (chunks, sources, pages); pages are 1-based, text files are page 1
+    """
+    chunks, sources, pages, _ = preprocess_uploads(file_contents, pool=pool)
+    return chunks, sources, pages
+
+
+def iter_preprocess_files(file_contents: List[Tuple[bytes, str]], pool=None) -> Iterator[FileChunks]:
+    """
+    Preprocess uploaded documents one file at a time, in input order.
+    
+    Args:
+        file_contents: List of (content, filename) tuples
+        pool: Optional PreprocessingPool to process files in parallel
+        
+    Yields:
+        FileChunks per file, with error set if it could not be processed
+    """
+    if pool is not None:
+        results = pool.iter_preprocess(file_contents)
+    else:
+        results = (_preprocess_isolated(content, filename) for content, filename in file_contents)
+    for result in results:
+        for stage, seconds in (result.timings or {}).items():
+            STAGE_LATENCY.observe(seconds, stage=stage)
+        yield result
+
+
+def preprocess_uploads(file_contents: List[Tuple[bytes, str]], pool=None) -> PreprocessResult:
+    """
+    Preprocess multiple uploaded documents; a file that fails is skipped, not fatal.
+    
+    Args:
+        file_contents: List of (content, filename) tuples
+        pool: Optional PreprocessingPool to process files in parallel
+        
+    Returns:
+        PreprocessResult with chunks in file order and the names of failed files
+    """
+    results = iter_preprocess_files(file_contents, pool=pool)
+    
     all_chunks = []
     all_sources = []
+    all_pages = []
+    failed = []
+    
+    for (_, filename), result in zip(file_contents, results):
+        if result.error is not None:
+            print(f"Error preprocessing {filename}: {result.error}")
+            failed.append(filename)
+            continue
+        all_chunks.extend(result.chunks)
+        all_sources.extend([filename] * len(result.chunks))
+        all_pages.extend(result.pages)
     
-    for content, filename in file_contents:
-        # Extract text
-        text = extract_text_from_file(content, filename)
-        # Clean text
-        text = clean_text(text)
-        # Split into chunks
-        chunks = chunk_text(text)
-        all_chunks.extend(chunks)
-        all_sources.extend([filename] * len(chunks))
-    
-    return all_chunks, all_sources
+    return PreprocessResult(all_chunks, all_sources, all_pages, failed)
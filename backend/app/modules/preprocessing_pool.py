@@ -0,0 +1,93 @@
+"""
+Multi-process document preprocessing for large uploads.
+
+Each uploaded file is extracted, cleaned and chunked by a pool of spawned
+worker processes. Results stream back in upload order, and a file that
+raises, or crashes its worker, is reported as failed without failing the
+rest of the batch.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, Tuple
+
+from app.modules.embedding_pool import default_workers
+from app.modules.preprocessing import FileChunks, preprocess_file
+
+
+class PreprocessingPool:
+    """Preprocess uploaded files in worker processes, one task per file."""
+
+    def __init__(self, workers: int = 0):
+        """
+        Initialize preprocessing pool.
+
+        Args:
+            workers: Worker processes (0 picks cpu_count - 1)
+        """
+        self.workers = workers or default_workers()
+        # Concurrent uploads can hit the same broken pool; only one may replace it
+        self._lock = threading.Lock()
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn: forking a process that already holds torch/OpenMP state can deadlock
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+        )
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """Replace the executor after a worker died, unless another thread already did."""
+        with self._lock:
+            if self._executor is broken:
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._new_executor()
+
+    def _result(
+        self,
+        future: Future,
+        executor: ProcessPoolExecutor,
+        content: bytes,
+        filename: str
+    ) -> FileChunks:
+        """Wait for one file; if its worker pool broke, retry the file alone on a fresh pool."""
+        for attempt in range(2):
+            try:
+                return future.result()
+            except BrokenProcessPool as e:
+                # Every file in flight fails when one worker crashes (e.g. in a native PDF
+                # parser), so each is retried once; the file that crashes again is the culprit
+                self._restart(executor)
+                if attempt:
+                    return FileChunks([], [], f"worker crashed: {e}")
+                executor = self._executor
+                future = executor.submit(preprocess_file, content, filename)
+            except Exception as e:
+                return FileChunks([], [], f"{type(e).__name__}: {e}")
+
+    def iter_preprocess(self, file_contents: List[Tuple[bytes, str]]) -> Iterator[FileChunks]:
+        """
+        Preprocess files in parallel, yielding one result per file in input order.
+
+        Args:
+            file_contents: List of (content, filename) tuples
+
+        Yields:
+            FileChunks per file, with error set if it could not be processed
+        """
+        executor = self._executor
+        # Every file is submitted up front; each result is yielded once it and those before it are done
+        futures = [
+            executor.submit(preprocess_file, content, filename) for content, filename in file_contents
+        ]
+        for future, (content, filename) in zip(futures, file_contents):
+            yield self._result(future, executor, content, filename)
+
+    def warm_up(self):
+        """Start every worker process before the first upload."""
+        list(self._executor.map(preprocess_file, [b""] * self.workers, ["warm-up.txt"] * self.workers))
+
+    def close(self):
+        """Shut down worker processes."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,36 +1,72 @@
 """
 Embedding and retrieval module using FAISS.
+
+sentence_transformers (torch) and faiss are imported where they are first
+needed so that importing the app stays fast.
 """
 import numpy as np
 from typing import List, Tuple, Optional
-from sentence_transformers import SentenceTransformer
-import faiss
+
+from app import config
+from app.metrics import CHUNKS_INDEXED, STAGE_LATENCY
+from app.modules.chunk_store import ChunkStore
 
 
 class EmbeddingModel:
     """Wrapper for SentenceTransformers embedding model."""
     
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+    def __init__(
+        self,
+        model_name: str = 'all-MiniLM-L6-v2',
+        backend: Optional[str] = None,
+        quantize: Optional[bool] = None,
+        num_threads: int = 0
+    ):
         """
         Initialize embedding model.
         
         Args:
             model_name: HuggingFace model identifier
+            backend: "torch" or "onnx" (defaults to RAG_EMBEDDING_BACKEND)
+            quantize: Use int8 dynamic quantization with the onnx backend
+                (defaults to RAG_EMBEDDING_QUANTIZE)
+            num_threads: CPU threads for inference (0 keeps the library default)
         """
-        self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.backend = backend or config.EMBEDDING_BACKEND
+        self.quantize = config.EMBEDDING_QUANTIZE if quantize is None else quantize
+        
+        if self.backend == 'onnx':
+            from app.modules.onnx_embedding import OnnxEmbeddingBackend
+            
+            self.model = OnnxEmbeddingBackend(
+                model_name, config.EMBEDDING_ONNX_DIR, self.quantize, num_threads
+            )
+        elif self.backend == 'torch':
+            from sentence_transformers import SentenceTransformer
+            
+            if num_threads:
+                import torch
+                
+                torch.set_num_threads(num_threads)
+            self.model = SentenceTransformer(model_name)
+        else:
+            raise ValueError(f"Unknown embedding backend: {self.backend}")
         self.dimension = self.model.get_sentence_embedding_dimension()
     
-    def encode(self, texts: List[str]) -> np.ndarray:
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
         """
         Encode texts to embeddings.
         
         Args:
             texts: List of text strings
+            batch_size: Texts per forward pass
             
         Returns:
             Numpy array of embeddings
         """
-        embeddings = self.model.encode(texts, convert_to_numpy=True)
+        with STAGE_LATENCY.time(stage='embedding'):
+            embeddings = self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
         return embeddings.astype(np.float32)
 
 
@@ -46,26 +82,141 @@ class FAISSRetriever:
         """
         self.embedding_model = embedding_model
         self.index = None
-        self.chunks = []
-        self.sources = []
+        # Read-only vector matrix searched directly when there is no FAISS index
+        # (e.g. memory-mapped from a shared session store)
+        self.vectors = None
+        # Chunk texts and sources, held once as packed arrays
+        self.store = ChunkStore.from_lists([], [])
+    
+    @property
+    def chunks(self) -> ChunkStore:
+        """Chunk texts aligned with the index."""
+        return self.store
     
-    def build_index(self, texts: List[str], sources: List[str]):
+    @property
+    def sources(self):
+        """Source filename per chunk."""
+        return self.store.sources
+    
+    def build_index(
+        self,
+        texts: List[str],
+        sources: List[str],
+        pool=None,
+        embeddings: Optional[np.ndarray] = None
+    ):
         """
         Build FAISS index from texts.
         
         Args:
             texts: List of text chunks
             sources: List of source filenames
+            pool: Optional EmbeddingPool; its blocks are added to the index
+                as they arrive, in chunk order
+            embeddings: Precomputed float32 embeddings aligned with texts
+                (e.g. from the document cache); nothing is encoded
+        """
+        self.store = ChunkStore.from_lists(texts, sources)
+        
+        import faiss
+        
+        if pool is None or embeddings is not None:
+            # Encode texts
+            if embeddings is None:
+                embeddings = self.embedding_model.encode(texts)
+            embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+            
+            # Create FAISS index
+            with STAGE_LATENCY.time(stage='index_build'):
+                self.index = faiss.IndexFlatL2(embeddings.shape[1])
+                self.index.add(embeddings)
+        else:
+            self.index = faiss.IndexFlatL2(self.embedding_model.dimension)
+            for block in pool.iter_encode(texts):
+                with STAGE_LATENCY.time(stage='index_build'):
+                    self.index.add(block)
+        CHUNKS_INDEXED.inc(len(texts))
+    
+    def load_vectors(self, vectors: np.ndarray, store: ChunkStore):
+        """
+        Serve searches from an existing embedding matrix without copying it.
+        
+        Args:
+            vectors: float32 array of shape (n, dimension), may be a memmap
+            store: ChunkStore aligned with vectors, may be memory-mapped
+        """
+        self.index = None
+        self.vectors = vectors
+        self.store = store
+    
+    def get_vectors(self) -> np.ndarray:
+        """
+        Get the indexed embedding matrix.
+        
+        Returns:
+            float32 array of shape (n, dimension)
+        """
+        if self.vectors is not None:
+            return self.vectors
+        return self.index.reconstruct_n(0, self.index.ntotal)
+    
+    def encode_query(self, query: str) -> np.ndarray:
+        """
+        Encode a query for searching.
+        
+        Args:
+            query: Query string
+            
+        Returns:
+            Query embedding of shape (1, dimension)
+        """
+        return self.embedding_model.encode([query])
+    
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        k: int = 5,
+        ids: Optional[np.ndarray] = None
+    ) -> Tuple[List[int], List[float]]:
+        """
+        Search the index with a precomputed query embedding.
+        
+        Args:
+            query_embedding: Query embedding of shape (1, dimension)
+            k: Number of results
+            ids: Restrict the search to these chunk ids (e.g. from ChunkMetadata.select)
+            
+        Returns:
+            Tuple of (chunk indices, similarities)
         """
-        self.chunks = texts
-        self.sources = sources
+        if not self.is_indexed():
+            return [], []
+        
+        k = min(k, len(self.store) if ids is None else len(ids))
+        if k == 0:
+            return [], []
+        
+        import faiss
         
-        # Encode texts
-        embeddings = self.embedding_model.encode(texts)
+        with STAGE_LATENCY.time(stage='search'):
+            if self.index is not None:
+                params = None
+                if ids is not None:
+                    # The selector is checked inside the scan, so a filtered search
+                    # costs the same as an unfiltered one
+                    params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(ids))
+                distances, indices = self.index.search(query_embedding, k, params=params)
+            elif ids is None:
+                # Brute-force L2 over the mapped matrix, same results as IndexFlatL2
+                distances, indices = faiss.knn(query_embedding, self.vectors, k)
+            else:
+                distances, positions = faiss.knn(query_embedding, self.vectors[ids], k)
+                indices = ids[positions]
         
-        # Create FAISS index
-        self.index = faiss.IndexFlatL2(embeddings.shape[1])
-        self.index.add(embeddings)
+        # Convert distances to similarities
+        similarities = [1.0 / (1.0 + d) for d in distances[0].tolist()]
+        
+        return indices[0].tolist(), similarities
     
     def retrieve(self, query: str, k: int = 5) -> Tuple[List[str], List[str], List[float]]:
         """
@@ -78,25 +229,16 @@ class FAISSRetriever:
         Returns:
             Tuple of (chunks, sources, distances)
         """
-        if self.index is None:
+        if not self.is_indexed():
             return [], [], []
         
-        # Encode query
-        query_embedding = self.embedding_model.encode([query])
-        
-        # Search
-        distances, indices = self.index.search(query_embedding, min(k, len(self.chunks)))
+        indices, similarities = self.search(self.encode_query(query), k)
         
-        # Get results
-        retrieved_chunks = [self.chunks[i] for i in indices[0]]
-        retrieved_sources = [self.sources[i] for i in indices[0]]
-        retrieved_distances = distances[0].tolist()
-        
-        # Convert distances to similarities
-        similarities = [1.0 / (1.0 + d) for d in retrieved_distances]
+        retrieved_chunks = self.store.take(indices)
+        retrieved_sources = [self.store.source(i) for i in indices]
         
         return retrieved_chunks, retrieved_sources, similarities
     
     def is_indexed(self) -> bool:
         """Check if index is built."""
-        return self.index is not None
+        return self.index is not None or self.vectors is not None
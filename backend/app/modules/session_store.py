@@ -0,0 +1,249 @@
+"""
+RAG sessions and the shared on-disk store that lets every worker process
+memory-map a session uploaded through any one of them.
+"""
+import json
+import os
+import shutil
+import threading
+import uuid
+from typing import Optional
+
+import numpy as np
+
+from app.modules.answer_cache import SemanticAnswerCache
+from app.modules.chunk_store import ChunkStore
+from app.modules.csr_graph import CSRGraph
+from app.modules.entity_table import EntityTable
+from app.modules.graph_builder import KnowledgeGraphBuilder
+from app.modules.lexical import LexicalFeatures
+from app.modules.metadata import ChunkMetadata
+from app.modules.retrieval import EmbeddingModel, FAISSRetriever
+
+# Bump when the on-disk layout changes
+STORE_FORMAT_VERSION = 10
+
+
+class RAGSession:
+    """Session object for managing uploaded documents and indices."""
+
+    def __init__(self, session_id: str, embedding_model: EmbeddingModel):
+        self.session_id = session_id
+        self.retriever = FAISSRetriever(embedding_model)
+        self.answer_cache = SemanticAnswerCache(embedding_model.dimension)
+        self.entity_table: Optional[EntityTable] = None
+        self.lexical = None
+        self.metadata: Optional[ChunkMetadata] = None
+        self.graph_builder = KnowledgeGraphBuilder()
+        # Set once entity_table and graph_builder are complete; until then the
+        # session only serves retrieval and answers
+        self.graph_ready = threading.Event()
+        # Directory of this session in the shared store, once published or loaded from it
+        self.shared_path: Optional[str] = None
+
+    @property
+    def graph_pending(self) -> bool:
+        """Whether entities and the graph are still being built."""
+        return not self.graph_ready.is_set()
+
+    @property
+    def chunks(self) -> ChunkStore:
+        """Chunk texts, owned by the retriever."""
+        return self.retriever.chunks
+
+    @property
+    def sources(self):
+        """Source filename per chunk, owned by the retriever."""
+        return self.retriever.sources
+
+
+class SessionStore:
+    """Publish sessions to a shared directory and map them read-only."""
+
+    def __init__(self, directory: str):
+        """
+        Initialize session store.
+
+        Args:
+            directory: Shared directory, ideally on tmpfs such as /dev/shm
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id: str) -> Optional[str]:
+        try:
+            session_id = str(uuid.UUID(session_id))
+        except (ValueError, TypeError):
+            return None
+        return os.path.join(self.directory, session_id)
+
+    def exists(self, session_id: str) -> bool:
+        path = self._path(session_id)
+        return path is not None and os.path.exists(os.path.join(path, 'meta.json'))
+
+    def publish(self, session: RAGSession):
+        """
+        Write a session's artifacts and make them visible atomically.
+
+        A session whose graph is still being built is published without it, so other
+        workers can search it at once; publish_graph() adds the graph when it is ready.
+
+        Args:
+            session: Session with its index, metadata and lexical features built
+        """
+        final_path = self._path(session.session_id)
+        tmp_path = f"{final_path}.tmp-{os.getpid()}"
+        os.makedirs(tmp_path, exist_ok=True)
+
+        retriever = session.retriever
+        np.save(os.path.join(tmp_path, 'vectors.npy'),
+                np.ascontiguousarray(retriever.get_vectors(), dtype=np.float32))
+        # Also holds the source codes that the metadata shares
+        retriever.store.save(tmp_path)
+        metadata = session.metadata
+        np.save(os.path.join(tmp_path, 'pages.npy'), metadata.pages)
+        np.save(os.path.join(tmp_path, 'extra_chunks.npy'), metadata.extra_chunks)
+        np.save(os.path.join(tmp_path, 'extra_codes.npy'), metadata.extra_codes)
+        np.save(os.path.join(tmp_path, 'extra_pages.npy'), metadata.extra_pages)
+
+        lexical = session.lexical
+        np.save(os.path.join(tmp_path, 'term_ids.npy'), lexical.term_ids)
+        np.save(os.path.join(tmp_path, 'term_offsets.npy'), lexical.term_offsets)
+        np.save(os.path.join(tmp_path, 'answer_ends.npy'), lexical.answer_ends)
+
+        with open(os.path.join(tmp_path, 'session.json'), 'w') as f:
+            json.dump({
+                # The store's source names, then those only extra references use
+                'source_names': metadata.source_names,
+                'source_uploaded_at': metadata.source_uploaded_at.tolist(),
+                'vocabulary': lexical.vocabulary,
+            }, f)
+        if not session.graph_pending:
+            os.makedirs(os.path.join(tmp_path, 'graph'))
+            self._write_graph(session, os.path.join(tmp_path, 'graph'))
+
+        # meta.json marks the session complete; the rename makes it visible at once
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump({
+                'version': STORE_FORMAT_VERSION,
+                'session_id': session.session_id,
+                'chunks': len(retriever.store),
+                'dimension': int(retriever.get_vectors().shape[1]),
+            }, f)
+        os.replace(tmp_path, final_path)
+        # The publishing worker, too, must notice when another worker clears the session
+        session.shared_path = final_path
+
+    def publish_graph(self, session: RAGSession):
+        """
+        Add the finished graph to a session published while it was pending.
+
+        Args:
+            session: Published session whose graph is now ready
+
+        Raises:
+            FileNotFoundError: If the session was cleared meanwhile
+        """
+        tmp_path = os.path.join(session.shared_path, f"graph.tmp-{os.getpid()}")
+        # mkdir rather than makedirs, so a cleared session is not recreated
+        os.mkdir(tmp_path)
+        self._write_graph(session, tmp_path)
+        os.replace(tmp_path, os.path.join(session.shared_path, 'graph'))
+
+    def _write_graph(self, session: RAGSession, path: str):
+        graph = session.graph_builder.to_csr()
+        for name in ('node_type', 'node_source_chunk', 'edge_src', 'edge_dst', 'edge_weight',
+                     'edge_relation', 'indptr', 'indices', 'adjacent_edges'):
+            np.save(os.path.join(path, f"{name}.npy"), getattr(graph, name))
+        np.save(os.path.join(path, 'node_score.npy'), session.graph_builder.node_scores)
+        session.entity_table.save(path)
+        with open(os.path.join(path, 'graph.json'), 'w') as f:
+            json.dump({
+                'nodes': graph.node_names,
+                'node_types': graph.type_names,
+                'relations': graph.relation_names,
+            }, f)
+
+    def load(self, session_id: str, embedding_model: EmbeddingModel) -> Optional[RAGSession]:
+        """
+        Map a published session read-only.
+
+        Args:
+            session_id: Session id
+            embedding_model: Query embedding model of this process
+
+        Returns:
+            RAGSession backed by the shared files, or None if not published. Its
+            graph is pending if the uploading worker has not published it yet.
+        """
+        if not self.exists(session_id):
+            return None
+        path = self._path(session_id)
+
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('version') != STORE_FORMAT_VERSION:
+            return None
+        with open(os.path.join(path, 'session.json')) as f:
+            data = json.load(f)
+
+        def mapped(name: str) -> np.ndarray:
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+
+        session = RAGSession(meta['session_id'], embedding_model)
+        session.shared_path = path
+        store = ChunkStore.load(path)
+        session.retriever.load_vectors(mapped('vectors'), store)
+        session.metadata = ChunkMetadata(
+            data['source_names'], store.source_codes, mapped('pages'),
+            np.array(data['source_uploaded_at'], dtype=np.float64),
+            mapped('extra_chunks'), mapped('extra_codes'), mapped('extra_pages')
+        )
+        session.lexical = LexicalFeatures(
+            data['vocabulary'], mapped('term_ids'), mapped('term_offsets'), mapped('answer_ends')
+        )
+        self.load_graph(session)
+        return session
+
+    def load_graph(self, session: RAGSession) -> bool:
+        """
+        Map a session's graph once its uploading worker has published it.
+
+        Args:
+            session: Session loaded from the store with its graph pending
+
+        Returns:
+            Whether the graph was published and is now loaded
+        """
+        path = os.path.join(session.shared_path, 'graph')
+        try:
+            with open(os.path.join(path, 'graph.json')) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+
+        def mapped(name: str) -> np.ndarray:
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+
+        builder = KnowledgeGraphBuilder()
+        builder.load_csr(CSRGraph(
+            data['nodes'], mapped('node_type'), data['node_types'], mapped('node_source_chunk'),
+            mapped('edge_src'), mapped('edge_dst'), mapped('edge_weight'), mapped('edge_relation'),
+            data['relations'], (mapped('indptr'), mapped('indices'), mapped('adjacent_edges'))
+        ), scores=mapped('node_score'))
+        session.entity_table = EntityTable.load(path)
+        session.graph_builder = builder
+        session.graph_ready.set()
+        return True
+
+    def is_live(self, session: RAGSession) -> bool:
+        """Check that a published session has not been cleared since, by any worker."""
+        return session.shared_path is None or os.path.exists(session.shared_path)
+
+    def delete(self, session_id: str) -> bool:
+        """Remove a published session; returns whether it existed."""
+        path = self._path(session_id)
+        if path is None or not os.path.exists(path):
+            return False
+        shutil.rmtree(path, ignore_errors=True)
+        return True
@@ -0,0 +1,280 @@
+"""
+Opt-in sampling profiler for individual requests.
+
+A profiled request's samples are limited to the event loop thread while the
+request's own task is running on it, plus threadpool threads while they run
+work dispatched for it through run_in_threadpool() below, so concurrent
+requests do not leak into each other's profiles.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Set
+
+from starlette.concurrency import run_in_threadpool as _run_in_threadpool
+
+# Leaf frames in these files mean the thread is parked, not doing work
+_IDLE_FILES = ('threading.py', 'selectors.py', 'queue.py', 'base_events.py')
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+# Profiler of the request being handled in the current context, if it is profiled
+_request_profiler: ContextVar[Optional["SamplingProfiler"]] = ContextVar('request_profiler', default=None)
+
+
+class SamplingProfiler:
+    """Periodically sample the Python stacks of threads into folded-stack counts."""
+
+    def __init__(self, interval: float = 0.005, task: Optional[asyncio.Task] = None):
+        """
+        Initialize profiler.
+
+        Args:
+            interval: Seconds between samples
+            task: Request task to profile. If set, the event loop thread is only sampled
+                while this task runs on it, and other threads only inside track_thread();
+                otherwise every thread is sampled
+        """
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._task = task
+        self._loop = task.get_loop() if task is not None else None
+        self._loop_thread = threading.get_ident() if task is not None else None
+        self._tracked: Set[int] = set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @contextmanager
+    def track_thread(self):
+        """Sample the calling thread for the duration of the with-block."""
+        ident = threading.get_ident()
+        self._tracked.add(ident)
+        try:
+            yield
+        finally:
+            self._tracked.discard(ident)
+
+    def _wanted(self, ident: int) -> bool:
+        if self._task is None:
+            return True
+        if ident == self._loop_thread:
+            # Other requests' coroutines share the loop thread
+            return asyncio.current_task(self._loop) is self._task
+        return ident in self._tracked
+
+    def _sample(self):
+        own_ident = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident or not self._wanted(ident):
+                continue
+            if os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+                continue
+            labels: List[str] = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(names.get(ident, str(ident)))
+            self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="rag-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        """
+        Stop sampling.
+
+        Returns:
+            Folded stacks ("frame;frame;frame count" per line), as consumed by
+            flamegraph.pl, speedscope and inferno
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Bounded store of finished profiles, optionally mirrored to disk."""
+
+    def __init__(self, max_profiles: int = 50, directory: Optional[str] = None):
+        """
+        Initialize profile store.
+
+        Args:
+            max_profiles: Profiles kept in memory before the oldest is dropped
+            directory: If set, each profile is also written to <directory>/<id>.folded
+        """
+        self.max_profiles = max_profiles
+        self.directory = directory
+        self.profiles: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def add(
+        self,
+        method: str,
+        path: str,
+        duration: float,
+        samples: int,
+        folded: str,
+        profile_id: Optional[str] = None
+    ) -> str:
+        """
+        Store a profile.
+
+        Returns:
+            Profile id
+        """
+        profile_id = profile_id or uuid.uuid4().hex
+        record = {
+            'id': profile_id,
+            'method': method,
+            'path': path,
+            'created': time.time(),
+            'duration_s': duration,
+            'samples': samples,
+            'folded': folded,
+        }
+        with self._lock:
+            self.profiles[profile_id] = record
+            while len(self.profiles) > self.max_profiles:
+                self.profiles.popitem(last=False)
+        if self.directory:
+            with open(os.path.join(self.directory, f"{profile_id}.folded"), 'w') as f:
+                f.write(folded)
+        return profile_id
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        with self._lock:
+            record = self.profiles.get(profile_id)
+        if record is None and self.directory:
+            path = os.path.join(self.directory, f"{os.path.basename(profile_id)}.folded")
+            if os.path.exists(path):
+                with open(path) as f:
+                    record = {'id': profile_id, 'folded': f.read()}
+        return record
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {key: value for key, value in record.items() if key != 'folded'}
+                for record in self.profiles.values()
+            ]
+
+
+async def run_in_threadpool(func: Callable, *args, **kwargs):
+    """
+    Starlette's run_in_threadpool, sampling the worker thread if the request is profiled.
+
+    Args:
+        func: Blocking function to run
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        func's return value
+    """
+    profiler = _request_profiler.get()
+    if profiler is None:
+        return await _run_in_threadpool(func, *args, **kwargs)
+
+    def tracked():
+        with profiler.track_thread():
+            return func(*args, **kwargs)
+
+    return await _run_in_threadpool(tracked)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling selected requests from arrival until their response is sent.
+
+    Written against raw ASGI rather than as an HTTP middleware function so that the
+    endpoint runs in the same task as the middleware, which is the task the profiler
+    follows on the event loop thread.
+    """
+
+    def __init__(
+        self,
+        app,
+        store: ProfileStore,
+        paths: tuple,
+        wanted: Callable[[Dict], bool],
+        interval: float = 0.005
+    ):
+        """
+        Initialize middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            store: Where finished profiles are kept
+            paths: Request paths that may be profiled
+            wanted: Called with the ASGI scope; whether to profile this request
+            interval: Seconds between samples
+        """
+        self.app = app
+        self.store = store
+        self.paths = paths
+        self.wanted = wanted
+        self.interval = interval
+        # One request is profiled at a time, which bounds the sampling overhead
+        self._lock = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if (scope['type'] != 'http' or scope['path'] not in self.paths
+                or not self.wanted(scope) or not self._lock.acquire(blocking=False)):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        profiler = SamplingProfiler(self.interval, task=asyncio.current_task())
+        token = _request_profiler.set(profiler)
+        start = time.perf_counter()
+        finished = False
+
+        def finish():
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            folded = profiler.stop()
+            self._lock.release()
+            self.store.add(
+                scope['method'], scope['path'], time.perf_counter() - start,
+                profiler.samples, folded, profile_id=profile_id
+            )
+
+        async def send_with_profile_id(message):
+            if message['type'] == 'http.response.start':
+                headers = list(message.get('headers', [])) + [(b'x-profile-id', profile_id.encode())]
+                message = {**message, 'headers': headers}
+            await send(message)
+            # Background tasks that run after the response are not part of the profile
+            if message['type'] == 'http.response.body' and not message.get('more_body', False):
+                finish()
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            finish()
+            _request_profiler.reset(token)
@@ -0,0 +1,80 @@
+"""
+Compare two benchmark result files.
+
+Usage (from the backend directory):
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.10
+
+Exits with status 1 when any stage's median regresses by more than the threshold.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Tuple
+
+
+def _medians(report: Dict) -> Dict[Tuple[str, int, str], float]:
+    return {
+        (result['format'], result['scale'], stage): timing['median']
+        for result in report['results']
+        for stage, timing in result['stages'].items()
+    }
+
+
+def compare(baseline: Dict, candidate: Dict, threshold: float) -> List[Dict]:
+    """
+    Compare stage medians present in both reports.
+
+    Args:
+        baseline: Report produced by benchmarks.run
+        candidate: Report produced by benchmarks.run
+        threshold: Relative slowdown that counts as a regression
+
+    Returns:
+        One row per (format, scale, stage) with both medians and the ratio
+    """
+    base = _medians(baseline)
+    cand = _medians(candidate)
+    rows = []
+    for key in sorted(base.keys() & cand.keys()):
+        ratio = cand[key] / base[key] if base[key] > 0 else float('inf')
+        rows.append({
+            'format': key[0],
+            'scale': key[1],
+            'stage': key[2],
+            'baseline': base[key],
+            'candidate': cand[key],
+            'ratio': ratio,
+            'regression': ratio > 1.0 + threshold,
+        })
+    return rows
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Allowed relative slowdown before flagging a regression")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    rows = compare(baseline, candidate, args.threshold)
+    print(f"baseline  {baseline['meta']['commit'][:12]}")
+    print(f"candidate {candidate['meta']['commit'][:12]}")
+    print(f"{'format':<6} {'scale':>7} {'stage':<22} {'base (s)':>10} {'cand (s)':>10} {'ratio':>7}")
+    for row in rows:
+        flag = "  REGRESSION" if row['regression'] else ""
+        print(
+            f"{row['format']:<6} {row['scale']:>7} {row['stage']:<22} "
+            f"{row['baseline']:>10.4f} {row['candidate']:>10.4f} {row['ratio']:>7.2f}{flag}"
+        )
+
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Deterministic synthetic corpus generator for benchmarks.
+"""
+import random
+from typing import List, Tuple
+
+# Words per chunk that are new after chunk_text()'s sentence overlap
+_NEW_WORDS_PER_CHUNK = 240
+
+_FIRST_NAMES = ["Alice", "Bruno", "Chen", "Dana", "Emil", "Farah", "Goran", "Hana", "Ivan", "Julia"]
+_LAST_NAMES = ["Smith", "Novak", "Okafor", "Tanaka", "Weber", "Silva", "Kowalski", "Haddad"]
+_ORGS = ["Acme", "Globex", "Initech", "Umbrella", "Stark", "Wayne", "Hooli", "Vandelay", "Tyrell"]
+_ORG_SUFFIXES = ["Corp", "Labs", "Systems", "Group", "Industries"]
+_PLACES = ["Paris", "Lagos", "Osaka", "Berlin", "Lima", "Toronto", "Nairobi", "Oslo", "Denver"]
+_VERBS = ["acquired", "founded", "audited", "partnered with", "reviewed", "funded", "hired"]
+_NOUNS = [
+    "pipeline", "contract", "dataset", "prototype", "report", "budget", "reactor", "network",
+    "warehouse", "protocol", "satellite", "vaccine", "turbine", "platform", "ledger", "sensor",
+]
+_ADJECTIVES = [
+    "quarterly", "experimental", "regional", "secure", "distributed", "annual", "modular",
+    "legacy", "autonomous", "critical", "open", "hybrid",
+]
+
+
+class SyntheticCorpus:
+    """Reproducible text generator with a controllable entity vocabulary."""
+
+    def __init__(self, seed: int = 0):
+        """
+        Initialize corpus generator.
+
+        Args:
+            seed: Random seed; the same seed always yields the same documents
+        """
+        self.rng = random.Random(seed)
+
+    def _person(self) -> str:
+        return f"{self.rng.choice(_FIRST_NAMES)} {self.rng.choice(_LAST_NAMES)}"
+
+    def _org(self) -> str:
+        return f"{self.rng.choice(_ORGS)} {self.rng.choice(_ORG_SUFFIXES)}"
+
+    def sentence(self) -> str:
+        """Generate one sentence mentioning two or three entities."""
+        rng = self.rng
+        template = rng.randrange(3)
+        if template == 0:
+            return (
+                f"{self._person()} {rng.choice(_VERBS)} {self._org()} "
+                f"after the {rng.choice(_ADJECTIVES)} {rng.choice(_NOUNS)} review in "
+                f"{rng.choice(_PLACES)}."
+            )
+        if template == 1:
+            return (
+                f"The {rng.choice(_ADJECTIVES)} {rng.choice(_NOUNS)} built by {self._org()} "
+                f"was moved to {rng.choice(_PLACES)} for the {rng.choice(_NOUNS)} team."
+            )
+        return (
+            f"According to {self._person()}, the {rng.choice(_NOUNS)} and the "
+            f"{rng.choice(_ADJECTIVES)} {rng.choice(_NOUNS)} remain under review."
+        )
+
+    def document(self, num_words: int) -> str:
+        """
+        Generate a document of roughly num_words words.
+
+        Args:
+            num_words: Target word count
+
+        Returns:
+            Document text
+        """
+        sentences = []
+        words = 0
+        while words < num_words:
+            sentence = self.sentence()
+            sentences.append(sentence)
+            words += len(sentence.split())
+        return " ".join(sentences)
+
+    def text_files(self, num_chunks: int, num_files: int = 1) -> List[Tuple[bytes, str]]:
+        """
+        Generate .txt uploads that chunk to roughly num_chunks chunks.
+
+        Args:
+            num_chunks: Target total chunk count
+            num_files: Number of files to spread the text over
+
+        Returns:
+            List of (content, filename) tuples as passed to preprocess_documents
+        """
+        per_file = max(1, num_chunks // num_files)
+        return [
+            (self.document(per_file * _NEW_WORDS_PER_CHUNK).encode('utf-8'), f"doc_{i:05d}.txt")
+            for i in range(num_files)
+        ]
+
+    def pdf_files(
+        self,
+        num_chunks: int,
+        num_files: int = 1,
+        words_per_page: int = 400
+    ) -> List[Tuple[bytes, str]]:
+        """
+        Generate .pdf uploads that chunk to roughly num_chunks chunks.
+
+        Args:
+            num_chunks: Target total chunk count
+            num_files: Number of files to spread the text over
+            words_per_page: Approximate words placed on each page
+
+        Returns:
+            List of (content, filename) tuples as passed to preprocess_documents
+        """
+        per_file = max(1, num_chunks // num_files)
+        files = []
+        for i in range(num_files):
+            pages = []
+            remaining = per_file * _NEW_WORDS_PER_CHUNK
+            while remaining > 0:
+                page = self.document(min(words_per_page, remaining))
+                pages.append(page)
+                remaining -= len(page.split())
+            files.append((make_pdf(pages), f"doc_{i:05d}.pdf"))
+        return files
+
+
+def _wrap(text: str, width: int = 90) -> List[str]:
+    """Break text into lines of at most width characters."""
+    lines, current = [], ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines
+
+
+def make_pdf(pages: List[str]) -> bytes:
+    """
+    Build a minimal multi-page PDF with one Helvetica text block per page.
+
+    Args:
+        pages: Text of each page (ASCII)
+
+    Returns:
+        PDF file content
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages object, filled in once page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for text in pages:
+        escaped = [
+            line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            for line in _wrap(text)
+        ]
+        stream = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({line}) '" for line in escaped) + " ET"
+        stream_bytes = stream.encode('latin-1')
+        objects.append(
+            b"<< /Length %d >>\nstream\n" % len(stream_bytes) + stream_bytes + b"\nendstream"
+        )
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, xref_offset
+    )
+    return bytes(out)
@@ -0,0 +1,136 @@
+"""
+Compare embedding backends: throughput, vector drift and retrieval agreement.
+
+Encodes the same synthetic corpus with the torch backend (the reference) and
+each ONNX variant, then reports texts/second, the cosine similarity between
+each variant's vectors and the reference, and how much of the reference top-k
+each variant retrieves for a set of queries.
+
+Usage (from the backend directory):
+    python -m benchmarks.embedding_backends --chunks 2000 --output backends.json
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.modules.retrieval import EmbeddingModel
+from benchmarks.corpus import SyntheticCorpus
+
+VARIANTS = {
+    'torch': {'backend': 'torch', 'quantize': False},
+    'onnx': {'backend': 'onnx', 'quantize': False},
+    'onnx-int8': {'backend': 'onnx', 'quantize': True},
+}
+
+
+def top_k_agreement(reference: np.ndarray, candidate: np.ndarray, k: int) -> float:
+    """
+    Mean fraction of the reference top-k ids that also appear in the candidate top-k.
+
+    Args:
+        reference: (queries, chunks) similarity matrix from the reference backend
+        candidate: Same-shaped similarity matrix from the backend under test
+        k: Neighbours per query
+
+    Returns:
+        Agreement in [0, 1]
+    """
+    k = min(k, reference.shape[1])
+    ref_ids = np.argsort(-reference, axis=1)[:, :k]
+    cand_ids = np.argsort(-candidate, axis=1)[:, :k]
+    overlaps = [len(set(r) & set(c)) / k for r, c in zip(ref_ids, cand_ids)]
+    return float(np.mean(overlaps)) if overlaps else 1.0
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def run(model_name: str, variants: List[str], chunks: List[str], queries: List[str], k: int) -> Dict:
+    """
+    Encode chunks and queries with each variant and compare to the first one.
+
+    Args:
+        model_name: SentenceTransformer identifier or local path
+        variants: Variant names from VARIANTS; the first is the reference
+        chunks: Texts to encode
+        queries: Queries for the top-k agreement check
+        k: Neighbours per query
+
+    Returns:
+        Dict keyed by variant with load time, throughput, drift and agreement
+    """
+    results = {}
+    reference = None
+    for name in variants:
+        start = time.perf_counter()
+        model = EmbeddingModel(model_name, **VARIANTS[name])
+        load_s = time.perf_counter() - start
+        # One small call so lazy initialisation is not counted as throughput
+        model.encode(chunks[:8])
+
+        start = time.perf_counter()
+        chunk_vectors = _normalize(model.encode(chunks))
+        encode_s = time.perf_counter() - start
+        query_vectors = _normalize(model.encode(queries))
+        similarities = query_vectors @ chunk_vectors.T
+
+        entry = {
+            'load_s': load_s,
+            'encode_s': encode_s,
+            'texts_per_second': len(chunks) / encode_s if encode_s else 0.0,
+        }
+        if reference is None:
+            reference = (chunk_vectors, similarities)
+        else:
+            cosine = np.sum(chunk_vectors * reference[0], axis=1)
+            entry.update({
+                'cosine_mean': float(cosine.mean()),
+                'cosine_min': float(cosine.min()),
+                f'top{k}_agreement': top_k_agreement(reference[1], similarities, k),
+            })
+        results[name] = entry
+    return results
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Compare embedding backends")
+    parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    parser.add_argument('--variants', default='torch,onnx,onnx-int8',
+                        help=f"Comma-separated, reference first ({', '.join(VARIANTS)})")
+    parser.add_argument('--chunks', type=int, default=1000)
+    parser.add_argument('--words', type=int, default=300, help="Words per chunk")
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='-', help="JSON output path, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    variants = [v for v in args.variants.split(',') if v]
+    unknown = [v for v in variants if v not in VARIANTS]
+    if unknown:
+        parser.error(f"Unknown variants: {', '.join(unknown)}")
+
+    corpus = SyntheticCorpus(args.seed)
+    chunks = [corpus.document(args.words) for _ in range(args.chunks)]
+    queries = [corpus.sentence() for _ in range(args.queries)]
+
+    payload = json.dumps({
+        'model': args.model,
+        'chunks': args.chunks,
+        'words_per_chunk': args.words,
+        'reference': variants[0],
+        'results': run(args.model, variants, chunks, queries, args.top_k),
+    }, indent=2)
+    if args.output == '-':
+        print(payload)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Local OpenAI-compatible chat completions stub for offline load tests.
+
+Usage (from the backend directory):
+    python -m benchmarks.fake_llm --port 8100 --latency 0.3 --tokens-per-second 50
+
+Point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:8100/v1 and any
+non-empty OPENAI_API_KEY.
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+_FILLER = (
+    "Based on the provided documents the answer is supported by the retrieved context "
+    "and the entities mentioned in it"
+).split()
+
+
+class FakeLLMServer:
+    """Threaded HTTP server answering /v1/chat/completions with canned text."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.2,
+        tokens_per_second: float = 50.0,
+        completion_tokens: int = 60
+    ):
+        """
+        Initialize fake LLM server.
+
+        Args:
+            host: Bind address
+            port: Bind port (0 picks a free port)
+            latency: Fixed delay before the first token, in seconds
+            tokens_per_second: Simulated generation speed
+            completion_tokens: Tokens per answer, capped by the request's max_tokens
+        """
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.httpd.server_address[:2]
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.address
+        return f"http://{host}:{port}/v1"
+
+    def _completion(self, body: dict) -> dict:
+        max_tokens = body.get('max_tokens') or self.completion_tokens
+        n_tokens = min(self.completion_tokens, max_tokens)
+        prompt_tokens = sum(len(str(m.get('content', '')).split()) for m in body.get('messages', []))
+
+        delay = self.latency + (n_tokens / self.tokens_per_second if self.tokens_per_second else 0)
+        time.sleep(delay)
+        with self._lock:
+            self.requests += 1
+
+        text = " ".join(_FILLER[i % len(_FILLER)] for i in range(n_tokens)) + "."
+        return {
+            'id': f"chatcmpl-{uuid.uuid4().hex}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'fake-llm'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': text},
+                'finish_reason': 'stop',
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': n_tokens,
+                'total_tokens': prompt_tokens + n_tokens,
+            },
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.rstrip('/').endswith('/chat/completions'):
+                    self.send_error(404)
+                    return
+                payload = json.dumps(server._completion(body)).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeLLMServer":
+        """Serve in a daemon thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Shut the server down."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible LLM server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8100)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--tokens-per-second', type=float, default=50.0)
+    parser.add_argument('--completion-tokens', type=int, default=60)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(
+        args.host, args.port, args.latency, args.tokens_per_second, args.completion_tokens
+    )
+    print(f"Fake LLM listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
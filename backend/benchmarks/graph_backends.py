@@ -0,0 +1,173 @@
+"""
+Compare graph backends: build time, memory and traversal speed.
+
+Builds the same synthetic co-occurrence graph with the NetworkX and CSR
+backends of KnowledgeGraphBuilder, then reports the memory retained by the
+graph, neighbour lookups and two-hop expansions per second, the time to
+serialize every relationship, and the time to produce a capped per-query
+payload (build time includes centrality ranking).
+
+Usage (from the backend directory):
+    python -m benchmarks.graph_backends --entities 20000 --chunks 20000 --output graphs.json
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app import config
+from app.modules.csr_graph import CSRGraph
+from app.modules.graph_builder import KnowledgeGraphBuilder
+
+BACKENDS = ('networkx', 'csr')
+
+
+def cooccurrence_input(
+    num_entities: int,
+    num_chunks: int,
+    per_chunk: int,
+    seed: int = 0
+) -> Tuple[List[Dict], Dict[int, List[Dict]]]:
+    """
+    Generate entities and a chunk -> entities map with Zipf-like popularity.
+
+    Args:
+        num_entities: Distinct entity names
+        num_chunks: Chunks in the map
+        per_chunk: Entities drawn per chunk (before removing repeats)
+        seed: Random seed
+
+    Returns:
+        Tuple of (entities, entity_chunk_map) as passed to build_graph
+    """
+    rng = np.random.default_rng(seed)
+    names = [f"Entity {i}" for i in range(num_entities)]
+    popularity = 1.0 / np.arange(1, num_entities + 1)
+    popularity /= popularity.sum()
+    entity_chunk_map = {}
+    for chunk in range(num_chunks):
+        drawn = dict.fromkeys(rng.choice(num_entities, size=per_chunk, p=popularity).tolist())
+        entity_chunk_map[chunk] = [{'name': names[i], 'type': 'ORG'} for i in drawn]
+    entities = [{'name': name, 'type': 'ORG', 'source_chunk_id': 0} for name in names]
+    return entities, entity_chunk_map
+
+
+def _neighbours(graph, node: str) -> List[str]:
+    if isinstance(graph, CSRGraph):
+        return graph.neighbor_ids(graph.node_id(node))
+    return list(graph.neighbors(node))
+
+
+def _two_hop(graph, node: str) -> int:
+    if isinstance(graph, CSRGraph):
+        return len(graph.neighborhood(np.array([graph.node_id(node)]), hops=2))
+    reached = {node}
+    frontier = [node]
+    for _ in range(2):
+        frontier = [m for n in frontier for m in graph.neighbors(n) if m not in reached]
+        reached.update(frontier)
+    return len(reached)
+
+
+def run(entities: List[Dict], entity_chunk_map: Dict, probes: int, seed: int = 0) -> Dict:
+    """
+    Build the graph with each backend and time the same operations.
+
+    Args:
+        entities: Entity dicts
+        entity_chunk_map: Chunk index -> entity dicts
+        probes: Nodes sampled for neighbour and two-hop lookups
+        seed: Seed for the probe sample
+
+    Returns:
+        Dict keyed by backend
+    """
+    rng = np.random.default_rng(seed)
+    probe_names = [entities[i]['name'] for i in rng.choice(len(entities), size=probes)]
+    results = {}
+    for backend in BACKENDS:
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        builder = KnowledgeGraphBuilder(backend=backend)
+        builder.nlp = None
+        builder.build_graph(entities, entity_chunk_map, [])
+        build_s = time.perf_counter() - start
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        graph = builder.graph
+
+        start = time.perf_counter()
+        for name in probe_names:
+            _neighbours(graph, name)
+        neighbours_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for name in probe_names:
+            _two_hop(graph, name)
+        two_hop_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        relationships = builder.get_relationships()
+        serialize_s = time.perf_counter() - start
+
+        # Per-query payload with the default caps (first call selects, later ones hit the cache)
+        start = time.perf_counter()
+        capped = builder.get_graph_data(config.GRAPH_MAX_NODES, config.GRAPH_MAX_EDGES)
+        capped_s = time.perf_counter() - start
+        start = time.perf_counter()
+        builder.get_graph_data(config.GRAPH_MAX_NODES, config.GRAPH_MAX_EDGES)
+        capped_cached_s = time.perf_counter() - start
+
+        results[backend] = {
+            'nodes': graph.number_of_nodes(),
+            'edges': graph.number_of_edges(),
+            'build_s': build_s,
+            'retained_mb': retained / 1e6,
+            'peak_build_mb': peak / 1e6,
+            'bytes_per_edge': retained / max(1, graph.number_of_edges()),
+            'neighbour_lookups_per_s': probes / neighbours_s if neighbours_s else 0.0,
+            'two_hop_per_s': probes / two_hop_s if two_hop_s else 0.0,
+            'relationships_s': serialize_s,
+            'relationships': len(relationships),
+            'capped_graph_data_s': capped_s,
+            'capped_graph_data_cached_s': capped_cached_s,
+            'capped_edges': len(capped['edges']),
+        }
+        del builder, graph, relationships
+    return results
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Compare graph backends")
+    parser.add_argument('--entities', type=int, default=20000)
+    parser.add_argument('--chunks', type=int, default=20000)
+    parser.add_argument('--per-chunk', type=int, default=12, help="Entities drawn per chunk")
+    parser.add_argument('--probes', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='-', help="JSON output path, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    entities, entity_chunk_map = cooccurrence_input(
+        args.entities, args.chunks, args.per_chunk, args.seed
+    )
+    payload = json.dumps({
+        'entities': args.entities,
+        'chunks': args.chunks,
+        'per_chunk': args.per_chunk,
+        'results': run(entities, entity_chunk_map, args.probes, args.seed),
+    }, indent=2)
+    if args.output == '-':
+        print(payload)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Offline HTTP load test for the FastAPI app.
+
+Starts a fake OpenAI-compatible LLM (benchmarks.fake_llm), launches the app
+under uvicorn pointed at it, and drives open-loop mixed /upload and /query
+traffic at a target request rate.
+
+Usage (from the backend directory):
+    python -m benchmarks.loadtest --rate 50 --duration 30 --upload-fraction 0.05
+
+The embedding model must already be in the local HuggingFace cache; the app is
+started with HF_HUB_OFFLINE=1 so nothing is fetched over the network.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.corpus import SyntheticCorpus
+from benchmarks.fake_llm import FakeLLMServer
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(
+    latencies: Dict[str, List[float]],
+    errors: Dict[str, int],
+    elapsed: float,
+    rejected: Dict[str, int] = None
+) -> Dict:
+    """
+    Build the per-endpoint report.
+
+    Args:
+        latencies: Successful request latencies in seconds, per endpoint
+        errors: Failed request counts per endpoint
+        elapsed: Wall-clock duration of the run
+        rejected: Requests turned away by admission control (429/503) per endpoint
+
+    Returns:
+        Dict keyed by endpoint with throughput and latency percentiles (ms)
+    """
+    rejected = rejected or {}
+    report = {}
+    for endpoint in sorted(set(latencies) | set(errors)):
+        values = sorted(latencies.get(endpoint, []))
+        report[endpoint] = {
+            'requests': len(values) + errors.get(endpoint, 0) + rejected.get(endpoint, 0),
+            'errors': errors.get(endpoint, 0),
+            'rejected': rejected.get(endpoint, 0),
+            'throughput_rps': len(values) / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(values, 50) * 1000,
+            'p95_ms': percentile(values, 95) * 1000,
+            'p99_ms': percentile(values, 99) * 1000,
+            'max_ms': (values[-1] if values else 0.0) * 1000,
+        }
+    return report
+
+
+def start_app(app_path: str, port: int, workers: int, llm_base_url: str) -> subprocess.Popen:
+    """Launch uvicorn serving the app against the fake LLM."""
+    env = dict(os.environ)
+    env.update({
+        'OPENAI_API_KEY': 'sk-loadtest',
+        'OPENAI_BASE_URL': llm_base_url,
+        'HF_HUB_OFFLINE': '1',
+        'TRANSFORMERS_OFFLINE': '1',
+    })
+    cmd = [
+        sys.executable, '-m', 'uvicorn', app_path,
+        '--host', '127.0.0.1', '--port', str(port),
+        '--workers', str(workers), '--log-level', 'warning',
+    ]
+    return subprocess.Popen(cmd, cwd=str(BACKEND_DIR), env=env)
+
+
+def wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 120.0):
+    """Poll /ready until model warm-up has finished."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError("App did not become ready in time")
+
+
+async def drive(base_url: str, args) -> Dict:
+    """Send open-loop traffic and collect latencies."""
+    rng = random.Random(args.seed)
+    corpus = SyntheticCorpus(args.seed)
+    uploads = [corpus.text_files(args.upload_chunks, 1) for _ in range(4)]
+    queries = [corpus.sentence() for _ in range(256)]
+
+    latencies: Dict[str, List[float]] = {'/upload': [], '/query': []}
+    errors: Dict[str, int] = {'/upload': 0, '/query': 0}
+    rejected: Dict[str, int] = {'/upload': 0, '/query': 0}
+    index_ids: List[str] = []
+
+    limits = httpx.Limits(max_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+
+        async def upload():
+            content, filename = rng.choice(uploads)[0]
+            response = await client.post('/upload', files=[('files', (filename, content))])
+            response.raise_for_status()
+            index_ids.append(response.json()['index_id'])
+
+        async def query():
+            response = await client.post('/query', json={
+                'query': rng.choice(queries),
+                'index_id': rng.choice(index_ids),
+                'top_k': args.top_k,
+            })
+            response.raise_for_status()
+
+        async def fire(endpoint: str, fn):
+            start = time.perf_counter()
+            try:
+                await fn()
+                latencies[endpoint].append(time.perf_counter() - start)
+            except httpx.HTTPStatusError as e:
+                # Admission control shedding load is counted apart from failures
+                if e.response.status_code in (429, 503):
+                    rejected[endpoint] += 1
+                else:
+                    errors[endpoint] += 1
+            except Exception:
+                errors[endpoint] += 1
+
+        # Seed a session so queries have something to hit
+        await upload()
+
+        loop = asyncio.get_running_loop()
+        tasks = []
+        start = loop.time()
+        sent = 0
+        while loop.time() - start < args.duration:
+            delay = start + sent / args.rate - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if rng.random() < args.upload_fraction:
+                tasks.append(asyncio.create_task(fire('/upload', upload)))
+            else:
+                tasks.append(asyncio.create_task(fire('/query', query)))
+            sent += 1
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - start
+
+    return {
+        'sent': sent,
+        'elapsed_s': elapsed,
+        'offered_rps': args.rate,
+        'endpoints': summarize(latencies, errors, elapsed, rejected),
+    }
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Offline load test for the RAG API")
+    parser.add_argument('--rate', type=float, default=20.0, help="Requests per second, all endpoints")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds of traffic")
+    parser.add_argument('--upload-fraction', type=float, default=0.05)
+    parser.add_argument('--upload-chunks', type=int, default=50, help="Chunks per uploaded file")
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument('--llm-latency', type=float, default=0.3)
+    parser.add_argument('--llm-tokens-per-second', type=float, default=50.0)
+    parser.add_argument('--max-connections', type=int, default=256)
+    parser.add_argument('--timeout', type=float, default=120.0)
+    parser.add_argument('--app', default='app.main:app', help="ASGI app import path")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='-', help="JSON output path, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    llm = FakeLLMServer(latency=args.llm_latency, tokens_per_second=args.llm_tokens_per_second)
+    llm.start()
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    process = start_app(args.app, port, args.workers, llm.base_url)
+    try:
+        wait_ready(base_url, process)
+        result = asyncio.run(drive(base_url, args))
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        llm.stop()
+
+    result['llm_requests'] = llm.requests
+    result['config'] = vars(args)
+    payload = json.dumps(result, indent=2)
+    if args.output == '-':
+        print(payload)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(payload)
+
+
+if __name__ == "__main__":
+    main()
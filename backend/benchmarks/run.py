@@ -0,0 +1,229 @@
+"""
+Per-stage pipeline benchmarks.
+
+Usage (from the backend directory):
+    python -m benchmarks.run --scales 10,1000,10000 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from functools import partial
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.corpus import SyntheticCorpus
+
+QUERIES = [
+    "Who acquired Globex Systems?",
+    "What was moved to Oslo?",
+    "Which team reviewed the quarterly budget?",
+]
+
+
+def time_call(fn: Callable, repeat: int) -> Tuple[Dict[str, float], object]:
+    """
+    Time a callable several times.
+
+    Args:
+        fn: Zero-argument callable
+        repeat: Number of runs
+
+    Returns:
+        Tuple of (timing summary in seconds, result of the last run)
+    """
+    runs = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    return {
+        'runs': runs,
+        'min': min(runs),
+        'median': statistics.median(runs),
+        'mean': statistics.fmean(runs),
+    }, result
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def bench_scale(
+    embedding_model,
+    num_chunks: int,
+    file_format: str,
+    num_files: int,
+    repeat: int,
+    seed: int,
+    pool=None,
+    preprocessing_pool=None
+) -> Dict:
+    """
+    Benchmark every pipeline stage and the HTTP flows at one corpus size.
+
+    Args:
+        embedding_model: Shared EmbeddingModel instance
+        num_chunks: Target corpus size in chunks
+        file_format: 'txt' or 'pdf'
+        num_files: Number of uploaded files
+        repeat: Runs per stage
+        seed: Corpus seed
+        pool: Optional EmbeddingPool, adds the embedding_encode_pool stage
+        preprocessing_pool: Optional PreprocessingPool, adds the preprocess_documents_pool stage
+
+    Returns:
+        Result record for this scale
+    """
+    from fastapi.testclient import TestClient
+
+    from app import main
+    from app.modules.entity_extraction import EntityExtractor
+    from app.modules.graph_builder import KnowledgeGraphBuilder
+    from app.modules.preprocessing import preprocess_documents
+    from app.modules.retrieval import FAISSRetriever
+
+    corpus = SyntheticCorpus(seed)
+    if file_format == 'pdf':
+        files = corpus.pdf_files(num_chunks, num_files)
+    else:
+        files = corpus.text_files(num_chunks, num_files)
+
+    stages = {}
+    stages['preprocess_documents'], (chunks, sources) = time_call(
+        lambda: preprocess_documents(files), repeat
+    )
+    if preprocessing_pool is not None:
+        stages['preprocess_documents_pool'], _ = time_call(
+            lambda: preprocess_documents(files, pool=preprocessing_pool), repeat
+        )
+    stages['embedding_encode'], _ = time_call(lambda: embedding_model.encode(chunks), repeat)
+    if pool is not None:
+        stages['embedding_encode_pool'], _ = time_call(lambda: pool.encode(chunks), repeat)
+
+    retriever = FAISSRetriever(embedding_model)
+    stages['build_index'], _ = time_call(lambda: retriever.build_index(chunks, sources), repeat)
+    stages['retrieve'], _ = time_call(
+        lambda: [retriever.retrieve(q, k=5) for q in QUERIES], repeat
+    )
+
+    extractor = EntityExtractor()
+    stages['extract_from_chunks'], table = time_call(
+        lambda: extractor.extract_table(chunks), repeat
+    )
+    builder = KnowledgeGraphBuilder()
+    stages['build_graph'], _ = time_call(
+        lambda: builder.build_graph_from_table(table, chunks), repeat
+    )
+
+    # End-to-end HTTP flows, sharing the already loaded embedding model
+    main.embedding_model = embedding_model
+    client = TestClient(main.app)
+    upload_files = [('files', (name, content)) for content, name in files]
+    index_ids = []
+
+    def upload():
+        response = client.post('/upload', files=upload_files)
+        response.raise_for_status()
+        index_ids.append(response.json()['index_id'])
+
+    def query():
+        for q in QUERIES:
+            response = client.post('/query', json={'query': q, 'index_id': index_ids[-1]})
+            response.raise_for_status()
+
+    stages['http_upload'], _ = time_call(upload, repeat)
+    stages['http_query'], _ = time_call(query, repeat)
+    for index_id in index_ids:
+        client.post('/clear', params={'index_id': index_id})
+
+    return {
+        'scale': num_chunks,
+        'format': file_format,
+        'files': num_files,
+        'chunks': len(chunks),
+        'entities': len(table),
+        'queries_per_run': len(QUERIES),
+        'stages': stages,
+    }
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark RAG pipeline stages")
+    parser.add_argument('--scales', default='10,100,1000',
+                        help="Comma-separated target chunk counts (10 to 100000)")
+    parser.add_argument('--formats', default='txt', help="Comma-separated: txt,pdf")
+    parser.add_argument('--files', type=int, default=4, help="Files per upload")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per stage")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--embedding-workers', type=int, default=0,
+                        help="Also time bulk encoding with this many worker processes")
+    parser.add_argument('--preprocess-workers', type=int, default=0,
+                        help="Also time preprocessing with this many worker processes")
+    parser.add_argument('--output', default='-', help="JSON output path, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    from app.modules.embedding_pool import EmbeddingPool
+    from app.modules.preprocessing_pool import PreprocessingPool
+    from app.modules.retrieval import EmbeddingModel
+
+    embedding_model = EmbeddingModel()
+    pool = None
+    if args.embedding_workers > 0:
+        pool = EmbeddingPool(
+            partial(EmbeddingModel, embedding_model.model_name, backend=embedding_model.backend,
+                    quantize=embedding_model.quantize, num_threads=1),
+            workers=args.embedding_workers
+        )
+        pool.warm_up()
+    preprocessing_pool = None
+    if args.preprocess_workers > 0:
+        preprocessing_pool = PreprocessingPool(workers=args.preprocess_workers)
+        preprocessing_pool.warm_up()
+    results = []
+    for file_format in args.formats.split(','):
+        for scale in (int(s) for s in args.scales.split(',')):
+            print(f"Benchmarking {scale} chunks ({file_format})...", file=sys.stderr)
+            results.append(bench_scale(
+                embedding_model, scale, file_format, args.files, args.repeat, args.seed, pool,
+                preprocessing_pool
+            ))
+    for worker_pool in (pool, preprocessing_pool):
+        if worker_pool is not None:
+            worker_pool.close()
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'embedding_workers': args.embedding_workers,
+            'preprocess_workers': args.preprocess_workers,
+        },
+        'results': results,
+    }
+
+    payload = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(payload)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(payload)
+
+
+if __name__ == "__main__":
+    main()
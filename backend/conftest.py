@@ -4,8 +4,31 @@ pytest configuration file.
 import sys
 from pathlib import Path
 
+import numpy as np
+import pytest
+
 # Add backend to path
 backend_path = Path(__file__).parent
 sys.path.insert(0, str(backend_path))
 
 pytest_plugins = []
+
+
+class HashingEmbeddingModel:
+    """Deterministic bag-of-words embedder so tests don't need a model download."""
+    dimension = 16
+    model_name = 'hashing-test'
+    backend = 'hashing'
+    quantize = False
+
+    def encode(self, texts, **kwargs):
+        out = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                out[i, sum(map(ord, word)) % self.dimension] += 1.0
+        return out
+
+
+@pytest.fixture
+def hashing_embedding_model():
+    return HashingEmbeddingModel()
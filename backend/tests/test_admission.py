@@ -0,0 +1,241 @@
+"""
+Unit tests for admission control and backpressure.
+"""
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app import config, main
+from app.admission import AdmissionController, AdmissionRejected
+
+
+async def hold(controller, started, finish):
+    async with controller.slot():
+        started.append(True)
+        await finish.wait()
+
+
+class TestAdmissionController:
+    def test_limits_concurrency_and_queues_in_order(self):
+        controller = AdmissionController("test", max_concurrent=2, max_queue=4)
+        order = []
+
+        async def request(i, finish):
+            async with controller.slot():
+                order.append(i)
+                assert controller.active <= 2
+                await finish.wait()
+
+        async def run():
+            finishes = [asyncio.Event() for _ in range(5)]
+            tasks = [asyncio.create_task(request(i, finishes[i])) for i in range(5)]
+            await asyncio.sleep(0)
+            assert order == [0, 1]
+            assert controller.stats()['queue_depth'] == 3
+            for finish in finishes:
+                finish.set()
+                await asyncio.sleep(0)
+            await asyncio.gather(*tasks)
+
+        asyncio.run(run())
+        assert order == [0, 1, 2, 3, 4]
+        stats = controller.stats()
+        assert stats['in_flight'] == 0 and stats['queue_depth'] == 0
+        assert stats['admitted'] == 5
+
+    def test_full_queue_rejects_immediately(self):
+        controller = AdmissionController("test", max_concurrent=1, max_queue=1)
+
+        async def run():
+            started, finish = [], asyncio.Event()
+            holder = asyncio.create_task(hold(controller, started, finish))
+            queued = asyncio.create_task(hold(controller, started, finish))
+            await asyncio.sleep(0)
+            with pytest.raises(AdmissionRejected) as rejected:
+                await controller.acquire()
+            finish.set()
+            await asyncio.gather(holder, queued)
+            return rejected.value
+
+        rejected = asyncio.run(run())
+        assert rejected.status_code == 429
+        assert rejected.reason == 'queue_full'
+        assert rejected.retry_after >= 1
+        assert controller.stats()['rejected_queue_full'] == 1
+        assert controller.stats()['admitted'] == 2
+
+    def test_queue_timeout(self):
+        controller = AdmissionController("test", max_concurrent=1, max_queue=4, queue_timeout=0.01)
+
+        async def run():
+            started, finish = [], asyncio.Event()
+            holder = asyncio.create_task(hold(controller, started, finish))
+            await asyncio.sleep(0)
+            with pytest.raises(AdmissionRejected) as rejected:
+                await controller.acquire()
+            finish.set()
+            await holder
+            return rejected.value
+
+        assert asyncio.run(run()).status_code == 503
+        stats = controller.stats()
+        assert stats['rejected_timeout'] == 1
+        assert stats['in_flight'] == 0 and stats['queue_depth'] == 0
+
+    def test_slot_handed_over_as_wait_times_out(self, monkeypatch):
+        controller = AdmissionController("test", max_concurrent=1, max_queue=4, queue_timeout=1.0)
+
+        async def racing_wait_for(waiter, timeout):
+            # The holder releases in the same loop iteration as the timeout fires
+            controller.release()
+            assert waiter.done()
+            raise asyncio.TimeoutError
+
+        async def run():
+            await controller.acquire()
+            monkeypatch.setattr(asyncio, 'wait_for', racing_wait_for)
+            with pytest.raises(AdmissionRejected) as rejected:
+                await controller.acquire()
+            return rejected.value
+
+        assert asyncio.run(run()).status_code == 503
+        stats = controller.stats()
+        assert stats['in_flight'] == 0 and stats['queue_depth'] == 0
+
+    def test_cancelled_waiter_gives_up_its_place(self):
+        controller = AdmissionController("test", max_concurrent=1, max_queue=4)
+
+        async def run():
+            started, finish = [], asyncio.Event()
+            holder = asyncio.create_task(hold(controller, started, finish))
+            waiter = asyncio.create_task(controller.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.sleep(0)
+            finish.set()
+            await holder
+
+        asyncio.run(run())
+        assert controller.stats()['in_flight'] == 0
+
+    def test_retry_after_scales_with_queue(self):
+        controller = AdmissionController("test", max_concurrent=2, max_queue=8)
+        controller.service_time = 3.0
+        assert controller.retry_after() == 2
+        assert AdmissionController("off", 0, 0).enabled is False
+
+
+@pytest.fixture
+def client(monkeypatch, hashing_embedding_model):
+    monkeypatch.setattr(config, 'WARMUP_ENABLED', False)
+    monkeypatch.setattr(main, 'embedding_model', hashing_embedding_model)
+    with TestClient(main.app) as client:
+        yield client
+
+
+def saturate(monkeypatch, name, max_queue, queue_timeout=None):
+    """Replace an endpoint class's controller with one whose only slot is taken."""
+    controller = AdmissionController(name, max_concurrent=1, max_queue=max_queue, queue_timeout=queue_timeout)
+    controller.active = 1
+    monkeypatch.setitem(main.admission, name, controller)
+    return controller
+
+
+class TestAdmissionApi:
+    def test_upload_rejected_with_retry_after(self, client, monkeypatch):
+        saturate(monkeypatch, 'upload', max_queue=0)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("rejected upload was processed")
+
+        monkeypatch.setattr(main, 'preprocess_uploads', fail)
+        response = client.post('/upload', files=[('files', ('a.txt', b"Alice works at Acme."))])
+
+        assert response.status_code == 429
+        assert int(response.headers['retry-after']) >= 1
+
+    def test_query_times_out_in_queue(self, client, monkeypatch):
+        saturate(monkeypatch, 'query', max_queue=4, queue_timeout=0.01)
+        response = client.post('/query', json={'query': 'Who?', 'index_id': 'missing'})
+
+        assert response.status_code == 503
+        assert 'retry-after' in response.headers
+
+    def test_rejections_are_exposed(self, client, monkeypatch):
+        saturate(monkeypatch, 'query', max_queue=0)
+        assert client.post('/debug/retrieve', json={'query': 'Who?', 'index_id': 'x'}).status_code == 429
+
+        stats = client.get('/admission/stats').json()
+        assert stats['query']['rejected_queue_full'] == 1
+        assert stats['query']['in_flight'] == 1
+        metrics = client.get('/metrics').text
+        assert 'rag_admission_rejections_total{endpoint="query",reason="queue_full"}' in metrics
+
+    def test_admitted_requests_release_their_slot(self, client):
+        response = client.post('/query', json={'query': 'Who?', 'index_id': 'missing'})
+
+        assert response.status_code == 404
+        assert main.admission['query'].stats()['in_flight'] == 0
+
+    def test_requests_are_answered_while_an_upload_runs(self, client, monkeypatch):
+        saturate(monkeypatch, 'upload', max_queue=0).active = 0
+        preprocess_uploads = main.preprocess_uploads
+        finished = {}
+
+        def slow_preprocess(*args, **kwargs):
+            time.sleep(0.5)
+            finished['preprocessing'] = time.perf_counter()
+            return preprocess_uploads(*args, **kwargs)
+
+        monkeypatch.setattr(main, 'preprocess_uploads', slow_preprocess)
+        files = [('files', ('a.txt', b"Alice Smith works at Acme Corp in Paris."))]
+
+        async def timed(name, request):
+            response = await request
+            finished[name] = time.perf_counter()
+            return response
+
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                first = asyncio.create_task(timed('first', http.post('/upload', files=files)))
+                # Let the first upload get into its blocking preprocessing
+                await asyncio.sleep(0.1)
+                second = await timed('second', http.post('/upload', files=files))
+                status = await timed('status', http.get('/status'))
+                return await first, second, status
+
+        first, second, status = asyncio.run(run())
+        assert first.status_code == 200
+        assert second.status_code == 429
+        assert status.status_code == 200
+        # Both were answered while the first upload was still preprocessing
+        assert finished['second'] < finished['preprocessing']
+        assert finished['status'] < finished['preprocessing']
+
+    def test_background_graph_builds_are_limited(self, client, monkeypatch):
+        monkeypatch.setitem(main.admission, 'graph_build', AdmissionController('graph_build', 1, None))
+        running, overlap = [], []
+
+        def slow_finish(*args):
+            running.append(True)
+            overlap.append(len(running))
+            time.sleep(0.2)
+            running.pop()
+
+        monkeypatch.setattr(main, 'finish_session', slow_finish)
+        files = [('files', ('a.txt', b"Alice Smith works at Acme Corp in Paris."))]
+
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return await asyncio.gather(*(http.post('/upload', files=files) for _ in range(3)))
+
+        responses = asyncio.run(run())
+        assert [r.status_code for r in responses] == [200, 200, 200]
+        assert overlap == [1, 1, 1]
+        stats = main.admission['graph_build'].stats()
+        assert stats['admitted'] == 3 and stats['in_flight'] == 0
+        assert stats['max_queue'] is None
@@ -0,0 +1,47 @@
+"""
+Unit tests for semantic answer cache.
+"""
+import pytest
+import numpy as np
+from app.modules.answer_cache import SemanticAnswerCache
+
+
+def _vector(seed, dimension=16):
+    return np.random.RandomState(seed).rand(1, dimension).astype(np.float32)
+
+
+class TestSemanticAnswerCache:
+    @pytest.fixture
+    def cache(self):
+        return SemanticAnswerCache(16, threshold=0.95, max_entries=2)
+
+    def test_hit_on_near_duplicate_query(self, cache):
+        query = _vector(0)
+        cache.store(query, [3, 1], "cached answer")
+
+        assert cache.lookup(query * 1.01, [1, 3]) == "cached answer"
+        assert cache.stats()['hits'] == 1
+
+    def test_miss_on_different_chunks(self, cache):
+        query = _vector(0)
+        cache.store(query, [1, 2], "cached answer")
+
+        assert cache.lookup(query, [1, 4]) is None
+        assert cache.stats()['misses'] == 1
+
+    def test_miss_below_threshold(self, cache):
+        cache.store(_vector(0), [1], "cached answer")
+
+        assert cache.lookup(-_vector(0), [1]) is None
+
+    def test_lru_eviction(self, cache):
+        cache.store(_vector(0), [0], "first")
+        cache.store(_vector(1), [1], "second")
+        cache.lookup(_vector(0), [0])
+        cache.store(_vector(2), [2], "third")
+
+        stats = cache.stats()
+        assert stats['entries'] == 2
+        assert stats['evictions'] == 1
+        assert cache.lookup(_vector(1), [1]) is None
+        assert cache.lookup(_vector(0), [0]) == "first"
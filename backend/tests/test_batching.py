@@ -0,0 +1,85 @@
+"""
+Unit tests for query embedding micro-batching.
+"""
+import asyncio
+import pytest
+import numpy as np
+from app.modules.batching import QueryEmbeddingBatcher
+
+
+class RecordingEncoder:
+    """Encoder that records the batches it was called with."""
+
+    def __init__(self, model):
+        self.model = model
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return self.model.encode(texts)
+
+
+@pytest.fixture
+def encoder(hashing_embedding_model):
+    return RecordingEncoder(hashing_embedding_model)
+
+
+class TestQueryEmbeddingBatcher:
+    def test_concurrent_requests_share_one_batch(self, encoder, hashing_embedding_model):
+        batcher = QueryEmbeddingBatcher(encoder, window_ms=50, max_batch_size=32)
+        queries = [f"who founded company {i}" for i in range(10)]
+
+        async def run():
+            return await asyncio.gather(*(batcher.encode(q) for q in queries))
+
+        results = asyncio.run(run())
+
+        assert len(encoder.calls) == 1
+        assert encoder.calls[0] == queries
+        for query, embedding in zip(queries, results):
+            assert embedding.shape == (1, hashing_embedding_model.dimension)
+            np.testing.assert_array_equal(embedding, hashing_embedding_model.encode([query]))
+        assert batcher.stats()['mean_batch_size'] == 10
+
+    def test_max_batch_size_flushes_early(self, encoder):
+        batcher = QueryEmbeddingBatcher(encoder, window_ms=10000, max_batch_size=4)
+
+        async def run():
+            return await asyncio.wait_for(
+                asyncio.gather(*(batcher.encode(f"query {i}") for i in range(8))), timeout=5
+            )
+
+        asyncio.run(run())
+
+        assert [len(call) for call in encoder.calls] == [4, 4]
+
+    def test_single_request_waits_for_window_only(self, encoder):
+        batcher = QueryEmbeddingBatcher(encoder, window_ms=5, max_batch_size=32)
+
+        async def run():
+            return await asyncio.wait_for(batcher.encode("lonely query"), timeout=2)
+
+        assert asyncio.run(run()).shape[0] == 1
+        assert encoder.calls == [["lonely query"]]
+
+    def test_errors_reach_every_caller(self):
+        def failing(texts):
+            raise RuntimeError("model failed")
+
+        batcher = QueryEmbeddingBatcher(failing, window_ms=5)
+
+        async def run():
+            return await asyncio.gather(
+                batcher.encode("a"), batcher.encode("b"), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    def test_new_event_loop_starts_new_batch(self, encoder):
+        batcher = QueryEmbeddingBatcher(encoder, window_ms=5)
+
+        asyncio.run(batcher.encode("first"))
+        asyncio.run(batcher.encode("second"))
+
+        assert encoder.calls == [["first"], ["second"]]
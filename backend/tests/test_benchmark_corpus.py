@@ -0,0 +1,23 @@
+"""
+Unit tests for the synthetic benchmark corpus.
+"""
+import pytest
+from benchmarks.corpus import SyntheticCorpus
+from app.modules.preprocessing import extract_text_from_file, preprocess_documents
+
+
+class TestSyntheticCorpus:
+    def test_deterministic(self):
+        assert SyntheticCorpus(7).text_files(20, 2) == SyntheticCorpus(7).text_files(20, 2)
+        assert SyntheticCorpus(7).text_files(20) != SyntheticCorpus(8).text_files(20)
+
+    def test_text_scale(self):
+        chunks, sources = preprocess_documents(SyntheticCorpus(0).text_files(50, 5))
+        assert 40 <= len(chunks) <= 60
+        assert len(set(sources)) == 5
+
+    def test_pdf_extractable(self):
+        content, filename = SyntheticCorpus(0).pdf_files(2)[0]
+        text = extract_text_from_file(content, filename)
+        assert filename.endswith('.pdf')
+        assert len(text.split()) > 100
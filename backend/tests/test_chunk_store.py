@@ -0,0 +1,73 @@
+"""
+Unit tests for the compact chunk store.
+"""
+import pytest
+import numpy as np
+from app.modules.chunk_store import ChunkStore
+from app.modules.metadata import ChunkMetadata
+
+
+CHUNKS = [
+    "Alice Smith works at Acme Corp in Paris.",
+    "",
+    "Überraschung: Carol Davis moved to Oslo.",
+    "Bob Jones founded Globex in Berlin.",
+]
+SOURCES = ["a.pdf", "a.pdf", "b.txt", "a.pdf"]
+
+
+@pytest.fixture
+def store():
+    return ChunkStore.from_lists(CHUNKS, SOURCES)
+
+
+class TestChunkStore:
+    def test_round_trip(self, store):
+        assert len(store) == 4
+        assert list(store) == CHUNKS
+        assert store[-1] == CHUNKS[-1]
+        assert store.take([2, 0]) == [CHUNKS[2], CHUNKS[0]]
+        with pytest.raises(IndexError):
+            store[4]
+
+    def test_sources_are_coded(self, store):
+        assert store.source_names == ["a.pdf", "b.txt"]
+        assert store.source_codes.dtype == np.int32
+        assert store.source_codes.tolist() == [0, 0, 1, 0]
+        assert list(store.sources) == SOURCES
+        assert store.source(2) == "b.txt"
+
+    def test_get_bytes_is_a_view(self, store):
+        view = store.get_bytes(2)
+        assert bytes(view).decode('utf-8') == CHUNKS[2]
+        assert np.shares_memory(np.asarray(view), store.buffer)
+
+    def test_single_buffer(self, store):
+        assert store.buffer.dtype == np.uint8
+        assert store.buffer.nbytes == sum(len(c.encode('utf-8')) for c in CHUNKS)
+        assert store.nbytes < sum(len(c) for c in CHUNKS) + 100
+
+    def test_save_and_mmap(self, store, tmp_path):
+        store.save(str(tmp_path))
+        loaded = ChunkStore.load(str(tmp_path))
+
+        assert isinstance(loaded.buffer, np.memmap)
+        assert list(loaded) == CHUNKS
+        assert list(loaded.sources) == SOURCES
+
+    def test_empty(self, tmp_path):
+        store = ChunkStore.from_lists([], [])
+        store.save(str(tmp_path))
+        assert len(ChunkStore.load(str(tmp_path))) == 0
+
+    def test_length_mismatch(self):
+        with pytest.raises(ValueError):
+            ChunkStore.from_lists(["a", "b"], ["a.txt"])
+
+    def test_metadata_shares_source_table(self, store):
+        metadata = ChunkMetadata.from_store(store, [1, 1, 1, 2], 1000.0, [(0, "c.txt", 3)])
+
+        assert metadata.source_codes is store.source_codes
+        assert metadata.source_names == ["a.pdf", "b.txt", "c.txt"]
+        assert store.source_names == ["a.pdf", "b.txt"]
+        assert metadata.references(0) == [("a.pdf", 1), ("c.txt", 3)]
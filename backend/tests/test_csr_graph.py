@@ -0,0 +1,160 @@
+"""
+Unit tests for the CSR graph backend.
+"""
+import pytest
+import networkx as nx
+import numpy as np
+from app.modules.csr_graph import CSRGraph, CSRGraphBuilder, degree_centrality, pagerank
+from app.modules.graph_builder import KnowledgeGraphBuilder
+
+
+ENTITIES = [
+    {'name': 'Alice', 'type': 'PERSON', 'source_chunk_id': 0},
+    {'name': 'Acme', 'type': 'ORG', 'source_chunk_id': 0},
+    {'name': 'Paris', 'type': 'GPE', 'source_chunk_id': 0},
+    {'name': 'Bob', 'type': 'PERSON', 'source_chunk_id': 1},
+    {'name': 'Acme', 'type': 'ORG', 'source_chunk_id': 1},
+]
+ENTITY_CHUNK_MAP = {
+    0: [{'name': 'Alice'}, {'name': 'Acme'}, {'name': 'Paris'}],
+    1: [{'name': 'Bob'}, {'name': 'Acme'}, {'name': 'Paris'}],
+    2: [{'name': 'Paris'}, {'name': 'Bob'}],
+}
+CHUNKS = ["Alice works at Acme in Paris.", "Bob joined Acme in Paris.", "Paris welcomed Bob."]
+
+
+def build(backend):
+    builder = KnowledgeGraphBuilder(backend=backend)
+    builder.nlp = None
+    builder.build_graph(ENTITIES, ENTITY_CHUNK_MAP, CHUNKS)
+    return builder
+
+
+class TestCSRGraph:
+    def test_same_output_as_networkx(self):
+        reference, compact = build('networkx'), build('csr')
+
+        assert isinstance(compact.graph, CSRGraph)
+        assert compact.get_graph_data() == reference.get_graph_data()
+        assert compact.get_relationships() == reference.get_relationships()
+
+    def test_adjacency(self):
+        graph = build('csr').graph
+
+        assert graph.number_of_nodes() == 4
+        assert graph.number_of_edges() == 5
+        assert sorted(graph.neighbors('Paris')) == ['Acme', 'Alice', 'Bob']
+        assert graph.degrees().tolist() == [2, 3, 3, 2]
+        assert 'Bob' in graph and 'Carol' not in graph
+
+    def test_neighborhood(self):
+        builder = CSRGraphBuilder()
+        for u, v in [('a', 'b'), ('b', 'c'), ('c', 'd'), ('x', 'y')]:
+            builder.add_edge(u, v)
+        graph = builder.build()
+        ids = [graph.node_id(n) for n in 'abcd']
+
+        assert graph.neighborhood(np.array([ids[0]]), hops=1).tolist() == ids[:2]
+        assert graph.neighborhood(np.array([ids[0]]), hops=2).tolist() == ids[:3]
+        assert sorted(graph.gather_neighbors(np.array([ids[1], ids[2]])).tolist()) == \
+            sorted([ids[0], ids[2], ids[1], ids[3]])
+
+    def test_overwrites_and_self_loops_match_networkx(self):
+        reference = nx.Graph()
+        builder = CSRGraphBuilder()
+        calls = [
+            ('edge', 'a', 'b', 'r1', 1.0),
+            ('edge', 'c', 'a', 'r2', 1.0),
+            ('edge', 'b', 'a', 'r3', 2.0),
+            ('edge', 'c', 'c', 'r4', 1.0),
+            ('node', 'b', 'ORG', 3),
+        ]
+        for kind, *args in calls:
+            if kind == 'edge':
+                u, v, relation, weight = args
+                reference.add_edge(u, v, relation=relation, weight=weight)
+                builder.add_edge(u, v, relation=relation, weight=weight)
+            else:
+                name, node_type, chunk = args
+                reference.add_node(name, type=node_type, source_chunk=chunk)
+                builder.add_node(name, type=node_type, source_chunk=chunk)
+        graph = builder.build()
+
+        assert list(graph.edges()) == [
+            (u, v, d['relation'], d['weight']) for u, v, d in reference.edges(data=True)
+        ]
+        assert sorted(graph.neighbors('c')) == ['a', 'c']
+        assert graph.degrees().tolist() == [2, 1, 2]
+
+    def test_networkx_round_trip(self):
+        reference = build('networkx')
+        restored = KnowledgeGraphBuilder(backend='networkx')
+        restored.load_csr(CSRGraph.from_networkx(reference.graph))
+
+        assert restored.get_graph_data() == reference.get_graph_data()
+        assert dict(restored.graph.nodes(data=True)) == dict(reference.graph.nodes(data=True))
+
+    def test_precomputed_adjacency(self):
+        graph = build('csr').graph
+        copy = CSRGraph(
+            graph.node_names, graph.node_type, graph.type_names, graph.node_source_chunk,
+            graph.edge_src, graph.edge_dst, graph.edge_weight, graph.edge_relation,
+            graph.relation_names, (graph.indptr, graph.indices, graph.adjacent_edges)
+        )
+        assert copy.indptr is graph.indptr
+        assert np.array_equal(copy.neighbor_ids(2), graph.neighbor_ids(2))
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            KnowledgeGraphBuilder(backend='igraph')
+
+
+class TestCentrality:
+    def test_pagerank_matches_networkx(self):
+        reference = build('networkx').graph
+        reference.add_edge('Alice', 'Bob', relation='knows', weight=2.0)
+        reference.add_node('Loner', type='PERSON', source_chunk=2)
+        graph = CSRGraph.from_networkx(reference)
+
+        expected = nx.pagerank(reference, weight='weight')
+        scores = pagerank(graph)
+        assert scores.tolist() == pytest.approx([expected[n] for n in graph.node_names], abs=1e-5)
+
+    def test_degree_centrality(self):
+        graph = build('csr').graph
+        assert degree_centrality(graph).tolist() == pytest.approx([2 / 3, 1.0, 1.0, 2 / 3])
+
+    def test_top_subgraph(self):
+        graph = build('csr').graph
+        scores = np.array([0.1, 0.4, 0.3, 0.2], dtype=np.float32)
+        nodes, edges = graph.top_subgraph(scores, max_nodes=3)
+
+        assert [graph.node_names[i] for i in nodes] == ['Acme', 'Paris', 'Bob']
+        assert all(graph.edge_src[e] in nodes and graph.edge_dst[e] in nodes for e in edges)
+        assert len(edges) == 3
+        assert len(graph.top_subgraph(scores, max_nodes=3, max_edges=1)[1]) == 1
+
+
+class TestCappedPayload:
+    @pytest.mark.parametrize('backend', ['networkx', 'csr'])
+    def test_caps_bound_output(self, backend):
+        builder = build(backend)
+        data = builder.get_graph_data(max_nodes=2, max_edges=5)
+        ids = {n['id'] for n in data['nodes']}
+
+        assert len(data['nodes']) == 2
+        assert len(data['edges']) <= 5
+        assert all(e['source'] in ids and e['target'] in ids for e in data['edges'])
+        assert len(builder.get_relationships(max_nodes=4, max_edges=2)) == 2
+        assert builder.get_graph_data(max_edges=0)['edges'] == []
+
+    @pytest.mark.parametrize('backend', ['networkx', 'csr'])
+    def test_loose_caps_return_full_graph(self, backend):
+        builder = build(backend)
+        assert builder.get_graph_data(100, 100) == builder.get_graph_data()
+        assert builder.get_relationships(100, 100) == builder.get_relationships()
+
+    def test_most_central_nodes_kept(self):
+        builder = build('csr')
+        kept = {n['id'] for n in builder.get_graph_data(max_nodes=2)['nodes']}
+        assert kept == {'Acme', 'Paris'}
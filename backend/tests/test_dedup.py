@@ -0,0 +1,51 @@
+"""
+Unit tests for near-duplicate chunk detection.
+"""
+import pytest
+from app.modules.dedup import ChunkDeduplicator, optimal_bands
+from benchmarks.corpus import SyntheticCorpus
+
+
+@pytest.fixture
+def deduplicator():
+    return ChunkDeduplicator(threshold=0.9)
+
+
+@pytest.fixture
+def documents():
+    corpus = SyntheticCorpus(3)
+    return [corpus.document(200) for _ in range(20)]
+
+
+class TestChunkDeduplicator:
+    def test_distinct_chunks_are_kept(self, deduplicator, documents):
+        result = deduplicator.deduplicate(documents)
+        assert result.keep == list(range(len(documents)))
+        assert result.dropped == 0
+
+    def test_exact_and_near_duplicates_collapse_to_first(self, deduplicator, documents):
+        revised = documents[2].replace(" the ", " a ", 1) + " Revised."
+        chunks = documents[:5] + [documents[1], revised]
+        result = deduplicator.deduplicate(chunks)
+
+        assert result.keep == [0, 1, 2, 3, 4]
+        assert result.duplicates == [(5, 1), (6, 2)]
+
+    def test_threshold_controls_matching(self, documents):
+        # Second half rewritten: Jaccard similarity around 0.3
+        words = documents[0].split()
+        half = " ".join(words[:len(words) // 2] + documents[1].split()[len(words) // 2:])
+
+        assert ChunkDeduplicator(threshold=0.9).deduplicate([documents[0], half]).dropped == 0
+        assert ChunkDeduplicator(threshold=0.2).deduplicate([documents[0], half]).dropped == 1
+
+    def test_short_chunks(self, deduplicator):
+        result = deduplicator.deduplicate(["Page 1", "Page 1", "Page 2", ""])
+        assert result.keep == [0, 2, 3]
+
+    def test_optimal_bands_fit_signature(self):
+        bands, rows = optimal_bands(0.9, 128)
+        assert bands * rows <= 128
+        # Pairs just above the threshold almost always become candidates
+        assert 1 - (1 - 0.95 ** rows) ** bands > 0.95
+        assert 1 - (1 - 0.5 ** rows) ** bands < 0.01
@@ -0,0 +1,121 @@
+"""
+Unit tests for the per-document artifact cache.
+"""
+import pytest
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app import config, main
+from app.modules.document_cache import DocumentArtifacts, DocumentCache
+from app.modules.entity_extraction import EntityExtractor
+
+
+def artifacts(n: int, dimension: int = 64) -> DocumentArtifacts:
+    return DocumentArtifacts(
+        [f"chunk {i} about Acme" for i in range(n)],
+        [1] * n,
+        [[("Acme", "ORG")] for _ in range(n)],
+        np.arange(n * dimension, dtype=np.float32).reshape(n, dimension)
+    )
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DocumentCache(str(tmp_path), max_bytes=10 ** 6, fingerprint="model-a")
+
+
+class TestDocumentCache:
+    def test_keys(self, cache, tmp_path):
+        key = cache.key(b"same bytes", "a.pdf")
+        assert cache.key(b"same bytes", "renamed.PDF") == key
+        assert cache.key(b"same bytes", "a.txt") != key
+        assert cache.key(b"other bytes", "a.pdf") != key
+        other_model = DocumentCache(str(tmp_path), max_bytes=10 ** 6, fingerprint="model-b")
+        assert other_model.key(b"same bytes", "a.pdf") != key
+
+    def test_round_trip(self, cache):
+        key = cache.key(b"doc", "a.txt")
+        assert cache.get(key) is None
+
+        cache.put(key, artifacts(3))
+        hit = cache.get(key)
+        assert hit.chunks == artifacts(3).chunks
+        assert hit.pages == [1, 1, 1]
+        assert hit.mentions == [[("Acme", "ORG")]] * 3
+        np.testing.assert_array_equal(hit.vectors, artifacts(3).vectors)
+
+        stats = cache.stats()
+        assert (stats['entries'], stats['hits'], stats['misses']) == (1, 1, 1)
+        assert stats['bytes'] > 0
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        probe = DocumentCache(str(tmp_path / "probe"), max_bytes=10 ** 6)
+        probe.put("x", artifacts(20))
+        entry_bytes = probe.stats()['bytes']
+
+        cache = DocumentCache(str(tmp_path / "cache"), max_bytes=int(entry_bytes * 2.5))
+        cache.put("a", artifacts(20))
+        cache.put("b", artifacts(20))
+        assert cache.get("a") is not None
+        cache.put("c", artifacts(20))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        assert cache.stats()['evictions'] == 1
+        assert cache.stats()['bytes'] <= cache.max_bytes
+
+    def test_oversized_entry_not_stored(self, tmp_path):
+        cache = DocumentCache(str(tmp_path), max_bytes=1000)
+        cache.put("big", artifacts(100))
+        assert cache.get("big") is None
+        assert cache.stats()['entries'] == 0
+
+    def test_reopen_keeps_entries(self, cache, tmp_path):
+        cache.put("a", artifacts(2))
+        reopened = DocumentCache(str(tmp_path), max_bytes=10 ** 6, fingerprint="model-a")
+        assert reopened.stats()['entries'] == 1
+        assert reopened.stats()['bytes'] == cache.stats()['bytes']
+        assert reopened.get("a").chunks == artifacts(2).chunks
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path, hashing_embedding_model):
+    monkeypatch.setattr(config, 'WARMUP_ENABLED', False)
+    monkeypatch.setattr(config, 'DOCUMENT_CACHE_DIR', str(tmp_path / "documents"))
+    monkeypatch.setattr(main, 'embedding_model', hashing_embedding_model)
+    monkeypatch.setattr(main, 'document_cache', None)
+    with TestClient(main.app) as client:
+        yield client
+
+
+class TestUploadWithCache:
+    def test_reupload_skips_extraction(self, client, monkeypatch):
+        files = [
+            ('files', ('a.txt', b"Alice Smith works at Acme Corp in Paris.")),
+            ('files', ('b.txt', b"Bob Jones founded Globex in Berlin.")),
+        ]
+        first = client.post('/upload', files=files).json()
+
+        def fail(*args, **kwargs):
+            raise AssertionError("cached document was processed again")
+
+        def no_files(file_contents, pool=None):
+            assert file_contents == []
+            return iter([])
+
+        monkeypatch.setattr(main, 'iter_preprocess_files', no_files)
+        monkeypatch.setattr(EntityExtractor, 'extract_mentions', fail)
+        monkeypatch.setattr(main.embedding_model, 'encode', fail)
+        second = client.post('/upload', files=files).json()
+
+        assert second['chunks_count'] == first['chunks_count']
+        first_session = main.sessions[first['index_id']]
+        second_session = main.sessions[second['index_id']]
+        assert list(second_session.chunks) == list(first_session.chunks)
+        assert second_session.entity_table.names == first_session.entity_table.names
+        np.testing.assert_array_equal(
+            second_session.retriever.get_vectors(), first_session.retriever.get_vectors()
+        )
+
+        stats = client.get('/cache/stats').json()['document_cache']
+        assert (stats['entries'], stats['hits'], stats['misses']) == (2, 2, 2)
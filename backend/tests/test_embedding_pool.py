@@ -0,0 +1,39 @@
+"""
+Unit tests for the multi-process embedding pool.
+"""
+import pytest
+import numpy as np
+from conftest import HashingEmbeddingModel
+from app.modules.embedding_pool import EmbeddingPool
+from app.modules.retrieval import FAISSRetriever
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = EmbeddingPool(HashingEmbeddingModel, workers=2, threads_per_worker=1, shard_size=7)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def texts():
+    return [f"chunk {i} mentions company {i % 5} in city {i % 3}" for i in range(50)]
+
+
+class TestEmbeddingPool:
+    def test_matches_single_process(self, pool, texts):
+        expected = HashingEmbeddingModel().encode(texts)
+        np.testing.assert_array_equal(pool.encode(texts), expected)
+
+    def test_blocks_arrive_in_order(self, pool, texts):
+        blocks = list(pool.iter_encode(texts))
+        assert [len(b) for b in blocks] == [7] * 7 + [1]
+        np.testing.assert_array_equal(blocks[-1], HashingEmbeddingModel().encode(texts[-1:]))
+
+    def test_build_index_with_pool(self, pool, texts, hashing_embedding_model):
+        pooled = FAISSRetriever(hashing_embedding_model)
+        pooled.build_index(texts, ["a.txt"] * len(texts), pool=pool)
+        local = FAISSRetriever(hashing_embedding_model)
+        local.build_index(texts, ["a.txt"] * len(texts))
+
+        np.testing.assert_array_equal(pooled.get_vectors(), local.get_vectors())
@@ -0,0 +1,108 @@
+"""
+Unit tests for the interned entity table.
+"""
+import pytest
+import numpy as np
+from app.modules.entity_table import EntityTable
+from app.modules.graph_builder import KnowledgeGraphBuilder
+
+
+MENTIONS = [
+    [("Alice", "PERSON"), ("Acme", "ORG")],
+    [],
+    [("acme", "ORG"), ("Paris", "GPE"), ("Acme", "ORG")],
+    [("Alice", "PERSON"), ("Bob", "PERSON")],
+]
+
+
+@pytest.fixture
+def table():
+    return EntityTable.from_mentions(MENTIONS)
+
+
+class TestEntityTable:
+    def test_interning(self, table):
+        assert table.names == ["Alice", "Acme", "Paris", "Bob"]
+        assert [table.entity_type(e) for e in range(len(table))] == ["PERSON", "ORG", "GPE", "PERSON"]
+        assert table.first_chunk.tolist() == [0, 0, 2, 3]
+        assert table.lookup("ACME", "ORG") == 1
+        assert table.lookup("Acme", "PERSON") is None
+
+    def test_postings_are_deduplicated_per_chunk(self, table):
+        assert table.num_chunks == 4
+        assert table.chunk_entity_ids(2).tolist() == [1, 2]
+        assert table.chunk_entity_ids(1).tolist() == []
+        assert table.chunk_entity_ids(9).tolist() == []
+
+    def test_entities_for_chunks(self, table):
+        entities, positions = table.entities_for_chunks([3, 2, 0])
+        assert entities.tolist() == [0, 3, 1, 2]
+        assert positions.tolist() == [0, 0, 1, 1]
+
+        entities, positions = table.entities_for_chunks([7, 1, 2])
+        assert entities.tolist() == [1, 2]
+        assert positions.tolist() == [2, 2]
+
+        entities, _ = table.entities_for_chunks([1])
+        assert entities.tolist() == []
+
+    def test_chunks_for_entities(self, table):
+        assert table.entity_indptr.tolist() == [0, 2, 4, 5, 6]
+        assert table.entity_chunks.tolist() == [0, 3, 0, 2, 2, 3]
+
+        chunks, counts = table.chunks_for_entities([1, 2, 0])
+        assert chunks.tolist() == [0, 2, 3]
+        assert counts.tolist() == [2, 2, 1]
+        assert table.chunks_for_entities([])[0].tolist() == []
+
+    def test_save_and_load(self, table, tmp_path):
+        table.save(str(tmp_path))
+        loaded = EntityTable.load(str(tmp_path))
+
+        assert isinstance(loaded.chunk_entities, np.memmap)
+        assert loaded.names == table.names
+        assert loaded.to_entities() == table.to_entities()
+        assert loaded.to_chunk_map() == table.to_chunk_map()
+        assert loaded.lookup("paris", "GPE") == 2
+        assert isinstance(loaded.entity_chunks, np.memmap)
+        assert loaded.chunks_for_entities([3])[0].tolist() == [3]
+
+    def test_from_entities_round_trip(self, table):
+        rebuilt = EntityTable.from_entities(table.to_entities(), table.to_chunk_map())
+        assert rebuilt.names == table.names
+        assert rebuilt.chunk_entities.tolist() == table.chunk_entities.tolist()
+
+    def test_from_entities_matches_untyped_mentions_by_name(self):
+        entities = [{'name': 'Alice', 'type': 'PERSON', 'source_chunk_id': 0}]
+        chunk_map = {0: [{'name': 'Alice'}, {'name': 'Zed'}]}
+        rebuilt = EntityTable.from_entities(entities, chunk_map)
+        assert rebuilt.chunk_entity_ids(0).tolist() == [0]
+
+
+class TestGraphFromTable:
+    @pytest.mark.parametrize('backend', ['networkx', 'csr'])
+    def test_matches_list_of_dicts_build(self, table, backend):
+        chunks = ["chunk"] * table.num_chunks
+        from_table = KnowledgeGraphBuilder(backend)
+        from_table.build_graph_from_table(table, chunks)
+        from_dicts = KnowledgeGraphBuilder(backend)
+        from_dicts.build_graph(table.to_entities(), table.to_chunk_map(), chunks)
+
+        assert from_table.get_graph_data() == from_dicts.get_graph_data()
+        assert {
+            (r['from_entity'], r['to_entity']) for r in from_table.get_relationships()
+        } == {("Alice", "Acme"), ("Acme", "Paris"), ("Alice", "Bob")}
+
+    @pytest.mark.parametrize('backend', ['networkx', 'csr'])
+    def test_expand_chunks(self, backend):
+        table = EntityTable.from_mentions(MENTIONS + [[("Zed", "ORG")]])
+        builder = KnowledgeGraphBuilder(backend)
+        builder.build_graph_from_table(table, ["chunk"] * table.num_chunks)
+
+        # Acme and Paris reach Alice in one hop
+        assert builder.expand_chunks(table, [2], hops=1, limit=5) == [0, 3]
+        assert builder.expand_chunks(table, [2], hops=1, limit=5, allowed=np.array([3, 4])) == [3]
+        assert builder.expand_chunks(table, [3], hops=1, limit=1) == [0]
+        # Paris is two hops from Bob; the isolated Zed is never reached
+        assert builder.expand_chunks(table, [3], hops=2, limit=5) == [0, 2]
+        assert builder.expand_chunks(table, [1], hops=2, limit=5) == []
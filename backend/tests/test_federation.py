@@ -0,0 +1,84 @@
+"""
+Unit tests for federated search across sessions.
+"""
+import uuid
+import pytest
+from app.modules.federation import FederatedSearcher, merge_graph_data, merge_relationships
+from app.modules.retrieval import FAISSRetriever
+from app.modules.session_store import RAGSession
+
+
+CORPORA = [
+    ["Alice Smith works at Acme Corp in Paris.", "Acme Corp sells rockets."],
+    ["Bob Jones founded Globex in Berlin.", "Globex builds rockets in Texas.", "Berlin is cold."],
+    ["Carol Davis moved to Oslo.", "Oslo has fjords and rockets."],
+]
+
+
+@pytest.fixture
+def sessions(hashing_embedding_model):
+    sessions = []
+    for chunks in CORPORA:
+        session = RAGSession(str(uuid.uuid4()), hashing_embedding_model)
+        session.retriever.build_index(chunks, ["doc.txt"] * len(chunks))
+        sessions.append(session)
+    return sessions
+
+
+@pytest.fixture
+def searcher():
+    searcher = FederatedSearcher(max_workers=3)
+    yield searcher
+    searcher.close()
+
+
+class TestFederatedSearcher:
+    def test_matches_single_combined_index(self, sessions, searcher, hashing_embedding_model):
+        combined = FAISSRetriever(hashing_embedding_model)
+        all_chunks = [chunk for chunks in CORPORA for chunk in chunks]
+        combined.build_index(all_chunks, ["doc.txt"] * len(all_chunks))
+        query = combined.encode_query("rockets in Texas")
+
+        hits = searcher.search(sessions, query, k=4)
+        ids, similarities = combined.search(query, k=4)
+
+        by_id = {s.session_id: s for s in sessions}
+        assert [h.similarity for h in hits] == pytest.approx(similarities)
+        assert sorted(by_id[h.index_id].retriever.chunks[h.chunk_id] for h in hits) == \
+            sorted(all_chunks[i] for i in ids)
+
+    def test_k_larger_than_any_session(self, sessions, searcher):
+        query = sessions[0].retriever.encode_query("rockets")
+        hits = searcher.search(sessions, query, k=7)
+
+        assert len(hits) == 7
+        assert len({(h.index_id, h.chunk_id) for h in hits}) == 7
+        assert [h.similarity for h in hits] == sorted((h.similarity for h in hits), reverse=True)
+
+
+class TestGraphMerging:
+    def test_merge_graph_data_deduplicates(self):
+        first = {
+            'nodes': [{'id': 'Acme', 'label': 'Acme'}, {'id': 'Paris', 'label': 'Paris'}],
+            'edges': [{'source': 'Acme', 'target': 'Paris', 'label': 'located-in'}],
+        }
+        second = {
+            'nodes': [{'id': 'Paris', 'label': 'Paris'}, {'id': 'Oslo', 'label': 'Oslo'}],
+            'edges': [
+                {'source': 'Paris', 'target': 'Acme', 'label': 'related-to'},
+                {'source': 'Paris', 'target': 'Oslo', 'label': 'related-to'},
+            ],
+        }
+        merged = merge_graph_data([first, second])
+
+        assert [n['id'] for n in merged['nodes']] == ['Acme', 'Paris', 'Oslo']
+        assert [(e['source'], e['target']) for e in merged['edges']] == [('Acme', 'Paris'), ('Paris', 'Oslo')]
+        assert merged['edges'][0]['label'] == 'located-in'
+
+    def test_merge_relationships_deduplicates(self):
+        rels = merge_relationships([
+            [{'from_entity': 'A', 'to_entity': 'B', 'relation': 'r1'}],
+            [{'from_entity': 'B', 'to_entity': 'A', 'relation': 'r2'},
+             {'from_entity': 'B', 'to_entity': 'C', 'relation': 'r3'}],
+        ])
+        assert [r['relation'] for r in rels] == ['r1', 'r3']
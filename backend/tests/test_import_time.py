@@ -0,0 +1,55 @@
+"""
+Import-time budget tests: importing the app must not pull in heavy dependencies.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Modules that must only be imported on the code paths that use them
+HEAVY_MODULES = [
+    'torch', 'sentence_transformers', 'faiss', 'networkx',
+    'pdfplumber', 'pypdf', 'openai', 'spacy',
+]
+
+# Seconds from interpreter start-up to the first /status response (about 0.6 s on a laptop).
+# Eager torch or spaCy imports alone take well over a second, so they fail this budget.
+STARTUP_BUDGET = float(os.getenv('RAG_STARTUP_BUDGET_S', '1.0'))
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+from fastapi.testclient import TestClient
+status = TestClient(app.main.app).get('/status').status_code
+elapsed = time.perf_counter() - start
+print(json.dumps({'elapsed': elapsed, 'status': status, 'modules': sorted(sys.modules)}))
+"""
+
+
+@pytest.fixture(scope='module')
+def probe():
+    env = dict(os.environ, RAG_WARMUP='0')
+    runs = []
+    # Best of three, so a busy machine does not fail a budget this tight
+    for _ in range(3):
+        output = subprocess.check_output(
+            [sys.executable, '-c', _PROBE], cwd=str(BACKEND_DIR), env=env, text=True
+        )
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return min(runs, key=lambda run: run['elapsed'])
+
+
+class TestImportTime:
+    def test_no_heavy_imports(self, probe):
+        loaded = [name for name in HEAVY_MODULES if name in probe['modules']]
+        assert loaded == []
+
+    def test_status_within_budget(self, probe):
+        assert probe['status'] == 200
+        assert probe['elapsed'] < STARTUP_BUDGET
@@ -0,0 +1,45 @@
+"""
+Unit tests for precomputed lexical features.
+"""
+import pytest
+import numpy as np
+from app.modules.lexical import LexicalFeatures, fallback_answer_end
+from app.modules.answer_generator import AnswerGenerator
+
+
+class TestLexicalFeatures:
+    @pytest.fixture
+    def chunks(self):
+        return [
+            "Paris is the capital of France.",
+            "Berlin is the capital of Germany and a large city.",
+            "The quick brown fox. " * 80,
+            "",
+        ]
+
+    def test_overlap_counts(self, chunks):
+        features = LexicalFeatures.build(chunks)
+        terms = features.query_terms("What is the capital of Germany")
+        scores = features.overlap(terms, [0, 1, 3])
+
+        assert scores.tolist() == [2, 3, 0]
+
+    def test_unknown_query_terms_ignored(self, chunks):
+        features = LexicalFeatures.build(chunks)
+        assert len(features.query_terms("zebra unicorn")) == 0
+
+    def test_answer_end_cuts_long_chunks(self, chunks):
+        end = fallback_answer_end(chunks[2])
+        assert 500 < end <= 1200
+        assert chunks[2][:end].endswith('.')
+
+    def test_fallback_matches_retokenizing_path(self, chunks):
+        generator = AnswerGenerator.__new__(AnswerGenerator)
+        features = LexicalFeatures.build(chunks)
+        rng = np.random.RandomState(0)
+
+        for query in ["capital of France", "quick fox", "nothing relevant", "Berlin city"]:
+            chunk_ids = rng.permutation(len(chunks))[:3].tolist()
+            context = [chunks[i] for i in chunk_ids]
+            expected = generator._generate_fallback(query, context)
+            assert generator._generate_fallback(query, context, chunk_ids, features) == expected
@@ -0,0 +1,83 @@
+"""
+Unit tests for chunk metadata and filtered search.
+"""
+import pytest
+import numpy as np
+from app.modules.chunk_store import ChunkStore
+from app.modules.metadata import ChunkMetadata
+from app.modules.retrieval import FAISSRetriever
+
+
+CHUNKS = [
+    "Alice Smith works at Acme Corp in Paris.",
+    "Acme Corp opened an office in Berlin.",
+    "Bob Jones founded Globex in Berlin.",
+    "Globex builds rockets in Texas.",
+    "Carol Davis moved to Oslo.",
+]
+SOURCES = ["a.pdf", "a.pdf", "a.pdf", "b.txt", "c.txt"]
+PAGES = [1, 2, 3, 1, 1]
+
+
+@pytest.fixture
+def metadata():
+    return ChunkMetadata.from_store(ChunkStore.from_lists(CHUNKS, SOURCES), PAGES, 1000.0)
+
+
+@pytest.fixture
+def retriever(hashing_embedding_model):
+    retriever = FAISSRetriever(hashing_embedding_model)
+    retriever.build_index(CHUNKS, SOURCES)
+    return retriever
+
+
+class TestChunkMetadata:
+    def test_is_compact(self, metadata):
+        assert metadata.source_names == ["a.pdf", "b.txt", "c.txt"]
+        assert metadata.source_codes.dtype == np.int32
+        assert metadata.source_codes.tolist() == [0, 0, 0, 1, 2]
+        assert len(metadata.source_uploaded_at) == 3
+
+    def test_no_conditions(self, metadata):
+        assert metadata.select() is None
+
+    def test_sources(self, metadata):
+        assert metadata.select(sources=["b.txt", "c.txt"]).tolist() == [3, 4]
+        assert metadata.select(sources=["missing.pdf"]).tolist() == []
+
+    def test_page_range(self, metadata):
+        assert metadata.select(sources=["a.pdf"], page_min=2).tolist() == [1, 2]
+        assert metadata.select(page_max=1).tolist() == [0, 3, 4]
+
+    def test_upload_time(self, metadata):
+        assert metadata.select(uploaded_after=999.0).tolist() == [0, 1, 2, 3, 4]
+        assert metadata.select(uploaded_before=999.0).tolist() == []
+
+
+class TestFilteredSearch:
+    def test_results_respect_selection(self, retriever, metadata):
+        ids = metadata.select(sources=["a.pdf"])
+        found, _ = retriever.search(retriever.encode_query("Globex rockets Texas"), k=5, ids=ids)
+        assert sorted(found) == [0, 1, 2]
+
+    def test_matches_post_filtering(self, retriever, metadata):
+        query = retriever.encode_query("Berlin office")
+        ids = metadata.select(page_min=2)
+        found, similarities = retriever.search(query, k=2, ids=ids)
+
+        all_ids, all_similarities = retriever.search(query, k=len(CHUNKS))
+        expected = [(i, s) for i, s in zip(all_ids, all_similarities) if i in set(ids.tolist())][:2]
+        assert found == [i for i, _ in expected]
+        assert similarities == pytest.approx([s for _, s in expected])
+
+    def test_mapped_vectors_match_index(self, retriever, metadata, hashing_embedding_model):
+        mapped = FAISSRetriever(hashing_embedding_model)
+        mapped.load_vectors(retriever.get_vectors(), retriever.store)
+        query = retriever.encode_query("Berlin")
+        ids = metadata.select(sources=["a.pdf", "b.txt"])
+
+        assert mapped.search(query, k=3, ids=ids) == retriever.search(query, k=3, ids=ids)
+
+    def test_empty_selection(self, retriever):
+        query = retriever.encode_query("Berlin")
+        assert retriever.search(query, k=3, ids=np.array([], dtype=np.int64)) == ([], [])
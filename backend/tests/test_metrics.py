@@ -0,0 +1,38 @@
+"""
+Unit tests for metrics module.
+"""
+import pytest
+from app.metrics import Counter, Gauge, Histogram, Registry
+
+
+class TestMetrics:
+    def test_histogram_cumulative_buckets(self):
+        hist = Histogram('test_seconds', 'Test.', ['stage'], buckets=(0.1, 1.0))
+        hist.observe(0.05, stage='a')
+        hist.observe(0.5, stage='a')
+        hist.observe(5.0, stage='a')
+
+        lines = hist.samples()
+        assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in lines
+        assert 'test_seconds_bucket{stage="a",le="1"} 2' in lines
+        assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+        assert 'test_seconds_count{stage="a"} 3' in lines
+
+    def test_histogram_timer(self):
+        hist = Histogram('timer_seconds', 'Test.', ['stage'])
+        with hist.time(stage='b'):
+            pass
+        assert hist.get_count(stage='b') == 1
+
+    def test_registry_render(self):
+        registry = Registry()
+        counter = registry.register(Counter('hits_total', 'Hits.', ['cache']))
+        gauge = registry.register(Gauge('sessions', 'Sessions.'))
+        counter.inc(cache='answer')
+        counter.inc(2, cache='answer')
+        gauge.set_function(lambda: 7)
+
+        text = registry.render()
+        assert '# TYPE hits_total counter' in text
+        assert 'hits_total{cache="answer"} 3' in text
+        assert 'sessions 7' in text
@@ -0,0 +1,113 @@
+"""
+Unit tests for the ONNX Runtime embedding backend.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+import numpy as np
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnx")
+pytest.importorskip("sentence_transformers")
+
+from benchmarks.embedding_backends import top_k_agreement
+
+TEXTS = [
+    "alice works at acme corp in paris",
+    "bob",
+    "globex builds rockets in berlin and the rockets fly",
+    "who founded acme",
+]
+
+
+@pytest.fixture(scope="module")
+def tiny_model_path(tmp_path_factory):
+    """Build a tiny random BERT SentenceTransformer on disk, no download needed."""
+    from sentence_transformers import SentenceTransformer, models
+    from tokenizers import Tokenizer, models as tok_models, pre_tokenizers
+    from transformers import BertConfig, BertModel, PreTrainedTokenizerFast
+
+    path = tmp_path_factory.mktemp("tiny_st")
+    words = sorted({w for text in TEXTS for w in text.split()})
+    vocab = {tok: i for i, tok in enumerate(["[PAD]", "[UNK]", "[CLS]", "[SEP]"] + words)}
+    tokenizer = Tokenizer(tok_models.WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    hf_tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, pad_token="[PAD]", unk_token="[UNK]",
+        cls_token="[CLS]", sep_token="[SEP]"
+    )
+    bert = BertModel(BertConfig(
+        vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2,
+        num_attention_heads=2, intermediate_size=64, max_position_embeddings=64
+    ))
+    bert.save_pretrained(path / "hf")
+    hf_tokenizer.save_pretrained(path / "hf")
+
+    transformer = models.Transformer(str(path / "hf"), max_seq_length=32)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), pooling_mode="mean")
+    SentenceTransformer(modules=[transformer, pooling, models.Normalize()]).save(str(path / "st"))
+    return str(path / "st")
+
+
+class TestOnnxEmbeddingBackend:
+    def test_matches_torch_backend(self, tiny_model_path, tmp_path, monkeypatch):
+        from app import config
+        from app.modules.retrieval import EmbeddingModel
+
+        monkeypatch.setattr(config, "EMBEDDING_ONNX_DIR", str(tmp_path))
+        reference = EmbeddingModel(tiny_model_path, backend="torch").encode(TEXTS)
+        onnx_model = EmbeddingModel(tiny_model_path, backend="onnx")
+
+        assert onnx_model.dimension == reference.shape[1]
+        np.testing.assert_allclose(onnx_model.encode(TEXTS), reference, atol=1e-4)
+
+    def test_quantized_close_to_torch(self, tiny_model_path, tmp_path, monkeypatch):
+        from app import config
+        from app.modules.retrieval import EmbeddingModel
+
+        monkeypatch.setattr(config, "EMBEDDING_ONNX_DIR", str(tmp_path))
+        reference = EmbeddingModel(tiny_model_path, backend="torch").encode(TEXTS)
+        quantized = EmbeddingModel(tiny_model_path, backend="onnx", quantize=True).encode(TEXTS)
+
+        cosine = np.sum(reference * quantized, axis=1)
+        assert cosine.min() > 0.99
+
+    def test_cached_load_does_not_import_torch(self, tiny_model_path, tmp_path, monkeypatch):
+        from app import config
+        from app.modules.retrieval import EmbeddingModel
+
+        monkeypatch.setattr(config, "EMBEDDING_ONNX_DIR", str(tmp_path))
+        EmbeddingModel(tiny_model_path, backend="onnx")  # export once
+
+        code = (
+            "import sys\n"
+            "from app.modules.retrieval import EmbeddingModel\n"
+            f"EmbeddingModel({tiny_model_path!r}, backend='onnx').encode(['alice'])\n"
+            "print('torch' in sys.modules, 'transformers' in sys.modules)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True,
+            env={**os.environ, "RAG_EMBEDDING_ONNX_DIR": str(tmp_path)},
+            cwd=str(Path(__file__).resolve().parent.parent)
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip().splitlines()[-1] == "False False"
+
+    def test_unknown_backend(self):
+        from app.modules.retrieval import EmbeddingModel
+
+        with pytest.raises(ValueError):
+            EmbeddingModel("unused", backend="tensorflow")
+
+
+class TestTopKAgreement:
+    def test_identical_rankings(self):
+        sims = np.array([[0.9, 0.1, 0.5], [0.2, 0.8, 0.3]])
+        assert top_k_agreement(sims, sims, 2) == 1.0
+
+    def test_partial_overlap(self):
+        reference = np.array([[0.9, 0.8, 0.1, 0.0]])
+        candidate = np.array([[0.9, 0.0, 0.8, 0.1]])
+        assert top_k_agreement(reference, candidate, 2) == 0.5
@@ -3,7 +3,8 @@ Unit tests for preprocessing module.
 """
 import pytest
 from app.modules.preprocessing import (
-    clean_text, chunk_text, extract_text_from_file
+    clean_text, chunk_text, chunk_text_with_offsets, extract_text_from_file,
+    preprocess_documents_with_pages
 )
 
 
@@ -49,3 +50,33 @@ class TestFileExtraction:
         content = b"test"
         result = extract_text_from_file(content, "test.xyz")
         assert result == ""
+
+
+class TestPageTracking:
+    def test_chunk_offsets_point_at_first_word(self):
+        text = " ".join(f"Sentence number {i} ends here." for i in range(40))
+        words = text.split()
+        for chunk, start in chunk_text_with_offsets(text, chunk_size=30, overlap=20):
+            assert chunk.split()[:4] == words[start:start + 4]
+
+    def test_text_files_are_page_one(self):
+        chunks, sources, pages = preprocess_documents_with_pages([(b"One. Two. Three.", "a.txt")])
+        assert pages == [1] * len(chunks)
+        assert sources == ["a.txt"] * len(chunks)
+
+    def test_pdf_pages(self):
+        pytest.importorskip("pdfplumber")
+        from benchmarks.corpus import make_pdf
+
+        pdf = make_pdf(["Alpha works in Paris. " * 80, "Beta lives in Oslo. " * 80])
+        chunks, _, pages = preprocess_documents_with_pages([(pdf, "doc.pdf")])
+        assert pages[0] == 1 and pages[-1] == 2
+        assert all("Oslo" in chunk for chunk, page in zip(chunks, pages) if page == 2)
+
+    def test_pdf_page_break_separates_words(self):
+        pytest.importorskip("pdfplumber")
+        from benchmarks.corpus import make_pdf
+
+        chunks, _, pages = preprocess_documents_with_pages([(make_pdf(["Alpha works in", "Paris today."]), "doc.pdf")])
+        assert chunks == ["Alpha works in Paris today."]
+        assert pages == [1]
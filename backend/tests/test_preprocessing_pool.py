@@ -0,0 +1,71 @@
+"""
+Unit tests for the multi-process preprocessing pool.
+"""
+import threading
+import time
+import pytest
+from app.metrics import STAGE_LATENCY
+from app.modules.preprocessing import preprocess_uploads
+from app.modules.preprocessing_pool import PreprocessingPool
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = PreprocessingPool(workers=2)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def files():
+    return [
+        (" ".join(f"File {f} sentence {i} mentions Acme." for i in range(30 * (f + 1))).encode(), f"{f}.txt")
+        for f in range(6)
+    ]
+
+
+class TestPreprocessingPool:
+    def test_matches_single_process(self, pool, files):
+        assert preprocess_uploads(files, pool=pool) == preprocess_uploads(files)
+
+    def test_results_arrive_in_order(self, pool, files):
+        results = list(pool.iter_preprocess(files))
+        assert len(results) == len(files)
+        assert [r.chunks[0].split()[1] for r in results] == [str(f) for f in range(6)]
+
+    def test_failed_file_is_isolated(self, pool, files):
+        # A .txt whose content cannot be decoded raises inside the worker
+        batch = files[:2] + [(None, "broken.txt")] + files[2:3]
+        result = preprocess_uploads(batch, pool=pool)
+
+        assert result.failed == ["broken.txt"]
+        assert result.sources[0] == "0.txt" and result.sources[-1] == "2.txt"
+        assert result == preprocess_uploads(batch)
+
+    def test_worker_stage_timings_are_recorded(self, pool, files):
+        before = STAGE_LATENCY.get_count(stage='chunking')
+        preprocess_uploads(files, pool=pool)
+        assert STAGE_LATENCY.get_count(stage='chunking') == before + len(files)
+
+    def test_concurrent_restarts_replace_the_pool_once(self, monkeypatch):
+        pool = PreprocessingPool(workers=1)
+        broken = pool._executor
+        new_executor = pool._new_executor
+        created = []
+
+        def slow_new_executor():
+            # Widen the window between the check and the swap
+            time.sleep(0.05)
+            created.append(new_executor())
+            return created[-1]
+
+        monkeypatch.setattr(pool, '_new_executor', slow_new_executor)
+        threads = [threading.Thread(target=pool._restart, args=(broken,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(created) == 1
+        assert pool._executor is created[0]
+        pool.close()
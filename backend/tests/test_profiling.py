@@ -0,0 +1,104 @@
+"""
+Unit tests for request profiling.
+"""
+import asyncio
+import threading
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.profiling import ProfileStore, ProfilingMiddleware, SamplingProfiler, run_in_threadpool
+
+
+def busy_work(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(100))
+    return total
+
+
+class TestSamplingProfiler:
+    def test_folded_stacks_capture_work(self):
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        worker = threading.Thread(target=busy_work, args=(0.2,), name="worker")
+        worker.start()
+        worker.join()
+        folded = profiler.stop()
+
+        assert profiler.samples > 0
+        lines = folded.splitlines()
+        assert any('busy_work' in line for line in lines)
+        stack, count = lines[0].rsplit(' ', 1)
+        assert int(count) > 0
+        assert ';' in stack
+
+    def test_request_profile_excludes_other_work(self):
+        def tracked_work(seconds):
+            return busy_work(seconds)
+
+        def unrelated_work(seconds):
+            return busy_work(seconds)
+
+        async def other_request():
+            await asyncio.sleep(0)
+            unrelated_work(0.1)
+
+        async def run():
+            profiler = SamplingProfiler(interval=0.001, task=asyncio.current_task())
+            profiler.start()
+            unrelated = threading.Thread(target=unrelated_work, args=(0.2,))
+            unrelated.start()
+            # Another request's coroutine on the same event loop
+            other = asyncio.create_task(other_request())
+            busy_work(0.1)
+            await other
+
+            def in_worker():
+                with profiler.track_thread():
+                    tracked_work(0.1)
+
+            await asyncio.get_running_loop().run_in_executor(None, in_worker)
+            unrelated.join()
+            return profiler.stop()
+
+        folded = asyncio.run(run())
+        assert 'run (test_profiling.py' in folded
+        assert 'tracked_work (' in folded
+        assert 'unrelated_work' not in folded
+
+
+class TestProfileStore:
+    def test_bounded_and_retrievable(self, tmp_path):
+        store = ProfileStore(max_profiles=2, directory=str(tmp_path))
+        ids = [store.add('POST', '/query', 0.1, 3, f"main;f{i} 3") for i in range(3)]
+
+        assert len(store.list()) == 2
+        assert store.get(ids[2])['folded'] == "main;f2 3"
+        # Evicted from memory but still on disk
+        assert store.get(ids[0])['folded'] == "main;f0 3"
+
+
+class TestProfilingMiddleware:
+    def test_profiles_requested_request(self):
+        app = FastAPI()
+
+        @app.post("/query")
+        async def query():
+            await run_in_threadpool(busy_work, 0.1)
+            return {"ok": True}
+
+        store = ProfileStore()
+        app.add_middleware(
+            ProfilingMiddleware, store=store, paths=("/query",), interval=0.001,
+            wanted=lambda scope: (b"x-profile", b"1") in scope["headers"]
+        )
+        with TestClient(app) as client:
+            plain = client.post("/query")
+            profiled = client.post("/query", headers={"X-Profile": "1"})
+
+        assert "x-profile-id" not in plain.headers
+        record = store.get(profiled.headers["x-profile-id"])
+        assert record['path'] == "/query" and record['samples'] > 0
+        assert 'busy_work' in record['folded']
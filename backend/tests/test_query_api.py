@@ -0,0 +1,164 @@
+"""
+API tests for /query response sections.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app import config, main
+from app.modules.graph_builder import KnowledgeGraphBuilder
+from app.modules.session_store import SessionStore
+
+
+DOCUMENT = (
+    b"Alice Smith works at Acme Corp in Paris. Bob Jones founded Globex in Berlin. "
+    b"Globex builds rockets in Texas with Acme Corp."
+)
+
+
+@pytest.fixture
+def client(monkeypatch, hashing_embedding_model):
+    monkeypatch.setattr(config, 'WARMUP_ENABLED', False)
+    monkeypatch.setattr(main, 'embedding_model', hashing_embedding_model)
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def index_id(client):
+    response = client.post('/upload', files=[('files', ('doc.txt', DOCUMENT))])
+    assert response.status_code == 200
+    return response.json()['index_id']
+
+
+class TestQuerySections:
+    def test_all_sections_by_default(self, client, index_id):
+        body = client.post('/query', json={'query': 'Who founded Globex?', 'index_id': index_id}).json()
+
+        assert body['answer']
+        assert body['snippets']
+        assert body['entities']
+        assert body['graph_data'] is not None
+
+    def test_retrieval_only_skips_llm_and_graph(self, client, index_id, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError("stage should have been skipped")
+
+        monkeypatch.setattr(main, 'get_answer_generator', fail)
+        monkeypatch.setattr(main, 'get_entity_extractor', fail)
+        monkeypatch.setattr(KnowledgeGraphBuilder, 'get_graph_data', fail)
+        monkeypatch.setattr(KnowledgeGraphBuilder, 'get_relationships', fail)
+
+        response = client.post('/query', json={
+            'query': 'Who founded Globex?', 'index_id': index_id, 'include': ['snippets']
+        })
+        body = response.json()
+
+        assert response.status_code == 200
+        assert body['snippets']
+        assert body['answer'] is None
+        assert body['graph_data'] is None
+        assert body['entities'] == [] and body['relationships'] == []
+
+    def test_graph_without_answer(self, client, index_id):
+        body = client.post('/query', json={
+            'query': 'rockets', 'index_id': index_id, 'include': ['graph', 'relationships']
+        }).json()
+
+        assert body['answer'] is None
+        assert body['snippets'] == []
+        assert body['graph_data']['nodes']
+
+    def test_expand_hops_follows_shared_entities(self, client):
+        # One chunk per file, linked only through the entities they share
+        files = [
+            ('files', ('a.txt', b"Alice Smith works at Acme Corp in Paris.")),
+            ('files', ('b.txt', b"Acme Corp partners with Globex in Berlin.")),
+            ('files', ('c.txt', b"Globex builds rockets in Texas.")),
+        ]
+        index_id = client.post('/upload', files=files).json()['index_id']
+        request = {'query': 'rockets', 'index_id': index_id, 'top_k': 1, 'include': ['snippets']}
+
+        plain = client.post('/query', json=request).json()
+        expanded = client.post('/query', json={**request, 'expand_hops': 2}).json()
+
+        assert len(plain['snippets']) == 1
+        assert expanded['snippets'][0] == plain['snippets'][0]
+        assert len(set(expanded['snippets'])) == 3
+
+    def test_expand_hops_validated(self, client, index_id):
+        response = client.post('/query', json={'query': 'x', 'index_id': index_id, 'expand_hops': 3})
+        assert response.status_code == 422
+
+    def test_unknown_section_rejected(self, client, index_id):
+        response = client.post('/query', json={'query': 'x', 'index_id': index_id, 'include': ['everything']})
+        assert response.status_code == 422
+
+
+class TestUpload:
+    def test_corrupt_pdf_is_reported_as_failed(self, client):
+        files = [
+            ('files', ('doc.txt', DOCUMENT)),
+            ('files', ('broken.pdf', b"%PDF-1.4 this is not really a PDF")),
+        ]
+        body = client.post('/upload', files=files).json()
+
+        assert body['status'] == 'success'
+        assert body['failed_files'] == ['broken.pdf']
+
+
+class TestStagedUpload:
+    def test_queryable_before_graph_is_built(self, client, monkeypatch):
+        finish_session = main.finish_session
+        deferred = []
+        monkeypatch.setattr(main, 'finish_session', lambda *args: deferred.append(args))
+
+        upload = client.post('/upload', files=[('files', ('doc.txt', DOCUMENT))]).json()
+        assert upload['graph_pending'] is True
+        request = {'query': 'Who founded Globex?', 'index_id': upload['index_id'], 'expand_hops': 1}
+
+        pending = client.post('/query', json=request).json()
+        assert pending['graph_pending'] is True
+        assert pending['answer'] and pending['snippets']
+        assert pending['entities'] == [] and pending['graph_data']['nodes'] == []
+
+        finish_session(*deferred[0])
+        ready = client.post('/query', json=request).json()
+        assert ready['graph_pending'] is False
+        assert ready['entities'] and ready['graph_data']['nodes']
+
+    def test_other_workers_query_before_graph_is_built(self, client, monkeypatch, hashing_embedding_model, tmp_path):
+        monkeypatch.setattr(main, 'session_store', SessionStore(str(tmp_path)))
+        finish_session = main.finish_session
+        deferred = []
+        monkeypatch.setattr(main, 'finish_session', lambda *args: deferred.append(args))
+        index_id = client.post('/upload', files=[('files', ('doc.txt', DOCUMENT))]).json()['index_id']
+
+        # A second uvicorn worker maps the session from the shared directory
+        other_worker = SessionStore(str(tmp_path))
+        loaded = other_worker.load(index_id, hashing_embedding_model)
+        assert loaded is not None and loaded.graph_pending
+        assert len(loaded.chunks) == len(main.sessions[index_id].chunks)
+
+        finish_session(*deferred[0])
+        assert other_worker.load_graph(loaded)
+        assert loaded.entity_table.names == main.sessions[index_id].entity_table.names
+
+    def test_unstaged_upload_waits_for_graph(self, client, monkeypatch):
+        monkeypatch.setattr(config, 'STAGED_UPLOAD', False)
+        upload = client.post('/upload', files=[('files', ('doc.txt', DOCUMENT))]).json()
+
+        assert upload['graph_pending'] is False
+        assert main.sessions[upload['index_id']].entity_table is not None
+
+
+class TestSharedStore:
+    def test_clear_through_another_worker(self, client, monkeypatch, tmp_path):
+        monkeypatch.setattr(main, 'session_store', SessionStore(str(tmp_path)))
+        index_id = client.post('/upload', files=[('files', ('doc.txt', DOCUMENT))]).json()['index_id']
+        request = {'query': 'Who founded Globex?', 'index_id': index_id}
+        assert client.post('/query', json=request).status_code == 200
+
+        # /clear handled by a different worker process only removes the shared copy
+        assert SessionStore(str(tmp_path)).delete(index_id)
+        assert client.post('/query', json=request).status_code == 404
+        assert index_id not in main.sessions
@@ -0,0 +1,117 @@
+"""
+Unit tests for the shared session store.
+"""
+import uuid
+import pytest
+import numpy as np
+from app.modules.entity_extraction import EntityExtractor
+from app.modules.lexical import LexicalFeatures
+from app.modules.metadata import ChunkMetadata
+from app.modules.session_store import RAGSession, SessionStore
+
+
+@pytest.fixture
+def session(hashing_embedding_model):
+    model = hashing_embedding_model
+    chunks = [
+        "Alice Smith works at Acme Corp in Paris.",
+        "Bob Jones founded Globex in Berlin.",
+        "Überraschung: Carol Davis moved to Oslo.",
+    ]
+    sources = ["a.txt", "a.txt", "b.txt"]
+    session = RAGSession(str(uuid.uuid4()), model)
+    session.retriever.build_index(chunks, sources)
+    session.metadata = ChunkMetadata.from_store(
+        session.retriever.store, [1, 2, 1], 1700000000.0, extra_references=[(2, "c.txt", 4)]
+    )
+    session.lexical = LexicalFeatures.build(chunks)
+    session.entity_table = EntityExtractor().extract_table(chunks)
+    session.graph_builder.build_graph_from_table(session.entity_table, chunks)
+    session.graph_ready.set()
+    return session
+
+
+class TestSessionStore:
+    def test_publish_and_load(self, session, tmp_path, hashing_embedding_model):
+        store = SessionStore(str(tmp_path))
+        store.publish(session)
+        loaded = store.load(session.session_id, hashing_embedding_model)
+
+        assert list(loaded.chunks) == list(session.chunks)
+        assert list(loaded.sources) == ["a.txt", "a.txt", "b.txt"]
+        assert isinstance(loaded.retriever.vectors, np.memmap)
+        assert isinstance(loaded.retriever.store.buffer, np.memmap)
+
+        query = session.retriever.encode_query("Who founded Globex?")
+        assert loaded.retriever.search(query, k=2) == session.retriever.search(query, k=2)
+        assert loaded.graph_builder.get_relationships() == session.graph_builder.get_relationships()
+        assert loaded.entity_table.names == session.entity_table.names
+        assert loaded.entity_table.to_chunk_map() == session.entity_table.to_chunk_map()
+        assert loaded.graph_builder.expand_chunks(loaded.entity_table, [0], 2, 5) == \
+            session.graph_builder.expand_chunks(session.entity_table, [0], 2, 5)
+
+    def test_filtered_search_on_mapped_vectors(self, session, tmp_path, hashing_embedding_model):
+        store = SessionStore(str(tmp_path))
+        store.publish(session)
+        loaded = store.load(session.session_id, hashing_embedding_model)
+
+        ids = loaded.metadata.select(sources=["a.txt"], page_max=1)
+        assert ids.tolist() == [0]
+        assert loaded.metadata.select(sources=["c.txt"]).tolist() == [2]
+        assert loaded.metadata.references(2) == [("b.txt", 1), ("c.txt", 4)]
+        query = session.retriever.encode_query("Who founded Globex?")
+        assert loaded.retriever.search(query, k=3, ids=ids) == session.retriever.search(query, k=3, ids=ids)
+
+    def test_delete(self, session, tmp_path, hashing_embedding_model):
+        store = SessionStore(str(tmp_path))
+        store.publish(session)
+        loaded = store.load(session.session_id, hashing_embedding_model)
+
+        assert store.delete(session.session_id)
+        assert not store.is_live(loaded)
+        assert store.load(session.session_id, hashing_embedding_model) is None
+
+    def test_clear_from_another_worker(self, session, tmp_path, hashing_embedding_model):
+        # Each uvicorn worker has its own SessionStore over the same directory
+        uploading_worker = SessionStore(str(tmp_path))
+        other_worker = SessionStore(str(tmp_path))
+        uploading_worker.publish(session)
+        assert uploading_worker.is_live(session)
+
+        assert other_worker.delete(session.session_id)
+        assert not uploading_worker.is_live(session)
+
+    def test_graph_published_after_index(self, session, tmp_path, hashing_embedding_model):
+        uploading_worker = SessionStore(str(tmp_path))
+        other_worker = SessionStore(str(tmp_path))
+        session.graph_ready.clear()
+        uploading_worker.publish(session)
+
+        loaded = other_worker.load(session.session_id, hashing_embedding_model)
+        assert loaded.graph_pending
+        query = session.retriever.encode_query("Who founded Globex?")
+        assert loaded.retriever.search(query, k=2) == session.retriever.search(query, k=2)
+        assert not other_worker.load_graph(loaded)
+
+        session.graph_ready.set()
+        uploading_worker.publish_graph(session)
+        assert other_worker.load_graph(loaded)
+        assert not loaded.graph_pending
+        assert loaded.graph_builder.get_relationships() == session.graph_builder.get_relationships()
+        assert loaded.entity_table.names == session.entity_table.names
+
+    def test_graph_not_published_for_cleared_session(self, session, tmp_path):
+        store = SessionStore(str(tmp_path))
+        session.graph_ready.clear()
+        store.publish(session)
+        store.delete(session.session_id)
+
+        session.graph_ready.set()
+        with pytest.raises(FileNotFoundError):
+            store.publish_graph(session)
+        assert not store.exists(session.session_id)
+        assert not (tmp_path / session.session_id).exists()
+
+    def test_rejects_non_uuid_ids(self, tmp_path, hashing_embedding_model):
+        store = SessionStore(str(tmp_path))
+        assert store.load("../etc", hashing_embedding_model) is None